@@ -62,7 +62,30 @@ def create_app(config_name='development'):
                 logger.info('Added column search_history.result_json')
         except Exception as mig_err:
             logger.warning(f"Migration check failed: {mig_err}")
+        try:
+            # create_all skips existing tables, so add indexes declared on models since they were created
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            for table in db.metadata.sorted_tables:
+                existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing:
+                        index.create(db.engine)
+                        logger.info(f'Added index {table.name}.{index.name}')
+        except Exception as idx_err:
+            logger.warning(f"Index migration failed: {idx_err}")
+        try:
+            # Count history written before the rollup tables existed
+            from app.rollups import rebuild_rollups
+            rebuild_rollups()
+        except Exception as rollup_err:
+            db.session.rollback()
+            logger.warning(f"Building search rollups failed: {rollup_err}")
     
+    # Write search history in the background
+    from app.history import history_writer
+    history_writer.init_app(app)
+
     # Register blueprints
     from app.routes.route_api import route_bp
     from app.routes.health import health_bp
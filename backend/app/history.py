@@ -0,0 +1,159 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.models import db, User, SearchHistory
+from app.rollups import add_to_rollups
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """
+    Write-behind queue for SearchHistory rows.
+
+    Requests hand rows to `add` and return without touching the database. A
+    background thread collects them and writes each batch with one multi-row
+    INSERT once `batch_size` rows are waiting or `flush_interval_s` has passed,
+    then updates the dashboard rollups in a separate transaction.
+    When the queue is full (the database is down or too slow) new rows are
+    dropped and counted rather than slowing down requests. Remaining rows are
+    flushed when the process exits.
+    """
+
+    def __init__(self, batch_size=200, flush_interval_s=1.0, max_queue=10000):
+        """
+        Initialize the writer. Call `init_app` to start it.
+
+        Args:
+            batch_size (int): Rows written per INSERT at most; a full batch is flushed at once.
+            flush_interval_s (float): Longest time a row waits before being written.
+            max_queue (int): Rows held in memory at most; further rows are dropped.
+        """
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self.app = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rollup_failed = 0
+        self.batches = 0
+
+    def init_app(self, app):
+        """
+        Start the background thread for `app` and flush on interpreter exit.
+
+        Args:
+            app (Flask): Application whose database the rows are written to.
+        """
+        self.app = app
+        self._thread = threading.Thread(target=self._run, name='search-history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def add(self, username=None, **row):
+        """
+        Queue a SearchHistory row.
+
+        Args:
+            username (Optional[str]): Logged-in user; resolved to `user_id` when the row is written.
+            **row: SearchHistory column values. `created_at` defaults to now, not the time of writing.
+
+        Returns:
+            bool: False if the queue was full and the row was dropped.
+        """
+        row.setdefault('created_at', datetime.now())
+        try:
+            self._queue.put_nowait((username, row))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Search history queue full, {self.dropped} rows dropped so far")
+            return False
+
+    def _run(self):
+        """Collect rows into batches and write them until stopped and drained."""
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 and not self._stop.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=max(timeout, 0.05)))
+                except queue.Empty:
+                    if self._stop.is_set() or timeout <= 0:
+                        break
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        """Write one batch with a single INSERT, resolving usernames with a single SELECT, then count it in the rollups."""
+        with self.app.app_context():
+            try:
+                usernames = {username for username, _ in batch if username}
+                user_ids = {}
+                if usernames:
+                    user_ids = dict(
+                        db.session.query(User.username, User.id).filter(User.username.in_(usernames)).all()
+                    )
+                rows = [{**row, 'user_id': user_ids.get(username)} for username, row in batch]
+                db.session.execute(SearchHistory.__table__.insert(), rows)
+                db.session.commit()
+                self.written += len(rows)
+                self.batches += 1
+            except Exception as e:
+                db.session.rollback()
+                db.session.remove()
+                self.failed += len(batch)
+                logger.warning(f"Failed to write {len(batch)} search history rows: {e}")
+                return
+            try:
+                add_to_rollups(rows)
+            except Exception as e:
+                db.session.rollback()
+                self.rollup_failed += len(rows)
+                logger.warning(f"Failed to count {len(rows)} search history rows in the rollups: {e}")
+            finally:
+                db.session.remove()
+
+    def stop(self, timeout=10.0):
+        """
+        Flush the queued rows and stop the background thread.
+
+        Args:
+            timeout (float): Seconds to wait for the final flush.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Search history writer did not finish; {self._queue.qsize()} rows not written")
+
+    def stats(self):
+        """
+        Return queue depth and write counters.
+
+        Returns:
+            dict: Rows queued, written, dropped, failed and missing from the rollups, and batches written.
+        """
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'rollup_failed': self.rollup_failed,
+            'batches': self.batches,
+        }
+
+
+history_writer = HistoryWriter()
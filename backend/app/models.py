@@ -37,6 +37,26 @@ class SearchHistory(db.Model):
 
     user = db.relationship('User', backref=db.backref('searches', lazy=True))
 
+    __table_args__ = (
+        # A user's history, newest first (list_history pages by created_at, then id)
+        db.Index('ix_search_history_user_created', 'user_id', 'created_at'),
+        # Cached result lookups by the same user, origin, destination and options (query_history)
+        db.Index('ix_search_history_user_lookup', 'user_id', 'origin', 'destination',
+                 'route_type', 'vehicle_type', 'created_at'),
+    )
+
+# Search counts kept up to date as history is written, so dashboard statistics
+# do not have to aggregate the whole search_history table
+class SearchRollup(db.Model):
+    __tablename__ = 'search_rollups'
+
+    kind = db.Column(db.String(20), primary_key=True)
+    name = db.Column(db.String(255), primary_key=True)
+    detail = db.Column(db.String(255), primary_key=True, default='')
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (db.Index('ix_search_rollups_kind_count', 'kind', 'count'),)
+
 # Utility functions
 
 def add_user(username, password, role='user'):
@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import extract, func
+from sqlalchemy.exc import OperationalError
+
+from app.models import db, SearchHistory, SearchRollup
+
+logger = logging.getLogger(__name__)
+
+# Seconds a computed dashboard snapshot is served before the rollups are read again
+STATS_CACHE_TTL_S = 10.0
+
+# Entries listed per ranking on the dashboard
+TOP_LIMIT = 10
+
+# Times a rollup update is retried after a deadlock or lock timeout
+ROLLUP_RETRIES = 3
+
+_cache = {'stats': None, 'expires': 0.0}
+_cache_lock = threading.Lock()
+
+
+def rollup_counts(rows):
+    """
+    Count what a batch of SearchHistory rows adds to every rollup.
+
+    Args:
+        rows (list): Column values of the new rows (with user_id and created_at set).
+
+    Returns:
+        Counter: Increment per (kind, name, detail) rollup key.
+    """
+    counts = Counter()
+    for row in rows:
+        counts[('total', '', '')] += 1
+        counts[('origin', row['origin'], '')] += 1
+        counts[('destination', row['destination'], '')] += 1
+        counts[('pair', row['origin'], row['destination'])] += 1
+        counts[('route_type', row['route_type'], '')] += 1
+        counts[('hour', str(row['created_at'].hour), '')] += 1
+        if row.get('user_id') is not None:
+            counts[('user', str(row['user_id']), '')] += 1
+    return counts
+
+
+def _upsert(counts, replace=False):
+    """Add `counts` to the rollups (or overwrite them with `replace`) in the current transaction."""
+    if not counts:
+        return
+    table = SearchRollup.__table__
+    # Rows are locked in key order, so concurrent writers cannot deadlock each other
+    rows = [{'kind': k, 'name': n[:255], 'detail': d[:255], 'count': c} for (k, n, d), c in sorted(counts.items())]
+    if db.engine.dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        new_count = stmt.inserted['count']
+        stmt = stmt.on_duplicate_key_update(count=new_count if replace else table.c['count'] + new_count)
+    else:
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        new_count = stmt.excluded['count']
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['kind', 'name', 'detail'],
+            set_={'count': new_count if replace else table.c['count'] + new_count},
+        )
+    db.session.execute(stmt, rows)
+
+
+def add_to_rollups(rows):
+    """
+    Count newly written SearchHistory rows in the rollups and commit.
+
+    Runs in a transaction of its own after the rows were committed, so a
+    failed rollup update never loses history. Deadlocks and lock timeouts
+    (OperationalError) are retried ROLLUP_RETRIES times.
+
+    Args:
+        rows (list): Column values of the new rows.
+
+    Raises:
+        OperationalError: If the update still fails after the retries.
+    """
+    counts = rollup_counts(rows)
+    for attempt in range(ROLLUP_RETRIES + 1):
+        try:
+            _upsert(counts)
+            db.session.commit()
+            return
+        except OperationalError:
+            db.session.rollback()
+            if attempt == ROLLUP_RETRIES:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+def rebuild_rollups():
+    """
+    Fill empty rollups from the existing search history, once.
+
+    Runs the full aggregations a single time, e.g. after upgrading a database
+    that already holds history; afterwards the rollups are maintained as rows
+    are written.
+    """
+    if db.session.query(SearchRollup.kind).first() is not None:
+        return
+    total = db.session.query(func.count(SearchHistory.id)).scalar() or 0
+    if not total:
+        return
+    logger.info(f"Building search rollups from {total} history rows")
+    counts = Counter({('total', '', ''): total})
+    groupings = (
+        ('origin', SearchHistory.origin, None),
+        ('destination', SearchHistory.destination, None),
+        ('pair', SearchHistory.origin, SearchHistory.destination),
+        ('route_type', SearchHistory.route_type, None),
+        ('hour', extract('hour', SearchHistory.created_at), None),
+        ('user', SearchHistory.user_id, None),
+    )
+    for kind, name, detail in groupings:
+        columns = [name] if detail is None else [name, detail]
+        query = db.session.query(*columns, func.count(SearchHistory.id)).group_by(*columns)
+        if kind == 'user':
+            query = query.filter(SearchHistory.user_id.isnot(None))
+        for values in query.yield_per(10000):
+            # EXTRACT gives a float or decimal hour on some databases
+            name = str(int(values[0])) if kind == 'hour' else str(values[0])
+            counts[(kind, name, str(values[1]) if detail is not None else '')] = values[-1]
+    _upsert(counts, replace=True)
+    db.session.commit()
+
+
+def user_search_count(user_id):
+    """
+    Return how many searches of a user are in the history, from the rollups.
+
+    Args:
+        user_id (int): The user.
+
+    Returns:
+        int: Number of the user's searches written so far.
+    """
+    count = db.session.query(SearchRollup.count).filter_by(kind='user', name=str(user_id), detail='').scalar()
+    return int(count or 0)
+
+
+def _top(kind, limit=TOP_LIMIT):
+    return (
+        db.session.query(SearchRollup.name, SearchRollup.detail, SearchRollup.count)
+        .filter(SearchRollup.kind == kind)
+        .order_by(SearchRollup.count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def dashboard_stats():
+    """
+    Return the admin dashboard statistics from the rollups.
+
+    Every query reads a handful of rollup rows through the (kind, count)
+    index, so the cost does not grow with the history. Results are cached for
+    STATS_CACHE_TTL_S seconds.
+
+    Returns:
+        dict: Totals, top origins, destinations, route types and pairs, and searches per hour.
+    """
+    with _cache_lock:
+        if _cache['stats'] is not None and time.monotonic() < _cache['expires']:
+            return _cache['stats']
+
+    total = db.session.query(SearchRollup.count).filter_by(kind='total', name='', detail='').scalar() or 0
+    unique_users = db.session.query(func.count()).select_from(SearchRollup).filter(SearchRollup.kind == 'user').scalar() or 0
+    hours = db.session.query(SearchRollup.name, SearchRollup.count).filter(SearchRollup.kind == 'hour').all()
+    stats = {
+        'totals': {
+            'searches': int(total),
+            'unique_users': int(unique_users),
+        },
+        'top_origins': [{'origin': n, 'count': int(c)} for n, _, c in _top('origin')],
+        'top_destinations': [{'destination': n, 'count': int(c)} for n, _, c in _top('destination')],
+        'top_route_types': [{'route_type': n, 'count': int(c)} for n, _, c in _top('route_type', limit=None)],
+        'top_pairs': [{'origin': n, 'destination': d, 'count': int(c)} for n, d, c in _top('pair')],
+        'hourly_distribution': sorted(({'hour': int(h), 'count': int(c)} for h, c in hours), key=lambda x: x['hour']),
+    }
+    with _cache_lock:
+        _cache['stats'] = stats
+        _cache['expires'] = time.monotonic() + STATS_CACHE_TTL_S
+    return stats
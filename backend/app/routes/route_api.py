@@ -1,29 +1,104 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+import os
+import json
 import logging
+import math
+import threading
 import time
 from typing import Tuple
 
-import osmnx as ox
+import numpy as np
+from sqlalchemy import func
 
 from route_optimizer.optimizer import RouteOptimizer
-from route_optimizer.utils.helpers import haversine_distance_m
-from app.models import db, User, SearchHistory
+from route_optimizer.config.models import RouteConfig
+from route_optimizer.core.executor import SearchQueueFull
+from route_optimizer.utils.polyline import encode_polyline
+from route_optimizer.utils.simplify import significance, simplify, tolerance_for_zoom
+from route_optimizer.core.trips import Stop
+from app.models import db, SearchHistory
+from app.history import history_writer
 
 logger = logging.getLogger(__name__)
 route_bp = Blueprint('routes', __name__)
 
 # Global optimizer instance
 optimizer = None
+_history_seeded = False
+_history_seed_lock = threading.Lock()
+
+# Most frequent past origins/destinations credited to autocomplete at startup
+AUTOCOMPLETE_HISTORY_LIMIT = 5000
+
+# Path geometry encodings a client may ask for; history always stores the polyline
+GEOMETRY_FORMATS = ('coords', 'polyline')
+
+# Worker processes running route searches off the request threads; 0 (the default) searches in-thread.
+# Every worker holds its own copy of the search lists of each graph it opens, so
+# measure per-worker memory before turning this on.
+SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', 0))
+
+
+def _finite_float(value):
+    """Convert a request value to a finite float, or None if it is not a number."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
 
 
 def get_optimizer():
     """Get or create optimizer instance."""
     global optimizer
     if optimizer is None:
-        optimizer = RouteOptimizer()
+        optimizer = RouteOptimizer(RouteConfig(search_workers=SEARCH_WORKERS))
     return optimizer
 
 
+def _seed_autocomplete_history(geocoder):
+    """Credit past searches to the autocomplete ranking once per process, retrying after a failed query."""
+    global _history_seeded
+    if _history_seeded:
+        return
+    with _history_seed_lock:
+        if _history_seeded:
+            return
+        try:
+            searches = _past_searches()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Failed to load search history for autocomplete: {e}")
+            return
+        for name, lat, lon, count in searches:
+            geocoder.add_search(name, lat, lon, count)
+        _history_seeded = True
+
+
+def _past_searches():
+    """Return the most searched origins and destinations as (name, lat, lon, count) tuples."""
+    searches = []
+    for column, key in ((SearchHistory.origin, 'origin'), (SearchHistory.destination, 'destination')):
+        rows = (
+            db.session.query(column, func.count(SearchHistory.id), func.max(SearchHistory.id))
+            .group_by(column)
+            .order_by(func.count(SearchHistory.id).desc())
+            .limit(AUTOCOMPLETE_HISTORY_LIMIT)
+            .all()
+        )
+        # Coordinates come from the most recent stored response for each name
+        latest = dict(
+            db.session.query(SearchHistory.id, SearchHistory.result_json)
+            .filter(SearchHistory.id.in_([last_id for _, _, last_id in rows]))
+            .all()
+        )
+        for name, count, last_id in rows:
+            place = (latest.get(last_id) or {}).get(key) or {}
+            if 'lat' in place and 'lon' in place:
+                searches.append((name, place['lat'], place['lon'], count))
+    return searches
+
+
 @route_bp.route('/route/calculate', methods=['POST'])
 def calculate_route():
     """
@@ -34,11 +109,20 @@ def calculate_route():
         "origin": "Location name or coords",
         "destination": "Location name or coords",
         "origin_coords": [lat, lon] (optional),
-        "dest_coords": [lat, lon] (optional)
+        "dest_coords": [lat, lon] (optional),
+        "search_mode": "astar" | "bidirectional" (optional),
+        "weekday": 0-6, Monday is 0 (optional, defaults to today),
+        "geometry": "coords" | "polyline" (optional, defaults to "coords"),
+        "zoom": web map zoom level the path is shown at (optional),
+        "tolerance_m": largest simplification error in meters (optional, overrides zoom)
     }
     
     Returns:
-        JSON with route details including path, distance, and coordinates
+        JSON with route details including path, distance, and coordinates: a
+        "path_coordinates" list of {lat, lon}, or with "geometry": "polyline" a
+        "path_polyline" string in Google's encoded polyline format (precision 5).
+        With "zoom" or "tolerance_m" the path is simplified to the points visible
+        at that scale; search history always keeps the full path.
     """
     try:
         data = request.get_json()
@@ -53,54 +137,66 @@ def calculate_route():
         route_type = data.get('route_type', 'shortest')
         time_of_day = int(data.get('time_of_day', 17))
         vehicle_type = data.get('vehicle_type', 'car')
+        search_mode = data.get('search_mode')
+        weekday = data.get('weekday')
+        weekday = int(weekday) if weekday is not None else None
+        geometry = data.get('geometry', 'coords')
+        zoom = data.get('zoom')
+        tolerance_m = data.get('tolerance_m')
         
         # Validate inputs
         if not origin or not destination:
             return jsonify({'error': 'Origin and destination are required'}), 400
+        if geometry not in GEOMETRY_FORMATS:
+            return jsonify({'error': f"geometry must be one of {', '.join(GEOMETRY_FORMATS)}"}), 400
+        if tolerance_m is not None:
+            tolerance_m = _finite_float(tolerance_m)
+            if tolerance_m is None or tolerance_m < 0:
+                return jsonify({'error': 'tolerance_m must be a non-negative number'}), 400
+        if zoom is not None:
+            zoom = _finite_float(zoom)
+            if zoom is None or zoom < 0:
+                return jsonify({'error': 'zoom must be a non-negative number'}), 400
         
         logger.info(f"Route request: {origin} -> {destination}")
         
         try:
             # Geocode locations if coordinates not provided
+            geocoder = get_optimizer().geocoder
             if not origin_coords:
-                origin_coords = ox.geocode(origin)
+                origin_coords = geocoder.geocode(origin)
             else:
                 origin_coords = tuple(origin_coords)
                 
             if not dest_coords:
-                dest_coords = ox.geocode(destination)
+                dest_coords = geocoder.geocode(destination)
             else:
                 dest_coords = tuple(dest_coords)
             
             logger.info(f"Origin coordinates: {origin_coords}")
             logger.info(f"Destination coordinates: {dest_coords}")
             
-            # Estimate graph radius
-            direct_dist = haversine_distance_m(*origin_coords, *dest_coords)
-            graph_radius = max(int(direct_dist * 1.5), 3000)
-            mid_point = (
-                (origin_coords[0] + dest_coords[0]) / 2,
-                (origin_coords[1] + dest_coords[1]) / 2
-            )
-            
-            # Load graph and calculate route
+            # Load (or reuse) a graph covering the route and calculate it on that graph's
+            # handle, which concurrent requests loading other graphs cannot swap out
             optimizer_instance = get_optimizer()
-            logger.info("Loading graph...")
-            optimizer_instance.load_graph(center_point=mid_point, radius_m=graph_radius)
+            entry = optimizer_instance.load_graph_for_route(origin_coords, dest_coords)
 
             logger.info(f"Calculating {route_type} route...")
             start_time = time.time()
-            result = optimizer_instance.find_route(origin_coords, dest_coords, route_type, time_of_day, vehicle_type)
+            result = optimizer_instance.find_route(origin_coords, dest_coords, route_type, time_of_day, vehicle_type,
+                                                  search_mode=search_mode, weekday=weekday, entry=entry)
             duration = time.time() - start_time
 
             # Get node coordinates for the path
-            path_coords = []
-            for node in result["path"]:
-                node_data = optimizer_instance.graph.nodes[node]
-                path_coords.append({
-                    'lat': node_data['y'],
-                    'lon': node_data['x']
-                })
+            lats, lons = entry.compact.path_coords(result["path"])
+            # With edge snapping the route starts and ends part-way along an edge
+            if result.get("origin_snap"):
+                lats.insert(0, result["origin_snap"][0])
+                lons.insert(0, result["origin_snap"][1])
+            if result.get("dest_snap"):
+                lats.append(result["dest_snap"][0])
+                lons.append(result["dest_snap"][1])
+            path_polyline = encode_polyline(lats, lons)
 
             response_payload = {
                 'success': True,
@@ -108,6 +204,8 @@ def calculate_route():
                 'distance_m': round(result["distance_m"], 2),
                 'calculation_time_s': round(duration, 3),
                 'path_nodes': len(result["path"]),
+                'nodes_settled': result["nodes_settled"],
+                'cached': result["cached"],
                 'origin': {
                     'name': origin,
                     'lat': origin_coords[0],
@@ -118,7 +216,7 @@ def calculate_route():
                     'lat': dest_coords[0],
                     'lon': dest_coords[1]
                 },
-                'path_coordinates': path_coords,
+                'path_polyline': path_polyline,
                 'traffic_prediction': result["traffic"],
                 'estimated_time_min': result["estimated_time_min"],
                 'best_hour': result["best_hour"],
@@ -127,31 +225,39 @@ def calculate_route():
                 'vehicle_type': vehicle_type
             }
 
-            # Log search into database
-            try:
-                username = session.get('username')
-                user_id = None
-                if username:
-                    user = User.query.filter_by(username=username).first()
-                    if user:
-                        user_id = user.id
-                record = SearchHistory(
-                    user_id=user_id,
-                    origin=origin,
-                    destination=destination,
-                    route_type=route_type,
-                    vehicle_type=vehicle_type,
-                    distance_m=response_payload['distance_m'],
-                    estimated_time_min=response_payload.get('estimated_time_min'),
-                    result_json=response_payload
-                )
-                db.session.add(record)
-                db.session.commit()
-            except Exception as log_err:
-                logger.warning(f"Failed to log search history: {log_err}")
+            # Log search into database with the compact geometry; written in batches in the background
+            history_writer.add(
+                username=session.get('username'),
+                origin=origin,
+                destination=destination,
+                route_type=route_type,
+                vehicle_type=vehicle_type,
+                distance_m=response_payload['distance_m'],
+                estimated_time_min=response_payload.get('estimated_time_min'),
+                result_json=response_payload
+            )
+            geocoder.add_search(origin, *origin_coords)
+            geocoder.add_search(destination, *dest_coords)
 
+            if tolerance_m is None and zoom is not None:
+                tolerance_m = tolerance_for_zoom(zoom, (origin_coords[0] + dest_coords[0]) / 2)
+            if tolerance_m is not None:
+                # One simplification pass ranks every point; keep those visible at the client's scale
+                keep = simplify(significance(lats, lons), tolerance_m)
+                lats, lons = [lats[i] for i in keep], [lons[i] for i in keep]
+                response_payload = {**response_payload, 'path_polyline': encode_polyline(lats, lons),
+                                    'simplify_tolerance_m': round(tolerance_m, 2)}
+            if geometry == 'coords':
+                response_payload = dict(response_payload)
+                del response_payload['path_polyline']
+                response_payload['path_coordinates'] = [{'lat': lat, 'lon': lon} for lat, lon in zip(lats, lons)]
             return jsonify(response_payload), 200
-            
+
+        except SearchQueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        except TimeoutError as e:
+            logger.warning(f"Route calculation timed out: {origin} -> {destination}")
+            return jsonify({'error': 'Route calculation timed out', 'details': str(e)}), 504
         except Exception as e:
             logger.error(f"Error during route calculation: {str(e)}", exc_info=True)
             return jsonify({
@@ -187,12 +293,13 @@ def geocode_location():
         logger.info(f"Geocoding: {location}")
         
         try:
-            coords = ox.geocode(location)
+            result = get_optimizer().geocoder.resolve(location)
             return jsonify({
                 'success': True,
                 'location': location,
-                'lat': coords[0],
-                'lon': coords[1]
+                'lat': result.lat,
+                'lon': result.lon,
+                'source': result.source
             }), 200
         except Exception as e:
             logger.warning(f"Geocoding failed for {location}: {str(e)}")
@@ -201,3 +308,316 @@ def geocode_location():
     except Exception as e:
         logger.error(f"Geocoding error: {str(e)}", exc_info=True)
         return jsonify({'error': 'An error occurred during geocoding'}), 500
+
+
+@route_bp.route('/route/autocomplete', methods=['GET'])
+def autocomplete():
+    """
+    Suggest places for a partially typed name.
+
+    Query parameters:
+        q: Text typed so far
+        limit: Maximum number of suggestions (default 8, at most 20)
+
+    Returns:
+        JSON with ranked suggestions; their coordinates can be sent as
+        origin_coords/dest_coords to skip geocoding
+    """
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 8)), 1), 20)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    geocoder = get_optimizer().geocoder
+    _seed_autocomplete_history(geocoder)
+    suggestions = geocoder.suggest(query, limit) if query else []
+    return jsonify({
+        'success': True,
+        'query': query,
+        'suggestions': [
+            {'label': s.label, 'lat': s.lat, 'lon': s.lon, 'source': s.source}
+            for s in suggestions
+        ]
+    }), 200
+
+
+def _matrix_json(matrix):
+    """Convert a cost matrix to nested lists, with null where a point is unreachable."""
+    if matrix is None:
+        return None
+    values = np.round(matrix, 2).astype(object)
+    values[~np.isfinite(matrix)] = None
+    return values.tolist()
+
+
+@route_bp.route('/route/matrix', methods=['POST'])
+def route_matrix():
+    """
+    Compute route distances and times between many points at once.
+
+    Request JSON:
+    {
+        "sources": ["Location name" or [lat, lon], ...],
+        "destinations": [...] (optional, defaults to sources),
+        "route_type": "shortest" | "cost" | "fuel" | "green" | "traffic_free" (optional),
+        "vehicle_type": "car" | "bike" | "bus" | "truck" | "auto" (optional)
+    }
+
+    Returns:
+        JSON with "costs" (meters for shortest routes) and "durations_min"
+        matrices, one row per source and one column per destination; null where
+        a destination cannot be reached
+    """
+    data = request.get_json(silent=True)
+    if not data or not data.get('sources'):
+        return jsonify({'error': 'sources are required'}), 400
+
+    route_type = data.get('route_type', 'shortest')
+    vehicle_type = data.get('vehicle_type', 'car')
+    optimizer_instance = get_optimizer()
+    geocoder = optimizer_instance.geocoder
+
+    def resolve(points):
+        coords = []
+        for point in points:
+            if isinstance(point, str):
+                coords.append(geocoder.geocode(point))
+            else:
+                coords.append((float(point[0]), float(point[1])))
+        return coords
+
+    try:
+        # Too many points are rejected before any of them is geocoded, and points
+        # too far apart before a graph covering them is loaded
+        num_destinations = len(data['destinations']) if data.get('destinations') else len(data['sources'])
+        optimizer_instance.check_matrix_points(len(data['sources']), num_destinations)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        sources = resolve(data['sources'])
+        destinations = resolve(data['destinations']) if data.get('destinations') else sources
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({'error': f'Invalid point: {e}'}), 400
+    try:
+        optimizer_instance.check_matrix_points(len(sources), len(destinations), sources + destinations)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        start_time = time.time()
+        entry = optimizer_instance.load_graph_for_points(sources + destinations)
+        result = optimizer_instance.distance_matrix(sources, destinations, route_type, vehicle_type, entry=entry)
+        duration = time.time() - start_time
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Matrix computation failed: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Could not compute the matrix', 'details': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'route_type': route_type,
+        'sources': [{'lat': lat, 'lon': lon} for lat, lon in sources],
+        'destinations': [{'lat': lat, 'lon': lon} for lat, lon in destinations],
+        'costs': _matrix_json(result['costs']),
+        'durations_min': _matrix_json(result['durations_min']),
+        'computation_time_s': round(duration, 3)
+    }), 200
+
+
+# Longest optimization a single trip request may ask for
+TRIP_MAX_BUDGET_S = 10.0
+
+
+@route_bp.route('/route/trip', methods=['POST'])
+def plan_trip():
+    """
+    Plan a multi-stop trip for one or more vehicles.
+
+    Request JSON:
+    {
+        "depot": "Location name" or [lat, lon],
+        "stops": [
+            {
+                "location": "Location name" or [lat, lon],
+                "demand": 1 (optional),
+                "earliest_min": 540 (optional, minutes on the start_min clock),
+                "latest_min": 600 (optional),
+                "service_min": 5 (optional)
+            },
+            ...
+        ],
+        "capacities": [10, 10] (optional, one per vehicle; default one unlimited vehicle),
+        "start_min": 480 (optional),
+        "return_to_depot": true (optional),
+        "route_type": "shortest" (optional),
+        "vehicle_type": "car" (optional),
+        "time_budget_s": 2 (optional, at most 10)
+    }
+
+    Returns:
+        JSON with the stop order, arrival times, legs and path coordinates of
+        every vehicle, plus the stops that could not be served (-1 in a leg is the depot)
+    """
+    data = request.get_json(silent=True)
+    if not data or not data.get('depot') or not data.get('stops'):
+        return jsonify({'error': 'depot and stops are required'}), 400
+
+    optimizer_instance = get_optimizer()
+    geocoder = optimizer_instance.geocoder
+
+    def resolve(point):
+        if isinstance(point, str):
+            return geocoder.geocode(point)
+        return float(point[0]), float(point[1])
+
+    try:
+        # As for matrices: limits are checked before geocoding and before loading a graph
+        optimizer_instance.check_matrix_points(len(data['stops']) + 1, len(data['stops']) + 1)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        depot = resolve(data['depot'])
+        stops = []
+        for item in data['stops']:
+            lat, lon = resolve(item['location'])
+            stops.append(Stop(
+                lat, lon,
+                demand=float(item.get('demand', 0)),
+                earliest_min=item.get('earliest_min'),
+                latest_min=item.get('latest_min'),
+                service_min=float(item.get('service_min', 0)),
+                name=item['location'] if isinstance(item['location'], str) else None,
+            ))
+        capacities = [float(c) for c in data['capacities']] if data.get('capacities') else None
+        time_budget = min(float(data.get('time_budget_s', 2.0)), TRIP_MAX_BUDGET_S)
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        return jsonify({'error': f'Invalid trip: {e}'}), 400
+
+    points = [depot] + [(s.lat, s.lon) for s in stops]
+    try:
+        optimizer_instance.check_matrix_points(len(points), len(points), points)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        start_time = time.time()
+        entry = optimizer_instance.load_graph_for_points(points)
+        result = optimizer_instance.plan_trip(
+            depot, stops, capacities,
+            route_type=data.get('route_type', 'shortest'),
+            vehicle_type=data.get('vehicle_type', 'car'),
+            start_min=float(data.get('start_min', 0)),
+            return_to_depot=bool(data.get('return_to_depot', True)),
+            time_budget_s=time_budget,
+            entry=entry,
+        )
+        duration = time.time() - start_time
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Trip planning failed: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Could not plan the trip', 'details': str(e)}), 500
+
+    for route in result['routes']:
+        lats, lons = entry.compact.path_coords(route.pop('path'))
+        route['path_coords'] = [{'lat': lat, 'lon': lon} for lat, lon in zip(lats, lons)]
+        for leg in route['legs']:
+            leg.pop('path')
+    return jsonify({
+        'success': True,
+        'depot': {'lat': depot[0], 'lon': depot[1]},
+        'routes': result['routes'],
+        'unassigned': result['unassigned'],
+        'total_cost': result['total_cost'],
+        'computation_time_s': round(duration, 3)
+    }), 200
+
+
+@route_bp.route('/route/batch', methods=['POST'])
+def route_batch():
+    """
+    Calculate many routes in one request.
+
+    Routes on the same graph share snapping, and routes leaving from the same
+    place share one search. Each route succeeds or fails on its own.
+
+    Request JSON:
+    {
+        "routes": [
+            {
+                "origin": "Location name" or [lat, lon],
+                "destination": "Location name" or [lat, lon],
+                "route_type": "shortest" (optional),
+                "time_of_day": 17 (optional),
+                "vehicle_type": "car" (optional),
+                "weekday": 0-6 (optional)
+            },
+            ...
+        ]
+    }
+
+    Returns:
+        Newline-delimited JSON, one line per route as soon as it is done (not in
+        request order): {"index", "success", and "route" or "error"}
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('routes'), list) or not data['routes']:
+        return jsonify({'error': 'routes are required'}), 400
+
+    optimizer_instance = get_optimizer()
+    if len(data['routes']) > optimizer_instance.config.batch_max_routes:
+        return jsonify({'error': f"At most {optimizer_instance.config.batch_max_routes} routes per batch"}), 400
+    geocoder = optimizer_instance.geocoder
+
+    def resolve(point):
+        if isinstance(point, str):
+            return geocoder.geocode(point)
+        return float(point[0]), float(point[1])
+
+    def line(index, outcome):
+        if 'error' in outcome:
+            return json.dumps({'index': index, 'success': False, 'error': outcome['error']}) + '\n'
+        result = outcome['route']
+        lats, lons = outcome['compact'].path_coords(result['path'])
+        path_coords = [{'lat': lat, 'lon': lon} for lat, lon in zip(lats, lons)]
+        if result.get('origin_snap'):
+            path_coords.insert(0, {'lat': result['origin_snap'][0], 'lon': result['origin_snap'][1]})
+        if result.get('dest_snap'):
+            path_coords.append({'lat': result['dest_snap'][0], 'lon': result['dest_snap'][1]})
+        return json.dumps({'index': index, 'success': True, 'route': {
+            'distance_m': round(result['distance_m'], 2),
+            'path_nodes': len(result['path']),
+            'nodes_settled': result['nodes_settled'],
+            'cached': result['cached'],
+            'path_coordinates': path_coords,
+            'traffic_prediction': result['traffic'],
+            'estimated_time_min': result['estimated_time_min'],
+            'best_hour': result['best_hour'],
+            'best_time_min': result['best_time_min'],
+        }}) + '\n'
+
+    def generate():
+        start_time = time.time()
+        valid, positions = [], []
+        for index, item in enumerate(data['routes']):
+            try:
+                valid.append({
+                    'origin_coords': resolve(item['origin']),
+                    'dest_coords': resolve(item['destination']),
+                    'route_type': item.get('route_type', 'shortest'),
+                    'time_of_day': int(item.get('time_of_day', 17)),
+                    'vehicle_type': item.get('vehicle_type', 'car'),
+                    'weekday': int(item['weekday']) if item.get('weekday') is not None else None,
+                })
+                positions.append(index)
+            except Exception as e:
+                yield line(index, {'error': f'Invalid route: {e}'})
+        for i, outcome in optimizer_instance.find_routes(valid):
+            yield line(positions[i], outcome)
+        logger.info(f"Batch of {len(data['routes'])} routes done in {time.time() - start_time:.2f}s")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
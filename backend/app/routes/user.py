@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, session, request
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, or_
 from app.models import db, User, SearchHistory
+from app.rollups import user_search_count
+from route_optimizer.utils.polyline import decode_polyline
 
 user_bp = Blueprint('user', __name__)
 
@@ -16,20 +18,64 @@ def current_user():
     return User.query.filter_by(username=username).first()
 
 
+def with_geometry(result):
+    """
+    Expand a stored route's polyline into path_coordinates, unless the client
+    asked for the compact form with ?geometry=polyline.
+    """
+    if not result or 'path_polyline' not in result or request.args.get('geometry') == 'polyline':
+        return result
+    result = dict(result)
+    result['path_coordinates'] = [{'lat': lat, 'lon': lon} for lat, lon in decode_polyline(result.pop('path_polyline'))]
+    return result
+
+
+TOTAL_MODES = ('cached', 'exact', 'none')
+
+
 @user_bp.route('/history', methods=['GET'])
 def list_history():
+    """
+    List the user's searches, newest first.
+
+    Pages are selected with ?page=N (offset) or, cheaper for deep pages, with
+    ?after=<next_cursor of the previous page> (keyset). ?total=cached (default)
+    takes the count from the search rollups, exact counts the rows, none skips it.
+    """
     if not require_login():
         return jsonify({'error': 'Not logged in'}), 401
     user = current_user()
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('page_size', 20))
-
-    q = (SearchHistory.query
-         .filter(SearchHistory.user_id == user.id)
-         .order_by(desc(SearchHistory.created_at)))
-
-    items = q.limit(page_size).offset((page - 1) * page_size).all()
-    total = q.count()
+    try:
+        page = int(request.args.get('page', 1))
+        page_size = int(request.args.get('page_size', 20))
+        after = request.args.get('after')
+        after = int(after) if after else None
+    except ValueError:
+        return jsonify({'error': 'page, page_size and after must be integers'}), 400
+    if page < 1 or page_size < 1:
+        return jsonify({'error': 'page and page_size must be positive'}), 400
+    total_mode = request.args.get('total', 'cached')
+    if total_mode not in TOTAL_MODES:
+        return jsonify({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+
+    q = SearchHistory.query.filter(SearchHistory.user_id == user.id)
+    if after is not None:
+        # Continue right after the cursor row, walking the (user_id, created_at) index
+        cursor = q.filter(SearchHistory.id == after).with_entities(SearchHistory.created_at).first()
+        if cursor is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        q = q.filter(or_(
+            SearchHistory.created_at < cursor.created_at,
+            and_(SearchHistory.created_at == cursor.created_at, SearchHistory.id < after),
+        ))
+    q = q.order_by(desc(SearchHistory.created_at), desc(SearchHistory.id))
+
+    if after is None:
+        q = q.offset((page - 1) * page_size)
+    # One extra row tells whether there is a next page
+    items = q.limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
 
     data = []
     for it in items:
@@ -44,7 +90,19 @@ def list_history():
             'created_at': it.created_at.isoformat(),
         })
 
-    return jsonify({'success': True, 'items': data, 'total': total, 'page': page, 'page_size': page_size})
+    response = {
+        'success': True,
+        'items': data,
+        'page_size': page_size,
+        'next_cursor': items[-1].id if has_more else None,
+    }
+    if after is None:
+        response['page'] = page
+    if total_mode == 'cached':
+        response['total'] = user_search_count(user.id)
+    elif total_mode == 'exact':
+        response['total'] = SearchHistory.query.filter(SearchHistory.user_id == user.id).count()
+    return jsonify(response)
 
 
 @user_bp.route('/history/<int:history_id>', methods=['GET'])
@@ -55,7 +113,7 @@ def get_history(history_id):
     it = SearchHistory.query.filter(and_(SearchHistory.id == history_id, SearchHistory.user_id == user.id)).first()
     if not it:
         return jsonify({'error': 'Not found'}), 404
-    return jsonify({'success': True, 'result': it.result_json})
+    return jsonify({'success': True, 'result': with_geometry(it.result_json)})
 
 
 @user_bp.route('/history/query', methods=['GET'])
@@ -85,4 +143,4 @@ def query_history():
     if not q:
         return jsonify({'error': 'No cached result'}), 404
 
-    return jsonify({'success': True, 'result': q.result_json})
+    return jsonify({'success': True, 'result': with_geometry(q.result_json)})
@@ -1,5 +1,75 @@
-import React from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { MapPin, Loader } from 'lucide-react';
+import { routeService } from '../services/api';
+
+const AUTOCOMPLETE_DELAY_MS = 150;
+
+const PlaceInput = ({ label, value, placeholder, onChange, onSelect }) => {
+  const [suggestions, setSuggestions] = useState([]);
+  const [open, setOpen] = useState(false);
+  const requestId = useRef(0);
+
+  useEffect(() => {
+    const query = value.trim();
+    if (!open || query.length < 2) {
+      setSuggestions([]);
+      return undefined;
+    }
+    const id = ++requestId.current;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await routeService.autocomplete(query);
+        // Ignore responses for text the user has already changed
+        if (id === requestId.current) {
+          setSuggestions(data.suggestions || []);
+        }
+      } catch (e) {
+        setSuggestions([]);
+      }
+    }, AUTOCOMPLETE_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [value, open]);
+
+  const choose = (suggestion) => {
+    onSelect(suggestion);
+    setOpen(false);
+    setSuggestions([]);
+  };
+
+  return (
+    <div className="relative">
+      <label className="block text-sm font-medium text-gray-700 mb-2">
+        <MapPin className="inline w-4 h-4 mr-2" />
+        {label}
+      </label>
+      <input
+        type="text"
+        value={value}
+        onChange={(e) => {
+          onChange(e.target.value);
+          setOpen(true);
+        }}
+        onBlur={() => setTimeout(() => setOpen(false), 100)}
+        placeholder={placeholder}
+        autoComplete="off"
+        className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent outline-none transition"
+      />
+      {open && suggestions.length > 0 && (
+        <ul className="absolute z-10 mt-1 w-full bg-white border border-gray-200 rounded-lg shadow-lg max-h-60 overflow-y-auto">
+          {suggestions.map((s) => (
+            <li
+              key={`${s.label}-${s.lat}-${s.lon}`}
+              onMouseDown={() => choose(s)}
+              className="px-4 py-2 text-sm text-gray-700 hover:bg-blue-50 cursor-pointer"
+            >
+              {s.label}
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+};
 
 export const SearchBar = ({ 
   origin, 
@@ -8,6 +78,8 @@ export const SearchBar = ({
   vehicleType,
   onOriginChange, 
   onDestinationChange, 
+  onOriginSelect,
+  onDestinationSelect,
   onRouteTypeChange,
   onVehicleTypeChange,
   onSearch, 
@@ -21,33 +93,21 @@ export const SearchBar = ({
   return (
     <div className="w-full bg-white rounded-lg shadow-lg p-6">
       <form onSubmit={handleSubmit} className="space-y-4">
-        <div>
-          <label className="block text-sm font-medium text-gray-700 mb-2">
-            <MapPin className="inline w-4 h-4 mr-2" />
-            Origin
-          </label>
-          <input
-            type="text"
-            value={origin}
-            onChange={(e) => onOriginChange(e.target.value)}
-            placeholder="Enter origin location (e.g., Gandhipuram, Coimbatore)"
-            className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent outline-none transition"
-          />
-        </div>
+        <PlaceInput
+          label="Origin"
+          value={origin}
+          onChange={onOriginChange}
+          onSelect={onOriginSelect}
+          placeholder="Enter origin location (e.g., Gandhipuram, Coimbatore)"
+        />
 
-        <div>
-          <label className="block text-sm font-medium text-gray-700 mb-2">
-            <MapPin className="inline w-4 h-4 mr-2" />
-            Destination
-          </label>
-          <input
-            type="text"
-            value={destination}
-            onChange={(e) => onDestinationChange(e.target.value)}
-            placeholder="Enter destination location (e.g., Prozone Mall, Coimbatore)"
-            className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent outline-none transition"
-          />
-        </div>
+        <PlaceInput
+          label="Destination"
+          value={destination}
+          onChange={onDestinationChange}
+          onSelect={onDestinationSelect}
+          placeholder="Enter destination location (e.g., Prozone Mall, Coimbatore)"
+        />
 
         <div>
           <label className="block text-sm font-medium text-gray-700 mb-2">Route Type</label>
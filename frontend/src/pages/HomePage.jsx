@@ -1,18 +1,27 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import { SearchBar } from '../components/SearchBar';
 import { RouteMap } from '../components/RouteMap';
 import { RouteDetails } from '../components/RouteDetails';
 import { ErrorAlert } from '../components/ErrorAlert';
 import { routeService } from '../services/api';
+import { decodePolyline } from '../utils/polyline';
 
 export const HomePage = () => {
   const [origin, setOrigin] = useState('');
   const [destination, setDestination] = useState('');
+  // Coordinates of a picked suggestion; cleared when the text is edited
+  const [originCoords, setOriginCoords] = useState(null);
+  const [destCoords, setDestCoords] = useState(null);
   const [routeType, setRouteType] = useState('shortest');
   const [vehicleType, setVehicleType] = useState('car');
   const [route, setRoute] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Routes arrive with an encoded polyline; older stored routes carry the coordinates
+  const pathCoordinates = useMemo(
+    () => route?.path_coordinates || decodePolyline(route?.path_polyline),
+    [route]
+  );
 
   useEffect(() => {
     // Load selected route from localStorage if present
@@ -40,7 +49,7 @@ export const HomePage = () => {
     setError(null);
 
     try {
-      const result = await routeService.calculateRoute(origin, destination, null, null, routeType, undefined, vehicleType);
+      const result = await routeService.calculateRoute(origin, destination, originCoords, destCoords, routeType, undefined, vehicleType);
       if (result.success) {
         setRoute(result);
       } else {
@@ -64,8 +73,22 @@ export const HomePage = () => {
             destination={destination}
             routeType={routeType}
             vehicleType={vehicleType}
-            onOriginChange={setOrigin}
-            onDestinationChange={setDestination}
+            onOriginChange={(value) => {
+              setOrigin(value);
+              setOriginCoords(null);
+            }}
+            onDestinationChange={(value) => {
+              setDestination(value);
+              setDestCoords(null);
+            }}
+            onOriginSelect={(s) => {
+              setOrigin(s.label);
+              setOriginCoords([s.lat, s.lon]);
+            }}
+            onDestinationSelect={(s) => {
+              setDestination(s.label);
+              setDestCoords([s.lat, s.lon]);
+            }}
             onRouteTypeChange={setRouteType}
             onVehicleTypeChange={setVehicleType}
             onSearch={handleSearch}
@@ -86,7 +109,7 @@ export const HomePage = () => {
               <RouteMap
                 origin={route?.origin}
                 destination={route?.destination}
-                pathCoordinates={route?.path_coordinates}
+                pathCoordinates={pathCoordinates}
               />
             </div>
           </div>
@@ -24,6 +24,7 @@ export const routeService = {
         route_type: routeType,
         time_of_day: timeOfDay,
         vehicle_type: vehicleType,
+        geometry: 'polyline',
       });
       return response.data;
     } catch (error) {
@@ -45,6 +46,20 @@ export const routeService = {
     }
   },
 
+  /**
+   * Suggest known places for a partially typed name
+   */
+  autocomplete: async (query, limit = 8) => {
+    try {
+      const response = await api.get('/route/autocomplete', {
+        params: { q: query, limit },
+      });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to fetch suggestions' };
+    }
+  },
+
   /**
    * Health check
    */
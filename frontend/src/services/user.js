@@ -19,7 +19,7 @@ export const userService = {
   },
   historyItem: async (id) => {
     try {
-      const res = await api.get(`/history/${id}`);
+      const res = await api.get(`/history/${id}?geometry=polyline`);
       return res.data;
     } catch (error) {
       return error.response?.data || { error: 'Failed to load history item' };
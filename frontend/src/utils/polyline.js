@@ -0,0 +1,32 @@
+/**
+ * Decode a Google encoded polyline (as returned in `path_polyline`) into
+ * `{ lat, lon }` points.
+ */
+export const decodePolyline = (encoded, precision = 5) => {
+  const points = [];
+  if (!encoded) return points;
+  const factor = 10 ** precision;
+  let index = 0;
+  let lat = 0;
+  let lon = 0;
+
+  const nextValue = () => {
+    let result = 0;
+    let shift = 0;
+    let byte;
+    do {
+      byte = encoded.charCodeAt(index++) - 63;
+      result += (byte & 0x1f) * 2 ** shift;
+      shift += 5;
+    } while (byte >= 0x20);
+    // Zigzag decoding; arithmetic rather than bitwise so values above 2^31 stay exact
+    return result % 2 === 1 ? -(result + 1) / 2 : result / 2;
+  };
+
+  while (index < encoded.length) {
+    lat += nextValue();
+    lon += nextValue();
+    points.push({ lat: lat / factor, lon: lon / factor });
+  }
+  return points;
+};
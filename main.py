@@ -2,11 +2,8 @@ import logging
 import time
 from typing import Tuple
 
-import osmnx as ox
-
 from route_optimizer.optimizer import RouteOptimizer
 from route_optimizer.visualization.mapper import RouteVisualizer
-from route_optimizer.utils.helpers import haversine_distance_m
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -36,21 +33,16 @@ def main() -> None:
         from_place = get_location_input("Enter origin location (e.g., 'Gandhipuram, Coimbatore'): ")
         to_place = get_location_input("Enter destination location (e.g., 'Prozone Mall, Coimbatore'): ")
 
+        optimizer = RouteOptimizer()
+
         logger.info("Converting locations to coordinates...")
-        origin_coords: Tuple[float, float] = ox.geocode(from_place)
-        dest_coords: Tuple[float, float] = ox.geocode(to_place)
+        origin_coords: Tuple[float, float] = optimizer.geocoder.geocode(from_place)
+        dest_coords: Tuple[float, float] = optimizer.geocoder.geocode(to_place)
         logger.info(f"Origin Coordinates: {origin_coords}")
         logger.info(f"Destination Coordinates: {dest_coords}")
 
-        # Estimate graph radius
-        direct_dist = haversine_distance_m(*origin_coords, *dest_coords)
-        graph_radius = max(int(direct_dist * 1.5), 3000)  # Ensure minimum radius of 3 km
-        mid_point = ((origin_coords[0] + dest_coords[0]) / 2,
-                     (origin_coords[1] + dest_coords[1]) / 2)
-
-        # Load graph and calculate shortest path
-        optimizer = RouteOptimizer()
-        optimizer.load_graph(center_point=mid_point, radius_m=graph_radius)
+        # Load a graph covering the route and calculate shortest path
+        optimizer.load_graph_for_route(origin_coords, dest_coords)
 
         logger.info("Calculating shortest route...")
         start_time = time.time()
@@ -62,7 +54,7 @@ def main() -> None:
         print(f"Calculation Time: {duration:.3f} seconds\n")
 
         # Visualize the route
-        RouteVisualizer.create_and_show_map(optimizer.graph, result, origin_coords, dest_coords)
+        RouteVisualizer.create_and_show_map(optimizer.compact, result, origin_coords, dest_coords)
 
     except ValueError as ve:
         logger.warning(f"Invalid input: {ve}")
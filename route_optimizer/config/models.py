@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Tuple
 
 @dataclass(frozen=True)
 class RouteConfig:
@@ -7,5 +8,60 @@ class RouteConfig:
 
     Attributes:
         graph_cache_dir (str): Directory path to store or read cached graph data.
+        binary_cache (bool): Keep a memory-mapped binary copy of every cached graph and load
+                             it instead of parsing GraphML.
+        contraction_weights (Tuple[str, ...]): Edge weights to build contraction hierarchies
+                                               for when a graph is loaded. Empty disables them.
+        num_landmarks (int): Number of ALT landmarks selected when a graph is loaded. 0 disables ALT.
+        search_mode (str): Default search mode, 'astar' or 'bidirectional'.
+        snap_to_edges (bool): Project route endpoints onto the nearest edge instead of the nearest node.
+        registry_max_mb (int): Memory budget of the in-process graph registry in megabytes.
+        coverage_detour_factor (float): Longest detour, relative to the direct distance, a loaded
+                                        graph must cover to be reused for a trip.
+        coverage_margin_m (float): Minimum clearance in meters between a trip's search area
+                                   and the boundary of a reused graph.
+        tile_size_deg (float): Edge length in degrees of the tiles route graphs are stitched
+                               from. 0 downloads one disc per route instead.
+        offline (bool): Never download; graphs must come from the cache or an ingested OSM extract.
+        result_cache_mb (int): Memory budget of the route result cache in megabytes. 0 disables it.
+        result_cache_ttl_s (float): Seconds a cached route result stays valid.
+        geocode_db (str): SQLite file storing geocoded place queries.
+        nominatim_cache_dir (str): osmnx's HTTP response cache, indexed by the offline gazetteer.
+        geocode_memory_size (int): Number of place queries kept in the in-memory geocoding LRU.
+        autocomplete_history_size (int): Most searched names autocomplete keeps that no geocoding
+                                         layer knows (e.g. typed next to picked coordinates).
+        matrix_workers (int): Processes used for large distance matrices. 0 uses every CPU.
+        matrix_max_points (int): Largest number of sources or destinations a distance matrix may have.
+        matrix_max_extent_m (float): Longest diagonal in meters of the bounding box of a distance
+                                     matrix's or trip's points, since a graph covering it is loaded.
+        batch_workers (int): Threads routing the graph groups of a batch request concurrently.
+        batch_max_routes (int): Largest number of routes a batch request may contain.
+        search_workers (int): Worker processes route searches run in. 0 searches in the calling thread.
+        search_queue_size (int): Most searches queued or running in the workers; more are rejected.
+        search_timeout_s (float): Seconds to wait for a search in a worker process.
     """
     graph_cache_dir: str = "./graph_cache"
+    binary_cache: bool = True
+    contraction_weights: Tuple[str, ...] = ()
+    num_landmarks: int = 8
+    search_mode: str = "astar"
+    snap_to_edges: bool = False
+    registry_max_mb: int = 1024
+    coverage_detour_factor: float = 1.5
+    coverage_margin_m: float = 500.0
+    tile_size_deg: float = 0.05
+    offline: bool = False
+    result_cache_mb: int = 64
+    result_cache_ttl_s: float = 900.0
+    geocode_db: str = "./graph_cache/geocode.sqlite"
+    nominatim_cache_dir: str = "./cache"
+    geocode_memory_size: int = 4096
+    autocomplete_history_size: int = 4096
+    matrix_workers: int = 0
+    matrix_max_points: int = 500
+    matrix_max_extent_m: float = 100000.0
+    batch_workers: int = 4
+    batch_max_routes: int = 1000
+    search_workers: int = 0
+    search_queue_size: int = 64
+    search_timeout_s: float = 30.0
@@ -0,0 +1,415 @@
+import os
+import logging
+from heapq import heappush, heappop, heapify
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import networkx as nx
+
+from ..graph.compact import CompactGraph
+from .search import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy for one weight of a CompactGraph.
+
+    Nodes are contracted one by one in order of importance. Whenever contracting
+    a node would destroy a shortest path between two of its neighbors, a shortcut
+    edge remembering the bypassed ("middle") node is added. Queries then run a
+    bidirectional Dijkstra that only relaxes edges leading to higher-ranked nodes,
+    which settles a few hundred nodes instead of a large part of the network.
+
+    Upward edges are stored as two CSR structures indexed by the lower-ranked
+    endpoint: `fwd_*` for edges u -> w and `bwd_*` for edges w -> u (stored at u),
+    each with the middle node of the shortcut or -1 for an original edge.
+    """
+
+    def __init__(
+        self,
+        weight: str,
+        fingerprint: str,
+        rank: np.ndarray,
+        fwd: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        bwd: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    ) -> None:
+        """
+        Initialize the hierarchy from its arrays. Use `build` or `load` instead of calling this directly.
+
+        Args:
+            weight (str): Edge weight the hierarchy was built for.
+            fingerprint (str): `CompactGraph.fingerprint` of the source graph.
+            rank (np.ndarray): Contraction order of every node.
+            fwd: Offsets, heads, weights and middle nodes of upward forward edges.
+            bwd: Offsets, heads, weights and middle nodes of upward backward edges.
+        """
+        self.weight = weight
+        self.fingerprint = fingerprint
+        self.rank = rank
+        self.fwd = fwd
+        self.bwd = bwd
+        self._fwd_lists = tuple(a.tolist() for a in fwd)
+        self._bwd_lists = tuple(a.tolist() for a in bwd)
+        self._rank_list = rank.tolist()
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int((self.fwd[3] >= 0).sum() + (self.bwd[3] >= 0).sum())
+
+    @classmethod
+    def build(cls, compact: CompactGraph, weight: str = "length", witness_settle_limit: int = 60) -> "ContractionHierarchy":
+        """
+        Contract every node of `compact` and return the resulting hierarchy.
+
+        Args:
+            compact (CompactGraph): Graph to preprocess.
+            weight (str, optional): Edge weight to build the hierarchy for. Defaults to "length".
+            witness_settle_limit (int, optional): Maximum nodes settled by one witness search.
+                Lower values preprocess faster but add more (harmless) shortcuts. Defaults to 60.
+
+        Returns:
+            ContractionHierarchy: The preprocessed hierarchy.
+        """
+        n = compact.num_nodes
+        offsets, heads, costs = compact.adjacency(weight)
+
+        # Working graph: parallel edges collapsed to their minimum, self loops dropped.
+        out_adj: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+        in_adj: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+        for u in range(n):
+            for e in range(offsets[u], offsets[u + 1]):
+                v, c = heads[e], costs[e]
+                if v != u and (v not in out_adj[u] or c < out_adj[u][v][0]):
+                    out_adj[u][v] = (c, -1)
+                    in_adj[v][u] = (c, -1)
+
+        deleted_neighbors = [0] * n
+
+        def witness_distances(source: int, skip: int, max_cost: float, targets: set) -> Dict[int, float]:
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            remaining = len(targets)
+            settled = 0
+            while heap and settled < witness_settle_limit:
+                d, x = heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > max_cost:
+                    break
+                settled += 1
+                if x in targets:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+                for y, (c, _) in out_adj[x].items():
+                    if y == skip:
+                        continue
+                    nd = d + c
+                    if nd < dist.get(y, float("inf")):
+                        dist[y] = nd
+                        heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts_for(v: int) -> List[Tuple[int, int, float]]:
+            result = []
+            outs = [(w, c) for w, (c, _) in out_adj[v].items()]
+            if not outs:
+                return result
+            max_out = max(c for _, c in outs)
+            targets = set(out_adj[v])
+            for u, (c_in, _) in in_adj[v].items():
+                dist = witness_distances(u, v, c_in + max_out, targets - {u})
+                for w, c_out in outs:
+                    if w == u:
+                        continue
+                    via = c_in + c_out
+                    if dist.get(w, float("inf")) > via:
+                        result.append((u, w, via))
+            return result
+
+        def priority(v: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+            # Edge difference (weighted twice) plus contracted neighbors, which
+            # spreads contraction evenly over the graph.
+            shortcuts = shortcuts_for(v)
+            edge_difference = len(shortcuts) - len(in_adj[v]) - len(out_adj[v])
+            return 2 * edge_difference + deleted_neighbors[v], shortcuts
+
+        logger.info(f"Building contraction hierarchy for '{weight}' on {n} nodes...")
+        queue = [(priority(v)[0], v) for v in range(n)]
+        heapify(queue)
+
+        rank = np.zeros(n, dtype=np.int64)
+        up_edges: List[Tuple[int, int, float, int]] = []
+        order = 0
+        while queue:
+            _, v = heappop(queue)
+            # Lazy update: re-evaluate and requeue if no longer the cheapest node.
+            current, shortcuts = priority(v)
+            if queue and current > queue[0][0]:
+                heappush(queue, (current, v))
+                continue
+
+            for u, w, via in shortcuts:
+                if w not in out_adj[u] or via < out_adj[u][w][0]:
+                    out_adj[u][w] = (via, v)
+                    in_adj[w][u] = (via, v)
+
+            # Every remaining edge touching v goes upward from v's point of view;
+            # record it and remove v from the working graph.
+            for w, (c, mid) in out_adj[v].items():
+                up_edges.append((v, w, c, mid))
+                del in_adj[w][v]
+                deleted_neighbors[w] += 1
+            for u, (c, mid) in in_adj[v].items():
+                up_edges.append((u, v, c, mid))
+                del out_adj[u][v]
+                deleted_neighbors[u] += 1
+            out_adj[v] = {}
+            in_adj[v] = {}
+
+            rank[v] = order
+            order += 1
+
+        hierarchy = cls._from_edges(weight, compact.fingerprint(), rank, up_edges)
+        logger.info(f"Contraction hierarchy built with {hierarchy.num_shortcuts} shortcuts")
+        return hierarchy
+
+    @classmethod
+    def _from_edges(cls, weight: str, fingerprint: str, rank: np.ndarray, edges: List[Tuple[int, int, float, int]]) -> "ContractionHierarchy":
+        """Split upward edges into the forward and backward CSR structures."""
+        n = len(rank)
+        src = np.fromiter((e[0] for e in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((e[1] for e in edges), dtype=np.int64, count=len(edges))
+        cost = np.fromiter((e[2] for e in edges), dtype=np.float64, count=len(edges))
+        mid = np.fromiter((e[3] for e in edges), dtype=np.int64, count=len(edges))
+
+        upward = rank[src] < rank[dst]
+
+        def csr(owner: np.ndarray, head: np.ndarray, w: np.ndarray, m: np.ndarray):
+            order = np.argsort(owner, kind="stable")
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(owner, minlength=n), out=offsets[1:])
+            return offsets, head[order], w[order], m[order]
+
+        fwd = csr(src[upward], dst[upward], cost[upward], mid[upward])
+        bwd = csr(dst[~upward], src[~upward], cost[~upward], mid[~upward])
+        return cls(weight, fingerprint, rank, fwd, bwd)
+
+    def query(self, source: int, target: int) -> SearchResult:
+        """
+        Find the shortest path between two compact node ids.
+
+        Args:
+            source (int): Compact id of the start node.
+            target (int): Compact id of the end node.
+
+        Returns:
+            SearchResult: Unpacked path over original edges, its cost and the number of settled nodes.
+
+        Raises:
+            nx.NetworkXNoPath: If `target` is unreachable from `source`.
+        """
+        return self.query_between({source: 0.0}, {target: 0.0})
+
+    def query_between(self, sources: Dict[int, float], targets: Dict[int, float]) -> SearchResult:
+        """
+        Find the shortest path from several weighted start nodes to several weighted end nodes.
+
+        Used for points in the middle of an edge, like `CompactSearchEngine.astar_between`.
+        The upward searches start from every source and target at its initial
+        cost, as if from a virtual node below all others joined to them.
+
+        Args:
+            sources (Dict[int, float]): Compact id to initial cost.
+            targets (Dict[int, float]): Compact id to cost added when finishing there.
+
+        Returns:
+            SearchResult: Unpacked path between the best source/target pair and its
+            total cost including both initial costs.
+
+        Raises:
+            nx.NetworkXNoPath: If no target is reachable.
+        """
+        searches = (self._fwd_lists, self._bwd_lists)
+        dist = (dict(sources), dict(targets))
+        parent = ({s: -1 for s in sources}, {t: -1 for t in targets})
+        heaps = ([(d, s) for s, d in sources.items()], [(d, t) for t, d in targets.items()])
+        for heap in heaps:
+            heapify(heap)
+        done = [False, False]
+        best, meeting = float("inf"), -1
+        settled = 0
+
+        while not (done[0] and done[1]):
+            for side in (0, 1):
+                if done[side]:
+                    continue
+                heap = heaps[side]
+                if not heap or heap[0][0] >= best:
+                    done[side] = True
+                    continue
+                d, u = heappop(heap)
+                if d > dist[side][u]:
+                    continue
+                settled += 1
+                other = dist[1 - side].get(u)
+                if other is not None and d + other < best:
+                    best, meeting = d + other, u
+                offsets, heads, costs, _ = searches[side]
+                for e in range(offsets[u], offsets[u + 1]):
+                    v = heads[e]
+                    nd = d + costs[e]
+                    if nd < dist[side].get(v, float("inf")):
+                        dist[side][v] = nd
+                        parent[side][v] = u
+                        heappush(heap, (nd, v))
+
+        if meeting < 0:
+            raise nx.NetworkXNoPath(f"No path found between compact nodes {', '.join(map(str, sources))} "
+                                    f"and {', '.join(map(str, targets))}")
+
+        up = []
+        node = meeting
+        while node != -1:
+            up.append(node)
+            node = parent[0][node]
+        up.reverse()
+        node = parent[1][meeting]
+        down = [meeting]
+        while node != -1:
+            down.append(node)
+            node = parent[1][node]
+        packed = up + down[1:]
+
+        path = [packed[0]]
+        for a, b in zip(packed, packed[1:]):
+            path.extend(self._unpack_edge(a, b))
+        return SearchResult(path, best, settled)
+
+    def many_to_many(self, sources: Sequence[int], targets: Sequence[int]) -> np.ndarray:
+        """
+        Compute the cost between every source and every target with bucket-based search.
+
+        One backward upward search per target leaves its distance in a bucket
+        at every node it reaches; one forward upward search per source then
+        scans the buckets of the nodes it reaches. Each search only climbs the
+        hierarchy, so the whole matrix costs about ``len(sources) + len(targets)``
+        point-to-point queries instead of their product.
+
+        Args:
+            sources (Sequence[int]): Compact ids of the start nodes.
+            targets (Sequence[int]): Compact ids of the end nodes.
+
+        Returns:
+            np.ndarray: Cost matrix of shape ``(len(sources), len(targets))``; inf where unreachable.
+        """
+        buckets: Dict[int, List[Tuple[int, float]]] = {}
+        for j, target in enumerate(targets):
+            for node, d in self._upward_search(target, self._bwd_lists).items():
+                buckets.setdefault(node, []).append((j, d))
+
+        inf = float("inf")
+        rows = []
+        for source in sources:
+            row = [inf] * len(targets)
+            for node, d in self._upward_search(source, self._fwd_lists).items():
+                for j, dt in buckets.get(node, ()):
+                    if d + dt < row[j]:
+                        row[j] = d + dt
+            rows.append(row)
+        return np.asarray(rows, dtype=np.float64).reshape(len(sources), len(targets))
+
+    @staticmethod
+    def _upward_search(start: int, lists: Tuple[List[int], List[int], List[float], List[int]]) -> Dict[int, float]:
+        """Run a complete Dijkstra over upward edges and return the distance of every reached node."""
+        offsets, heads, costs, _ = lists
+        dist = {start: 0.0}
+        heap = [(0.0, start)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                nd = d + costs[e]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        return dist
+
+    def _edge_middle(self, a: int, b: int) -> int:
+        """Return the middle node of the cheapest hierarchy edge a -> b (-1 for an original edge)."""
+        if self._rank_list[a] < self._rank_list[b]:
+            offsets, heads, costs, mids = self._fwd_lists
+            owner, other = a, b
+        else:
+            offsets, heads, costs, mids = self._bwd_lists
+            owner, other = b, a
+        best_cost, best_mid = float("inf"), -1
+        for e in range(offsets[owner], offsets[owner + 1]):
+            if heads[e] == other and costs[e] < best_cost:
+                best_cost, best_mid = costs[e], mids[e]
+        return best_mid
+
+    def _unpack_edge(self, a: int, b: int) -> List[int]:
+        """Expand a possibly shortcut edge a -> b into original nodes, excluding `a`."""
+        result = []
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            mid = self._edge_middle(x, y)
+            if mid < 0:
+                result.append(y)
+            else:
+                stack.append((mid, y))
+                stack.append((x, mid))
+        return result
+
+    def save(self, path: str) -> None:
+        """
+        Save the hierarchy as a NumPy archive.
+
+        Args:
+            path (str): Destination file (conventionally next to the GraphML cache file).
+        """
+        np.savez(
+            path,
+            weight=np.array(self.weight),
+            fingerprint=np.array(self.fingerprint),
+            rank=self.rank,
+            **{f"fwd_{i}": a for i, a in enumerate(self.fwd)},
+            **{f"bwd_{i}": a for i, a in enumerate(self.bwd)},
+        )
+        logger.info(f"Contraction hierarchy saved to {path}")
+
+    @classmethod
+    def load(cls, path: str, compact: CompactGraph) -> Optional["ContractionHierarchy"]:
+        """
+        Load a saved hierarchy if it exists and still matches `compact`.
+
+        Args:
+            path (str): File written by `save`.
+            compact (CompactGraph): Graph the hierarchy is expected to belong to.
+
+        Returns:
+            Optional[ContractionHierarchy]: The hierarchy, or None if missing or stale.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != compact.fingerprint():
+                    logger.info(f"Ignoring stale contraction hierarchy: {path}")
+                    return None
+                return cls(
+                    str(data["weight"]),
+                    str(data["fingerprint"]),
+                    data["rank"],
+                    tuple(data[f"fwd_{i}"] for i in range(4)),
+                    tuple(data[f"bwd_{i}"] for i in range(4)),
+                )
+        except Exception as e:
+            logger.error(f"Failed to load contraction hierarchy {path}: {e}")
+            return None
@@ -0,0 +1,186 @@
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from ..graph.compact import CompactGraph
+from ..traffic.profiles import SpeedProfiles
+from .contraction import ContractionHierarchy
+from .landmarks import LandmarkTable
+from .pathfinder import AStarPathfinder
+
+logger = logging.getLogger(__name__)
+
+# Graphs a worker process keeps open. Each holds private Python-list copies of
+# the CSR, hierarchy and landmark arrays, so this bounds worker memory.
+WORKER_MAX_GRAPHS = 8
+
+# Pathfinder methods that take the graph's speed profiles as their third argument.
+_PROFILE_METHODS = ("find_time_dependent_paths", "find_time_dependent_snapped_paths")
+
+# Pathfinders of the current worker process, most recently used last.
+_worker_pathfinders: "OrderedDict[GraphHandle, Tuple[AStarPathfinder, Optional[SpeedProfiles]]]" = OrderedDict()
+
+
+class SearchQueueFull(RuntimeError):
+    """Raised when a search is submitted while the executor's queue is full."""
+
+
+@dataclass(frozen=True)
+class GraphHandle:
+    """
+    Where a worker process finds a loaded graph and its preprocessed data.
+
+    Workers open the files written next to the graph cache instead of receiving
+    the graph, so nothing is pickled per search.
+
+    Attributes:
+        binary_dir (str): Binary cache directory of the graph (see `CompactGraph.save`).
+        fingerprint (str): Fingerprint of the graph, so a rebuilt cache is not mistaken for it.
+        hierarchy_files (Tuple[str, ...]): Saved contraction hierarchies to use.
+        landmark_file (Optional[str]): Saved landmark tables to use.
+        profiles_dir (Optional[str]): Saved speed profiles to use.
+        profiles_version (Optional[str]): Version of those profiles.
+        search_mode (str): Default search mode of the pathfinder.
+    """
+    binary_dir: str
+    fingerprint: str
+    hierarchy_files: Tuple[str, ...] = ()
+    landmark_file: Optional[str] = None
+    profiles_dir: Optional[str] = None
+    profiles_version: Optional[str] = None
+    search_mode: str = "astar"
+
+
+def call_pathfinder(pathfinder: AStarPathfinder, profiles: Optional[SpeedProfiles], method: str, args: tuple) -> Any:
+    """
+    Call a search method of `pathfinder`, passing the speed profiles to the methods that need them.
+
+    Args:
+        pathfinder (AStarPathfinder): Pathfinder to search with.
+        profiles (Optional[SpeedProfiles]): Speed profiles of its graph.
+        method (str): Name of an `AStarPathfinder.find_*` method.
+        args (tuple): Arguments of the method, without the profiles.
+
+    Returns:
+        Any: What the method returns.
+    """
+    if method in _PROFILE_METHODS:
+        args = args[:2] + (profiles,) + args[2:]
+    return getattr(pathfinder, method)(*args)
+
+
+def _open_graph(handle: GraphHandle) -> Tuple[AStarPathfinder, Optional[SpeedProfiles]]:
+    """Open (or reuse) the pathfinder of a graph in the current worker process."""
+    if handle in _worker_pathfinders:
+        _worker_pathfinders.move_to_end(handle)
+        return _worker_pathfinders[handle]
+
+    compact = CompactGraph.load(handle.binary_dir, mmap=True)
+    if compact is None or compact.fingerprint() != handle.fingerprint:
+        raise ValueError(f"Binary graph cache {handle.binary_dir} is missing or was rebuilt")
+    hierarchies = {}
+    for path in handle.hierarchy_files:
+        hierarchy = ContractionHierarchy.load(path, compact)
+        if hierarchy is not None:
+            hierarchies[hierarchy.weight] = hierarchy
+    landmarks = LandmarkTable.load(handle.landmark_file, compact) if handle.landmark_file else None
+    profiles = SpeedProfiles.load(handle.profiles_dir, compact) if handle.profiles_dir else None
+    # Only the CSR arrays are searched; the NetworkX graph is never built in workers.
+    pathfinder = AStarPathfinder(None, compact=compact, hierarchies=hierarchies, landmarks=landmarks,
+                                 search_mode=handle.search_mode)
+
+    _worker_pathfinders[handle] = (pathfinder, profiles)
+    while len(_worker_pathfinders) > WORKER_MAX_GRAPHS:
+        _worker_pathfinders.popitem(last=False)
+    return pathfinder, profiles
+
+
+def _run(handle: GraphHandle, method: str, args: tuple) -> Any:
+    """Run one search in a worker process."""
+    pathfinder, profiles = _open_graph(handle)
+    return call_pathfinder(pathfinder, profiles, method, args)
+
+
+class SearchExecutor:
+    """
+    Runs route searches in a pool of worker processes.
+
+    Searches are CPU-bound pure Python and hold the GIL, so running them on
+    request threads serializes concurrent users; worker processes let them use
+    every core. Each worker opens a graph from its binary cache the first time
+    it searches it. Only the memory-mapped graph arrays are shared through the
+    page cache: the search loops run on Python lists built from them, and the
+    hierarchies and landmark tables are loaded privately, so every worker pays
+    several times the size of the graph arrays per open graph. At most `max_pending`
+    searches are queued or running; further submissions are rejected at once
+    so callers can shed load instead of piling up behind a backlog.
+    """
+
+    def __init__(self, workers: int, max_pending: int = 64, timeout_s: float = 30.0) -> None:
+        """
+        Initialize the executor. Worker processes start with the first search.
+
+        Args:
+            workers (int): Number of worker processes.
+            max_pending (int, optional): Most searches queued or running at once. Defaults to 64.
+            timeout_s (float, optional): Seconds a caller waits for a search. Defaults to 30.0.
+        """
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked workers: forking a multithreaded server process is unsafe.
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def run(self, handle: GraphHandle, method: str, *args: Any) -> Any:
+        """
+        Run a pathfinder search in a worker process and wait for its result.
+
+        Args:
+            handle (GraphHandle): Graph to search on.
+            method (str): Name of an `AStarPathfinder.find_*` method.
+            *args: Arguments of the method; speed profiles are supplied by the worker.
+
+        Returns:
+            Any: What the method returns.
+
+        Raises:
+            SearchQueueFull: If `max_pending` searches are already queued or running.
+            TimeoutError: If the search takes longer than `timeout_s`.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise SearchQueueFull("Too many searches in progress, try again later")
+        try:
+            with self._lock:
+                pool = self._pool
+                future = pool.submit(_run, handle, method, args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the worker is done, even if the caller gave up waiting.
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeout:
+            future.cancel()
+            raise TimeoutError(f"Search did not finish within {self.timeout_s:g}s")
+        except BrokenProcessPool:
+            logger.error("A search worker process died; restarting the pool")
+            with self._lock:
+                if self._pool is pool:
+                    pool.shutdown(wait=False)
+                    self._pool = self._new_pool()
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, cancelling queued searches."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+import os
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from ..graph.compact import CompactGraph, WEIGHT_ATTRIBUTES
+from .matrix import weight_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class LandmarkTable:
+    """
+    Precomputed landmark distances for ALT (A*, Landmarks, Triangle inequality).
+
+    For a landmark L and any nodes v, t the triangle inequality gives
+    d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L). The maximum of
+    these bounds over all landmarks is an admissible and consistent heuristic for
+    the weight the distances were computed with, whatever its units.
+
+    Attributes:
+        landmarks (np.ndarray): Compact ids of the landmark nodes.
+        forward (Dict[str, np.ndarray]): Per weight, array of shape (k, n) with d(L, v).
+        backward (Dict[str, np.ndarray]): Per weight, array of shape (k, n) with d(v, L).
+        fingerprint (str): `CompactGraph.fingerprint` of the source graph.
+    """
+
+    def __init__(self, landmarks: np.ndarray, forward: Dict[str, np.ndarray], backward: Dict[str, np.ndarray], fingerprint: str) -> None:
+        self.landmarks = landmarks
+        self.forward = forward
+        self.backward = backward
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, compact: CompactGraph, num_landmarks: int = 8, weights: Sequence[str] = WEIGHT_ATTRIBUTES) -> "LandmarkTable":
+        """
+        Select landmarks and compute their distance tables.
+
+        Landmarks are chosen by farthest selection on road length: each new
+        landmark is the reachable node farthest from all landmarks chosen so far,
+        which spreads them around the edge of the network where they give the
+        tightest bounds.
+
+        Args:
+            compact (CompactGraph): Graph to preprocess.
+            num_landmarks (int, optional): Number of landmarks. Defaults to 8.
+            weights (Sequence[str], optional): Weights to build tables for. Defaults to WEIGHT_ATTRIBUTES.
+
+        Returns:
+            LandmarkTable: The landmark tables.
+        """
+        n = compact.num_nodes
+        k = min(num_landmarks, n)
+        logger.info(f"Selecting {k} landmarks on {n} nodes...")
+        # The sweeps run in compiled code; they are a handful per landmark and weight.
+        length = weight_matrix(compact, "length")
+
+        # Start from the node farthest from an arbitrary node, then keep adding
+        # the node that maximizes the distance to the closest chosen landmark.
+        seed_dist = dijkstra(length, directed=True, indices=0)
+        min_dist = np.full(n, np.inf)
+        landmarks = []
+        candidate = int(np.argmax(np.where(np.isfinite(seed_dist), seed_dist, -1.0)))
+        length_forward = []
+        for _ in range(k):
+            landmarks.append(candidate)
+            dist = dijkstra(length, directed=True, indices=candidate)
+            length_forward.append(dist)
+            min_dist = np.minimum(min_dist, dist)
+            score = np.where(np.isfinite(min_dist), min_dist, -1.0)
+            score[landmarks] = -1.0
+            candidate = int(np.argmax(score))
+
+        forward: Dict[str, np.ndarray] = {}
+        backward: Dict[str, np.ndarray] = {}
+        for weight in weights:
+            graph = weight_matrix(compact, weight)
+            if weight == "length":
+                forward[weight] = np.vstack(length_forward)
+            else:
+                forward[weight] = dijkstra(graph, directed=True, indices=landmarks)
+            # Distances towards the landmarks are distances from them on the transposed graph
+            backward[weight] = dijkstra(graph.T.tocsr(), directed=True, indices=landmarks)
+
+        logger.info(f"Landmark tables built for weights {list(weights)}")
+        return cls(np.asarray(landmarks, dtype=np.int64), forward, backward, compact.fingerprint())
+
+    def heuristic_to(self, target: int, weight: str) -> Optional[np.ndarray]:
+        """
+        Compute the ALT lower bound from every node to `target` in one vectorized pass.
+
+        Args:
+            target (int): Compact id of the target node.
+            weight (str): Weight the bound is for.
+
+        Returns:
+            Optional[np.ndarray]: Lower bound per node (inf where `target` is provably
+            unreachable), or None if there is no table for `weight`.
+        """
+        if weight not in self.forward:
+            return None
+        fwd, bwd = self.forward[weight], self.backward[weight]
+        with np.errstate(invalid="ignore"):
+            # inf - inf gives NaN (no information); fmax skips NaN.
+            ahead = fwd[:, target][:, None] - fwd
+            behind = bwd - bwd[:, target][:, None]
+            bound = np.fmax(np.fmax.reduce(ahead, axis=0), np.fmax.reduce(behind, axis=0))
+        return np.fmax(bound, 0.0)
+
+    def heuristic_from(self, source: int, weight: str) -> Optional[np.ndarray]:
+        """
+        Compute the ALT lower bound from `source` to every node, for backward searches.
+
+        Args:
+            source (int): Compact id of the source node.
+            weight (str): Weight the bound is for.
+
+        Returns:
+            Optional[np.ndarray]: Lower bound on d(source, v) per node, or None if
+            there is no table for `weight`.
+        """
+        if weight not in self.forward:
+            return None
+        fwd, bwd = self.forward[weight], self.backward[weight]
+        with np.errstate(invalid="ignore"):
+            ahead = fwd - fwd[:, source][:, None]
+            behind = bwd[:, source][:, None] - bwd
+            bound = np.fmax(np.fmax.reduce(ahead, axis=0), np.fmax.reduce(behind, axis=0))
+        return np.fmax(bound, 0.0)
+
+    def save(self, path: str) -> None:
+        """
+        Save the tables as a NumPy archive.
+
+        Args:
+            path (str): Destination file (conventionally next to the GraphML cache file).
+        """
+        np.savez(
+            path,
+            fingerprint=np.array(self.fingerprint),
+            landmarks=self.landmarks,
+            **{f"fwd_{w}": a for w, a in self.forward.items()},
+            **{f"bwd_{w}": a for w, a in self.backward.items()},
+        )
+        logger.info(f"Landmark tables saved to {path}")
+
+    @classmethod
+    def load(cls, path: str, compact: CompactGraph) -> Optional["LandmarkTable"]:
+        """
+        Load saved tables if they exist and still match `compact`.
+
+        Args:
+            path (str): File written by `save`.
+            compact (CompactGraph): Graph the tables are expected to belong to.
+
+        Returns:
+            Optional[LandmarkTable]: The tables, or None if missing or stale.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != compact.fingerprint():
+                    logger.info(f"Ignoring stale landmark tables: {path}")
+                    return None
+                forward = {name[4:]: data[name] for name in data.files if name.startswith("fwd_")}
+                backward = {name[4:]: data[name] for name in data.files if name.startswith("bwd_")}
+                return cls(data["landmarks"], forward, backward, str(data["fingerprint"]))
+        except Exception as e:
+            logger.error(f"Failed to load landmark tables {path}: {e}")
+            return None
@@ -0,0 +1,176 @@
+import os
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+
+from ..graph.compact import CompactGraph
+from .contraction import ContractionHierarchy
+
+logger = logging.getLogger(__name__)
+
+# Below this many settled node visits (sources x nodes) the matrix is computed in-process,
+# since starting worker processes would take longer than the searches.
+PARALLEL_MIN_WORK = 2_000_000
+
+# Graphs with fewer nodes use compiled Dijkstra sweeps even when a hierarchy exists:
+# below this size they beat the pure-Python bucket searches.
+HIERARCHY_MIN_NODES = 100_000
+
+# Pool shared by all matrix requests, started by the first large one; spawning
+# processes and importing NumPy/SciPy per request would dominate the searches.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# The graph last searched by the current worker process, by `_graph_token`.
+_worker_graph: Optional[Tuple[str, sp.csr_matrix]] = None
+
+
+def weight_matrix(compact: CompactGraph, weight: str) -> sp.csr_matrix:
+    """
+    Return `weight` of a graph as a sparse adjacency matrix, cached on the graph.
+
+    Parallel edges are collapsed to their cheapest one. Zero-cost edges stay
+    stored as explicit zeros, which csgraph searches as edges of cost 0.
+
+    Args:
+        compact (CompactGraph): Graph to convert.
+        weight (str): Edge weight to use.
+
+    Returns:
+        sp.csr_matrix: ``num_nodes x num_nodes`` matrix of edge costs.
+    """
+    key = f"csgraph:{weight}"
+    if key not in compact._cache:
+        tails, heads = compact.edge_sources(), np.asarray(compact.targets, dtype=np.int64)
+        costs = np.asarray(compact.weights[weight], dtype=np.float64)
+        # Sort by (tail, head, cost) and keep the first, i.e. cheapest, edge of every pair.
+        order = np.lexsort((costs, heads, tails))
+        tails, heads, costs = tails[order], heads[order], costs[order]
+        first = np.r_[True, (tails[1:] != tails[:-1]) | (heads[1:] != heads[:-1])]
+        n = compact.num_nodes
+        compact._cache[key] = sp.csr_matrix((costs[first], (tails[first], heads[first])), shape=(n, n))
+    return compact._cache[key]
+
+
+def _graph_token(compact: CompactGraph, weight: str) -> str:
+    return f"{compact.fingerprint()}:{weight}"
+
+
+def _worker_rows(token: str, csr: Tuple[np.ndarray, np.ndarray, np.ndarray, int], sources: np.ndarray,
+                 targets: np.ndarray) -> np.ndarray:
+    """Compute the matrix rows of some sources in a worker process."""
+    global _worker_graph
+    if _worker_graph is None or _worker_graph[0] != token:
+        data, indices, indptr, n = csr
+        _worker_graph = (token, sp.csr_matrix((data, indices, indptr), shape=(n, n)))
+    return dijkstra(_worker_graph[1], directed=True, indices=sources)[:, targets]
+
+
+def _matrix_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared worker pool, (re)starting it with at least `workers` processes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned rather than forked workers: forking a multithreaded server process is unsafe.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next large matrix starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            pool.shutdown(wait=False)
+            _pool = None
+
+
+def one_to_many(
+    compact: CompactGraph, weight: str, sources: Sequence[int], targets: Sequence[int], workers: int = 1
+) -> np.ndarray:
+    """
+    Compute the cost between every source and every target with one Dijkstra sweep per source.
+
+    The sweeps run in compiled code (`scipy.sparse.csgraph`). With several
+    workers and enough work, the sources are split over a long-lived pool of
+    processes; each chunk carries the graph, which a worker keeps until it is
+    sent a different one.
+
+    Args:
+        compact (CompactGraph): Graph to search on.
+        weight (str): Edge weight to minimize.
+        sources (Sequence[int]): Compact ids of the start nodes.
+        targets (Sequence[int]): Compact ids of the end nodes.
+        workers (int, optional): Maximum number of processes. Defaults to 1.
+
+    Returns:
+        np.ndarray: Cost matrix of shape ``(len(sources), len(targets))``; inf where unreachable.
+    """
+    graph = weight_matrix(compact, weight)
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    pool_size, workers = workers, min(workers, len(sources))
+    if workers <= 1 or len(sources) * compact.num_nodes < PARALLEL_MIN_WORK:
+        return dijkstra(graph, directed=True, indices=sources)[:, targets].reshape(len(sources), len(targets))
+
+    chunks = np.array_split(sources, workers)
+    logger.info(f"Computing {len(sources)} one-to-many searches on {workers} processes")
+    pool = _matrix_pool(pool_size)
+    token = _graph_token(compact, weight)
+    csr = (graph.data, graph.indices, graph.indptr, compact.num_nodes)
+    try:
+        rows = list(pool.map(_worker_rows, [token] * len(chunks), [csr] * len(chunks), chunks,
+                             [targets] * len(chunks)))
+    except BrokenProcessPool:
+        logger.error("A matrix worker process died; restarting the pool")
+        _discard_pool(pool)
+        raise
+    return np.vstack(rows)
+
+
+def many_to_many(
+    compact: CompactGraph,
+    weight: str,
+    sources: Sequence[int],
+    targets: Sequence[int],
+    hierarchy: Optional[ContractionHierarchy] = None,
+    workers: Optional[int] = None,
+) -> Tuple[np.ndarray, str]:
+    """
+    Compute a cost matrix, choosing the fastest available method.
+
+    Duplicate nodes are searched once. On large graphs a contraction hierarchy
+    for `weight` is used for bucket-based many-to-many search; otherwise one
+    Dijkstra sweep per distinct source runs, spread over processes.
+
+    Args:
+        compact (CompactGraph): Graph to search on.
+        weight (str): Edge weight to minimize.
+        sources (Sequence[int]): Compact ids of the start nodes.
+        targets (Sequence[int]): Compact ids of the end nodes.
+        hierarchy (Optional[ContractionHierarchy], optional): Hierarchy built for `weight`.
+        workers (Optional[int], optional): Maximum number of processes. Defaults to the CPU count.
+
+    Returns:
+        Tuple[np.ndarray, str]: Cost matrix of shape ``(len(sources), len(targets))``
+        (inf where unreachable) and the method used ("ch" or "dijkstra").
+    """
+    unique_sources, source_pos = np.unique(np.asarray(sources, dtype=np.int64), return_inverse=True)
+    unique_targets, target_pos = np.unique(np.asarray(targets, dtype=np.int64), return_inverse=True)
+    if hierarchy is not None and hierarchy.weight == weight and compact.num_nodes >= HIERARCHY_MIN_NODES:
+        costs, method = hierarchy.many_to_many(unique_sources.tolist(), unique_targets.tolist()), "ch"
+    else:
+        costs = one_to_many(compact, weight, unique_sources, unique_targets, workers or os.cpu_count() or 1)
+        method = "dijkstra"
+    return costs[np.ix_(source_pos.ravel(), target_pos.ravel())], method
@@ -1,11 +1,28 @@
 from dataclasses import dataclass
-from heapq import heappush, heappop
-from typing import Any, List, Tuple, Dict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import logging
 
+import numpy as np
 import networkx as nx
 from tqdm import tqdm
-from ..utils.helpers import get_node_coords, haversine_distance_m
+from ..graph.compact import CompactGraph
+from ..graph.spatial import EdgeSnap
+from ..utils.helpers import haversine_distance_m, haversine_distance_m_array
+from .search import CompactSearchEngine, SearchResult
+from .contraction import ContractionHierarchy
+from .landmarks import LandmarkTable
+from ..traffic.profiles import SpeedProfiles
+
+SEARCH_MODES = ("astar", "bidirectional")
+
+# Edge weight minimized by each route type.
+ROUTE_TYPE_WEIGHTS = {
+    "shortest": "length",
+    "cost": "cost",
+    "fuel": "fuel",
+    "green": "emissions",
+    "traffic_free": "traffic",
+}
 
 
 @dataclass(frozen=True)
@@ -16,29 +33,59 @@ class RouteResult:
     Attributes:
         path (List[Any]): Ordered list of nodes from start to end.
         distance_m (float): Total distance of the path in meters.
+        nodes_settled (int): Number of nodes settled by the search that found the path.
+        travel_time_min (Optional[float]): Travel time in minutes, for time-dependent searches.
     """
     path: List[Any]
     distance_m: float
+    nodes_settled: int = 0
+    travel_time_min: Optional[float] = None
 
 
 class AStarPathfinder:
     """
     Implements the A* pathfinding algorithm on a NetworkX graph with:
-    - Optimization to avoid duplicate nodes in the open set
+    - Array-backed (CSR) search on a CompactGraph built once per graph
+    - Unidirectional or bidirectional search
     - logging
     - Progress bar for large graphs
     """
 
-    def __init__(self, graph: nx.MultiDiGraph, enable_logging: bool = False, show_progress: bool = False) -> None:
+    def __init__(
+        self,
+        graph: Optional[nx.MultiDiGraph],
+        enable_logging: bool = False,
+        show_progress: bool = False,
+        compact: Optional[CompactGraph] = None,
+        hierarchies: Optional[Dict[str, ContractionHierarchy]] = None,
+        landmarks: Optional[LandmarkTable] = None,
+        search_mode: str = "astar",
+    ) -> None:
         """
         Initialize the pathfinder with a graph.
 
         Args:
-            graph (nx.MultiDiGraph): Graph on which to perform pathfinding.
+            graph (Optional[nx.MultiDiGraph]): Graph on which to perform pathfinding. May be None
+                                               when `compact` is given.
             enable_logging (bool, optional): Enable debug logging. Defaults to False.
             show_progress (bool, optional): Show a progress bar during search. Defaults to False.
+            compact (Optional[CompactGraph], optional): Prebuilt compact form of `graph`.
+                                                        Built on the fly when omitted.
+            hierarchies (Optional[Dict[str, ContractionHierarchy]], optional): Contraction
+                hierarchies keyed by weight. Searches on these weights use the hierarchy.
+            landmarks (Optional[LandmarkTable], optional): ALT landmark tables. When given,
+                every weight gets an admissible landmark heuristic.
+            search_mode (str, optional): Default search mode, one of SEARCH_MODES.
+                                         Defaults to "astar".
         """
         self.graph = graph
+        self.compact = compact if compact is not None else CompactGraph.from_networkx(graph)
+        self.engine = CompactSearchEngine(self.compact)
+        self.hierarchies = hierarchies or {}
+        self.landmarks = landmarks
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search_mode: {search_mode}")
+        self.search_mode = search_mode
         self.show_progress = show_progress
         self.logger = logging.getLogger(self.__class__.__name__)
         if enable_logging:
@@ -57,103 +104,340 @@ class AStarPathfinder:
         Returns:
             float: Estimated distance in meters.
         """
-        lat_a, lon_a = get_node_coords(self.graph, node_a)
-        lat_b, lon_b = get_node_coords(self.graph, node_b)
+        (lat_a, lat_b), (lon_a, lon_b) = self.compact.path_coords([node_a, node_b])
         return haversine_distance_m(lat_a, lon_a, lat_b, lon_b)
 
-    def find_shortest_path(self, start_node: Any, end_node: Any) -> RouteResult:
-        # ...existing code...
+    def _heuristic_to(self, target: int, weight: str = "length") -> Optional[np.ndarray]:
+        """
+        Compute the heuristic for every node towards a target in one vectorized pass.
+
+        Straight-line meters are only a valid bound for 'length'. Other weights use
+        the ALT landmark bound when landmark tables are available, and no heuristic
+        (plain Dijkstra) otherwise, so routes stay optimal for every weight.
+
+        Args:
+            target (int): Compact id of the target node.
+            weight (str, optional): Edge weight being minimized. Defaults to "length".
+
+        Returns:
+            Optional[np.ndarray]: Lower bound on the remaining cost from each node, or None.
+        """
+        c = self.compact
+        alt = self.landmarks.heuristic_to(target, weight) if self.landmarks is not None else None
+        if weight != "length":
+            return alt
+        straight = haversine_distance_m_array(c.lat, c.lon, c.lat[target], c.lon[target])
+        return straight if alt is None else np.fmax(straight, alt)
+
+    def _heuristic_from(self, source: int, weight: str = "length") -> Optional[np.ndarray]:
+        """
+        Compute a lower bound on the cost from `source` to every node, for backward searches.
+
+        Args:
+            source (int): Compact id of the source node.
+            weight (str, optional): Edge weight being minimized. Defaults to "length".
+
+        Returns:
+            Optional[np.ndarray]: Lower bound on the cost from `source` to each node, or None.
+        """
+        c = self.compact
+        alt = self.landmarks.heuristic_from(source, weight) if self.landmarks is not None else None
+        if weight != "length":
+            return alt
+        straight = haversine_distance_m_array(c.lat, c.lon, c.lat[source], c.lon[source])
+        return straight if alt is None else np.fmax(straight, alt)
+
+    def find_shortest_path(self, start_node: Any, end_node: Any, search_mode: Optional[str] = None) -> RouteResult:
         # Standard A* using distance
-        return self._astar(start_node, end_node, weight="length")
+        return self._search(start_node, end_node, "length", search_mode)
 
-    def find_cost_efficient_path(self, start_node: Any, end_node: Any) -> RouteResult:
+    def find_cost_efficient_path(self, start_node: Any, end_node: Any, search_mode: Optional[str] = None) -> RouteResult:
         # Minimize toll cost (stub: use 'cost' edge attribute if present)
-        return self._astar(start_node, end_node, weight="cost")
+        return self._search(start_node, end_node, "cost", search_mode)
 
-    def find_fuel_efficient_path(self, start_node: Any, end_node: Any) -> RouteResult:
+    def find_fuel_efficient_path(self, start_node: Any, end_node: Any, search_mode: Optional[str] = None) -> RouteResult:
         # Minimize fuel usage (stub: use 'fuel' edge attribute if present)
-        return self._astar(start_node, end_node, weight="fuel")
+        return self._search(start_node, end_node, "fuel", search_mode)
 
-    def find_green_path(self, start_node: Any, end_node: Any) -> RouteResult:
+    def find_green_path(self, start_node: Any, end_node: Any, search_mode: Optional[str] = None) -> RouteResult:
         # Minimize emissions (stub: use 'emissions' edge attribute if present)
-        return self._astar(start_node, end_node, weight="emissions")
+        return self._search(start_node, end_node, "emissions", search_mode)
 
-    def find_traffic_free_path(self, start_node: Any, end_node: Any) -> RouteResult:
+    def find_traffic_free_path(self, start_node: Any, end_node: Any, search_mode: Optional[str] = None) -> RouteResult:
         # Avoid congested roads (stub: use 'traffic' edge attribute if present)
-        return self._astar(start_node, end_node, weight="traffic")
+        return self._search(start_node, end_node, "traffic", search_mode)
 
-    def _astar(self, start_node: Any, end_node: Any, weight: str = "length") -> RouteResult:
-        # Use NetworkX astar_path with custom weight
-        try:
-            path = nx.astar_path(self.graph, start_node, end_node, heuristic=lambda a, b: self._heuristic(a, b), weight=weight)
-            total_distance = sum(self.graph.edges[path[i], path[i+1], 0].get(weight, 1.0) for i in range(len(path)-1))
-            return RouteResult(path, total_distance)
-        except Exception as e:
-            self.logger.error(f"A* failed: {e}")
-            raise
+    def find_snapped_path(
+        self, origin: EdgeSnap, dest: EdgeSnap, weight: str = "length", search_mode: Optional[str] = None
+    ) -> RouteResult:
+        """
+        Find the lowest-`weight` path between two points projected onto edges.
+
+        Each snapped edge is split at the projected point: the route may leave the
+        origin towards the edge's head (or towards its tail over the opposite
+        carriageway of a two-way road) and pays only the part of the edge it
+        actually drives. The returned path lists the graph nodes in between and
+        its weight includes both partial edges. The search is dispatched like
+        `_search`, starting and ending at the split points.
+
+        Args:
+            origin (EdgeSnap): Start point on its edge.
+            dest (EdgeSnap): End point on its edge.
+            weight (str, optional): Edge attribute to minimize. Defaults to "length".
+            search_mode (Optional[str], optional): "astar" or "bidirectional".
+                                                   Defaults to the pathfinder's mode.
+
+        Returns:
+            RouteResult: Contains the path (OSM node ids), its total weight and settled node count.
+
+        Raises:
+            nx.NetworkXNoPath: If no path exists between the points.
         """
-        Find the shortest path from start_node to end_node using A*.
+        mode = search_mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search_mode: {mode}")
+        costs = self.compact.weights[weight]
+        sources = {origin.head: (1.0 - origin.fraction) * costs[origin.edge]}
+        targets = {dest.tail: dest.fraction * costs[dest.edge]}
+        twin = self._twin_edge(origin.edge, weight)
+        if twin >= 0:
+            sources[origin.tail] = min(sources.get(origin.tail, float("inf")), origin.fraction * costs[twin])
+        twin = self._twin_edge(dest.edge, weight)
+        if twin >= 0:
+            targets[dest.head] = min(targets.get(dest.head, float("inf")), (1.0 - dest.fraction) * costs[twin])
+
+        edges = f"edges {origin.edge} and {dest.edge} (weight={weight})"
+        if weight in self.hierarchies:
+            self.logger.info(f"Querying contraction hierarchy between snapped points on {edges}")
+            return self._to_route_result(self.hierarchies[weight].query_between(sources, targets), weight)
+
+        # Lower bounds on the cost to the best target and from the best source, partial edges included
+        to_target = self._nearest_bound([(self._heuristic_to(t, weight), d) for t, d in targets.items()])
+        if mode == "bidirectional":
+            from_source = self._nearest_bound([(self._heuristic_from(s, weight), d) for s, d in sources.items()])
+            potentials = (to_target, from_source) if to_target is not None and from_source is not None else None
+            self.logger.info(f"Starting bidirectional search between snapped points on {edges}")
+            result = self.engine.bidirectional_between(sources, targets, weight=weight, potentials=potentials)
+        else:
+            self.logger.info(f"Starting A* between snapped points on {edges}")
+            result = self.engine.astar_between(sources, targets, weight=weight, heuristic=to_target)
+        return self._to_route_result(result, weight)
+
+    @staticmethod
+    def _nearest_bound(bounds: List[Tuple[Optional[np.ndarray], float]]) -> Optional[np.ndarray]:
+        """Combine per-endpoint lower bounds and initial costs into one bound on the best endpoint, or None."""
+        if any(bound is None for bound, _ in bounds):
+            return None
+        return np.minimum.reduce([bound + cost for bound, cost in bounds])
+
+    def find_time_dependent_paths(
+        self, start_node: Any, end_node: Any, profiles: SpeedProfiles, departures: Sequence[float], fallback_kph: float
+    ) -> List[RouteResult]:
+        """
+        Find the fastest path for each departure time with historical speed profiles.
+
+        Edge travel times depend on when the route reaches each edge, so a
+        departure at 8:00 may take a different path than one at 11:00. All
+        departures are answered by a single search.
 
         Args:
             start_node: Node to start from.
             end_node: Target node.
+            profiles (SpeedProfiles): Speed profiles of the graph.
+            departures (Sequence[float]): Departure times in minutes since Monday 00:00.
+            fallback_kph (float): Speed used for edges without data.
 
         Returns:
-            RouteResult: Contains the path and total distance.
+            List[RouteResult]: Per departure, the path (OSM node ids), its length and travel time.
 
         Raises:
             nx.NetworkXNoPath: If no path exists between start_node and end_node.
         """
-        open_set: List[Tuple[float, Any]] = []
-        heappush(open_set, (0.0, start_node))
+        source = self.compact.node_index(start_node)
+        target = self.compact.node_index(end_node)
+        lengths = self.compact.weights["length"]
+        lengths_list = lengths.tolist()
+
+        def travel_time(edge: int, minutes: np.ndarray) -> np.ndarray:
+            return profiles.edge_travel_time(edge, lengths_list[edge], minutes, fallback_kph)
+
+        # Straight-line meters at the fastest speed anywhere bound the remaining minutes.
+        heuristic = self._heuristic_to(target, "length") * 0.06 / max(profiles.max_speed, fallback_kph)
+        self.logger.info(f"Starting time-dependent search from {start_node} to {end_node} for {len(departures)} departures")
+        results = self.engine.time_dependent(source, target, np.asarray(departures, dtype=np.float64), travel_time, heuristic)
+        routes = []
+        for result in results:
+            distance = float(lengths[result.edges].sum())
+            routes.append(RouteResult(self.compact.to_node_ids(result.path), distance, result.settled, result.cost))
+        self.logger.info(f"Time-dependent search settled {results[0].settled} nodes")
+        return routes
+
+    def find_time_dependent_snapped_paths(
+        self, origin: EdgeSnap, dest: EdgeSnap, profiles: SpeedProfiles, departures: Sequence[float], fallback_kph: float
+    ) -> List[RouteResult]:
+        """
+        Find the fastest path between two points projected onto edges for each departure time.
 
-        came_from: Dict[Any, Any] = {}
-        g_score: Dict[Any, float] = {node: float('inf') for node in self.graph.nodes()}
-        g_score[start_node] = 0.0
+        Combines `find_snapped_path` and `find_time_dependent_paths`: the partial
+        edges at both ends are timed with the speed profiles like any other edge,
+        the one at the end when the trip arrives there.
 
-        open_set_f_score: Dict[Any, float] = {start_node: 0.0}
+        Args:
+            origin (EdgeSnap): Start point on its edge.
+            dest (EdgeSnap): End point on its edge.
+            profiles (SpeedProfiles): Speed profiles of the graph.
+            departures (Sequence[float]): Departure times in minutes since Monday 00:00.
+            fallback_kph (float): Speed used for edges without data.
 
-        self.logger.info(f"Starting A* from {start_node} to {end_node}")
+        Returns:
+            List[RouteResult]: Per departure, the path (OSM node ids), its length and
+            travel time, both partial edges included.
 
-        total_nodes = self.graph.number_of_nodes()
-        pbar = tqdm(total=total_nodes, desc="Nodes expanded") if self.show_progress else None
+        Raises:
+            nx.NetworkXNoPath: If no path exists between the points.
+        """
+        lengths = self.compact.weights["length"]
+        lengths_list = lengths.tolist()
+        departures = np.asarray(departures, dtype=np.float64)
+
+        def travel_time(edge: int, minutes: np.ndarray) -> np.ndarray:
+            return profiles.edge_travel_time(edge, lengths_list[edge], minutes, fallback_kph)
+
+        def partial(edge: int, length_m: float) -> Callable[[np.ndarray], np.ndarray]:
+            return lambda minutes: profiles.edge_travel_time(edge, length_m, minutes, fallback_kph)
+
+        # Per start node its partial edge and length, per end node the same
+        starts = {origin.head: (origin.edge, (1.0 - origin.fraction) * lengths_list[origin.edge])}
+        ends = {dest.tail: (dest.edge, dest.fraction * lengths_list[dest.edge])}
+        twin = self._twin_edge(origin.edge, "length")
+        if twin >= 0:
+            starts[origin.tail] = (twin, origin.fraction * lengths_list[twin])
+        twin = self._twin_edge(dest.edge, "length")
+        if twin >= 0:
+            ends[dest.head] = (twin, (1.0 - dest.fraction) * lengths_list[twin])
+
+        sources = {node: partial(edge, length_m)(departures) for node, (edge, length_m) in starts.items()}
+        targets = {node: partial(edge, length_m) for node, (edge, length_m) in ends.items()}
+        # Straight-line meters at the fastest speed anywhere bound the remaining minutes.
+        bound = self._nearest_bound([(self._heuristic_to(t, "length"), length_m) for t, (_, length_m) in ends.items()])
+        heuristic = bound * 0.06 / max(profiles.max_speed, fallback_kph)
+        self.logger.info(f"Starting time-dependent search between snapped points on edges {origin.edge} and "
+                         f"{dest.edge} for {len(departures)} departures")
+        results = self.engine.time_dependent_between(sources, targets, departures, travel_time, heuristic)
+        routes = []
+        for result in results:
+            distance = starts[result.path[0]][1] + float(lengths[result.edges].sum()) + ends[result.path[-1]][1]
+            routes.append(RouteResult(self.compact.to_node_ids(result.path), distance, result.settled, result.cost))
+        self.logger.info(f"Time-dependent search settled {results[0].settled} nodes")
+        return routes
+
+    def _twin_edge(self, edge: int, weight: str) -> int:
+        """Return the cheapest edge running opposite to `edge` (same road, other direction), or -1."""
+        c = self.compact
+        tail = int(np.searchsorted(c.offsets, edge, side="right")) - 1
+        head = int(c.targets[edge])
+        start, end = c.offsets[head], c.offsets[head + 1]
+        candidates = np.nonzero(c.targets[start:end] == tail)[0]
+        if len(candidates) == 0:
+            return -1
+        return int(start + candidates[np.argmin(c.weights[weight][start + candidates])])
+
+    def _search(self, start_node: Any, end_node: Any, weight: str, search_mode: Optional[str] = None) -> RouteResult:
+        """
+        Dispatch a search to the contraction hierarchy for `weight` if one exists,
+        otherwise to the requested search mode.
 
-        while open_set:
-            current_f_score, current_node = heappop(open_set)
-            open_set_f_score.pop(current_node, None)
+        Args:
+            start_node: Node to start from.
+            end_node: Target node.
+            weight (str): Edge attribute to minimize.
+            search_mode (Optional[str], optional): "astar" or "bidirectional".
+                                                   Defaults to the pathfinder's mode.
 
-            self.logger.info(f"Expanding node {current_node} with f_score {current_f_score:.2f}")
+        Returns:
+            RouteResult: Contains the path (OSM node ids), its total weight and settled node count.
+        """
+        mode = search_mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search_mode: {mode}")
+        if weight in self.hierarchies:
+            return self._contraction(start_node, end_node, weight)
+        if mode == "bidirectional":
+            return self._bidirectional(start_node, end_node, weight)
+        return self._astar(start_node, end_node, weight)
+
+    def _contraction(self, start_node: Any, end_node: Any, weight: str) -> RouteResult:
+        """
+        Answer a query from the contraction hierarchy for `weight`.
+        """
+        source = self.compact.node_index(start_node)
+        target = self.compact.node_index(end_node)
+        self.logger.info(f"Querying contraction hierarchy from {start_node} to {end_node} (weight={weight})")
+        return self._to_route_result(self.hierarchies[weight].query(source, target), weight)
+
+    def _bidirectional(self, start_node: Any, end_node: Any, weight: str = "length") -> RouteResult:
+        """
+        Find the lowest-`weight` path with a bidirectional search that meets in the middle.
+
+        Uses the same lower bounds as `_astar` as average potentials, so it is
+        bidirectional A* when a heuristic exists for `weight` and bidirectional
+        Dijkstra otherwise.
+
+        Args:
+            start_node: Node to start from.
+            end_node: Target node.
+            weight (str, optional): Edge attribute to minimize. Defaults to "length".
+
+        Returns:
+            RouteResult: Contains the path (OSM node ids), its total weight and settled node count.
+
+        Raises:
+            nx.NetworkXNoPath: If no path exists between start_node and end_node.
+        """
+        source = self.compact.node_index(start_node)
+        target = self.compact.node_index(end_node)
+        self.logger.info(f"Starting bidirectional search from {start_node} to {end_node} (weight={weight})")
+        to_target = self._heuristic_to(target, weight)
+        from_source = self._heuristic_from(source, weight)
+        potentials = (to_target, from_source) if to_target is not None and from_source is not None else None
+        try:
+            result = self.engine.bidirectional(source, target, weight=weight, potentials=potentials)
+        except Exception as e:
+            self.logger.error(f"Bidirectional search failed: {e}")
+            raise
+        return self._to_route_result(result, weight)
+
+    def _astar(self, start_node: Any, end_node: Any, weight: str = "length") -> RouteResult:
+        """
+        Find the lowest-`weight` path from start_node to end_node using A* on the compact graph.
+
+        Args:
+            start_node: Node to start from.
+            end_node: Target node.
+            weight (str, optional): Edge attribute to minimize. Defaults to "length".
+
+        Returns:
+            RouteResult: Contains the path (OSM node ids), its total weight and settled node count.
+
+        Raises:
+            nx.NetworkXNoPath: If no path exists between start_node and end_node.
+        """
+        source = self.compact.node_index(start_node)
+        target = self.compact.node_index(end_node)
+        self.logger.info(f"Starting A* from {start_node} to {end_node} (weight={weight})")
+        pbar = tqdm(total=self.compact.num_nodes, desc="Nodes expanded") if self.show_progress else None
+        try:
+            result = self.engine.astar(source, target, weight=weight, heuristic=self._heuristic_to(target, weight), progress=pbar)
+        except Exception as e:
+            self.logger.error(f"A* failed: {e}")
+            raise
+        finally:
             if pbar:
-                pbar.update(1)
-
-            if current_node == end_node:
-                path = []
-                total_distance = g_score[end_node]
-                while current_node in came_from:
-                    path.append(current_node)
-                    current_node = came_from[current_node]
-                path.append(start_node)
-                path.reverse()
-
-                self.logger.info(f"Path found: {path} with distance {total_distance:.2f} meters")
-                if pbar:
-                    pbar.close()
-                return RouteResult(path, total_distance)
-
-            for _, neighbor, edge_data in self.graph.out_edges(current_node, data=True):
-                edge_length = edge_data.get('length', 0.0)
-                tentative_g_score = g_score[current_node] + edge_length
-
-                if tentative_g_score < g_score.get(neighbor, float('inf')):
-                    came_from[neighbor] = current_node
-                    g_score[neighbor] = tentative_g_score
-                    f_score = tentative_g_score + self._heuristic(neighbor, end_node)
-
-                    if f_score < open_set_f_score.get(neighbor, float('inf')):
-                        heappush(open_set, (f_score, neighbor))
-                        open_set_f_score[neighbor] = f_score
-                        self.logger.info(f"Pushing neighbor {neighbor} with f_score {f_score:.2f}")
-
-        if pbar:
-            pbar.close()
-        raise nx.NetworkXNoPath(f"No path found between {start_node} and {end_node}")
+                pbar.close()
+        return self._to_route_result(result, weight)
+
+    def _to_route_result(self, result: SearchResult, weight: str) -> RouteResult:
+        """Map a compact SearchResult back to OSM node ids."""
+        path = self.compact.to_node_ids(result.path)
+        self.logger.info(f"Path found with {len(path)} nodes and {weight} {result.cost:.2f} ({result.settled} nodes settled)")
+        return RouteResult(path, result.cost, result.settled)
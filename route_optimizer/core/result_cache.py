@@ -0,0 +1,120 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough memory cost of a cached route: fixed overhead plus per path node
+# (node id, traffic value and list slots).
+_ENTRY_OVERHEAD_BYTES = 1024
+_BYTES_PER_PATH_NODE = 80
+
+
+def _copy(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a result together with its lists (path, traffic), so callers cannot change the cached one."""
+    return {name: list(value) if isinstance(value, list) else value for name, value in result.items()}
+
+
+class RouteResultCache:
+    """
+    LRU cache of `RouteOptimizer.find_route` results with a TTL and a memory budget.
+
+    Keys must identify everything the result depends on: the graph version
+    (`CompactGraph.fingerprint`), the snapped endpoints, the route profile and
+    the traffic data version. A changed graph or traffic model therefore never
+    returns stale results; `clear` drops everything eagerly.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Memory budget; least recently used results are evicted beyond it.
+            ttl_s (float): Seconds a result stays valid.
+        """
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        # key -> (result, expiry time, compute time in seconds, size in bytes)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_s = 0.0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached result and mark it as recently used.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the result, or None on a miss or after expiry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_s += entry[2]
+            return _copy(entry[0])
+
+    def put(self, key: Hashable, result: Dict[str, Any], compute_s: float) -> None:
+        """
+        Store a result, evicting expired and then least recently used entries over the budget.
+
+        Args:
+            key (Hashable): Cache key.
+            result (Dict[str, Any]): Result of `find_route`.
+            compute_s (float): Time it took to compute, credited on every hit.
+        """
+        size = _ENTRY_OVERHEAD_BYTES + _BYTES_PER_PATH_NODE * len(result.get("path", ()))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (_copy(result), time.monotonic() + self.ttl_s, compute_s, size)
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                now = time.monotonic()
+                for stale in [k for k, e in self._entries.items() if e[1] < now]:
+                    self._remove(stale)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Drop every cached result, e.g. after graph or traffic data was updated in place."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key)[3]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit ratio, saved compute time and memory usage.
+
+        Returns:
+            Dict[str, Any]: Cache statistics.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_kb": round(self._bytes / 1024, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_compute_s": round(self.saved_s, 3),
+            }
@@ -0,0 +1,564 @@
+from dataclasses import dataclass
+from heapq import heappush, heappop
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import networkx as nx
+
+from ..graph.compact import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """
+    Result of a search on a CompactGraph.
+
+    Attributes:
+        path (List[int]): Compact node ids from source to target.
+        cost (float): Total weight of the path.
+        settled (int): Number of nodes settled by the search.
+        edges (Optional[List[int]]): Compact edge ids driven along the path, for
+            searches that tell parallel edges apart by more than one weight.
+    """
+    path: List[int]
+    cost: float
+    settled: int
+    edges: Optional[List[int]] = None
+
+
+class CompactSearchEngine:
+    """
+    Shortest path searches over the CSR arrays of a CompactGraph.
+
+    All node arguments and results use compact ids; use
+    `CompactGraph.node_index` and `CompactGraph.to_node_ids` to convert.
+    """
+
+    def __init__(self, compact: CompactGraph) -> None:
+        """
+        Initialize the engine.
+
+        Args:
+            compact (CompactGraph): Graph to search on.
+        """
+        self.compact = compact
+
+    def astar(
+        self,
+        source: int,
+        target: int,
+        weight: str = "length",
+        heuristic: Optional[np.ndarray] = None,
+        progress: Optional[Any] = None,
+    ) -> SearchResult:
+        """
+        Run A* from `source` to `target`.
+
+        Args:
+            source (int): Compact id of the start node.
+            target (int): Compact id of the end node.
+            weight (str, optional): Edge weight to minimize. Defaults to "length".
+            heuristic (Optional[np.ndarray], optional): Estimated remaining cost to `target`
+                for every node. Dijkstra is used when omitted.
+            progress (Optional[Any], optional): tqdm-like object updated as nodes are settled.
+
+        Returns:
+            SearchResult: Path, cost and number of settled nodes.
+
+        Raises:
+            nx.NetworkXNoPath: If `target` is unreachable from `source`.
+        """
+        offsets, heads, costs = self.compact.adjacency(weight)
+        h = heuristic.tolist() if heuristic is not None else None
+
+        dist = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        open_set = [((h[source] if h else 0.0), source)]
+        settled = 0
+
+        while open_set:
+            _, u = heappop(open_set)
+            if u in closed:
+                continue
+            closed.add(u)
+            settled += 1
+            if progress is not None and settled % 1024 == 0:
+                progress.update(1024)
+            if u == target:
+                break
+            du = dist[u]
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                if v in closed:
+                    continue
+                dv = du + costs[e]
+                if dv < dist.get(v, float("inf")):
+                    dist[v] = dv
+                    parent[v] = u
+                    heappush(open_set, (dv + h[v] if h else dv, v))
+        else:
+            raise nx.NetworkXNoPath(
+                f"No path found between {self.compact.node_ids[source]} and {self.compact.node_ids[target]}"
+            )
+
+        if progress is not None:
+            progress.update(settled % 1024)
+        logger.debug(f"A* settled {settled} nodes")
+        return SearchResult(self._unwind(parent, target), dist[target], settled)
+
+    def astar_between(
+        self,
+        sources: Dict[int, float],
+        targets: Dict[int, float],
+        weight: str = "length",
+        heuristic: Optional[np.ndarray] = None,
+    ) -> SearchResult:
+        """
+        Run A* from several weighted start nodes to several weighted end nodes.
+
+        Used for points in the middle of an edge: the sources are the nodes the
+        start point can drive to, with the partial edge cost as initial distance,
+        and the targets are the nodes the end point can be reached from, with the
+        remaining partial cost added on arrival.
+
+        Args:
+            sources (Dict[int, float]): Compact id to initial cost.
+            targets (Dict[int, float]): Compact id to cost added when finishing there.
+            weight (str, optional): Edge weight to minimize. Defaults to "length".
+            heuristic (Optional[np.ndarray], optional): Lower bound on the cost to the
+                nearest target for every node. Dijkstra is used when omitted.
+
+        Returns:
+            SearchResult: Path between the best source/target pair and its total cost
+            including both partial costs.
+
+        Raises:
+            nx.NetworkXNoPath: If no target is reachable.
+        """
+        offsets, heads, costs = self.compact.adjacency(weight)
+        h = heuristic.tolist() if heuristic is not None else None
+
+        dist = dict(sources)
+        parent = {s: -1 for s in sources}
+        closed = set()
+        open_set = [((d + h[s] if h else d), s) for s, d in sources.items()]
+        open_set.sort()
+        best, best_node = float("inf"), -1
+        settled = 0
+
+        while open_set:
+            key, u = heappop(open_set)
+            if key >= best:
+                break
+            if u in closed:
+                continue
+            closed.add(u)
+            settled += 1
+            du = dist[u]
+            if u in targets and du + targets[u] < best:
+                best, best_node = du + targets[u], u
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                if v in closed:
+                    continue
+                dv = du + costs[e]
+                if dv < dist.get(v, float("inf")):
+                    dist[v] = dv
+                    parent[v] = u
+                    heappush(open_set, (dv + h[v] if h else dv, v))
+
+        if best_node < 0:
+            raise nx.NetworkXNoPath("No path found between the snapped points")
+        return SearchResult(self._unwind(parent, best_node), best, settled)
+
+    def bidirectional(
+        self,
+        source: int,
+        target: int,
+        weight: str = "length",
+        potentials: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> SearchResult:
+        """
+        Run a bidirectional search that meets in the middle.
+
+        Without potentials this is bidirectional Dijkstra. With lower bounds
+        ``to_target`` (on d(v, target)) and ``from_source`` (on d(source, v)) it is
+        bidirectional A* using the average potential
+        ``p(v) = (to_target(v) - from_source(v)) / 2`` for the forward search and
+        ``-p(v)`` for the backward one. Both reduced graphs are then non-negative
+        and the search can stop as soon as the two queue minima add up to the best
+        connecting path found so far.
+
+        Args:
+            source (int): Compact id of the start node.
+            target (int): Compact id of the end node.
+            weight (str, optional): Edge weight to minimize. Defaults to "length".
+            potentials (Optional[Tuple[np.ndarray, np.ndarray]], optional): Consistent lower
+                bounds ``(to_target, from_source)`` for every node.
+
+        Returns:
+            SearchResult: Path, cost and number of nodes settled by both searches.
+
+        Raises:
+            nx.NetworkXNoPath: If `target` is unreachable from `source`.
+        """
+        return self.bidirectional_between({source: 0.0}, {target: 0.0}, weight=weight, potentials=potentials)
+
+    def bidirectional_between(
+        self,
+        sources: Dict[int, float],
+        targets: Dict[int, float],
+        weight: str = "length",
+        potentials: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> SearchResult:
+        """
+        Run a bidirectional search from several weighted start nodes to several weighted end nodes.
+
+        Used for points in the middle of an edge, like `astar_between`: each side
+        starts from all of its nodes at their initial cost.
+
+        Args:
+            sources (Dict[int, float]): Compact id to initial cost.
+            targets (Dict[int, float]): Compact id to cost added when finishing there.
+            weight (str, optional): Edge weight to minimize. Defaults to "length".
+            potentials (Optional[Tuple[np.ndarray, np.ndarray]], optional): Consistent lower
+                bounds ``(to_target, from_source)`` for every node, on the cost to the
+                best target including its cost and from the best source including its.
+
+        Returns:
+            SearchResult: Path between the best source/target pair, its total cost
+            including both initial costs and the number of nodes settled by both searches.
+
+        Raises:
+            nx.NetworkXNoPath: If no target is reachable.
+        """
+        graphs = (self.compact.adjacency(weight), self.compact.adjacency(weight, reverse=True))
+        if potentials is None:
+            p = None
+        else:
+            to_target, from_source = potentials
+            # Infinite bounds (provably unreachable nodes) are clamped to a common
+            # finite value, which keeps the potentials consistent and avoids inf - inf.
+            finite = np.concatenate([to_target[np.isfinite(to_target)], from_source[np.isfinite(from_source)]])
+            cap = float(finite.max()) if finite.size else 0.0
+            p = ((np.minimum(to_target, cap) - np.minimum(from_source, cap)) / 2.0).tolist()
+        sign = (1.0, -1.0)
+
+        dist = (dict(sources), dict(targets))
+        parent = ({s: -1 for s in sources}, {t: -1 for t in targets})
+        closed = (set(), set())
+        heaps = (sorted((d + p[s] if p else d, s) for s, d in sources.items()),
+                 sorted((d - p[t] if p else d, t) for t, d in targets.items()))
+        best, meeting = float("inf"), -1
+        settled = 0
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            _, u = heappop(heaps[side])
+            if u in closed[side]:
+                continue
+            closed[side].add(u)
+            settled += 1
+
+            offsets, heads, costs = graphs[side]
+            du = dist[side][u]
+            other = dist[1 - side]
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                if v in closed[side]:
+                    continue
+                dv = du + costs[e]
+                if dv < dist[side].get(v, float("inf")):
+                    dist[side][v] = dv
+                    parent[side][v] = u
+                    heappush(heaps[side], (dv + sign[side] * p[v] if p else dv, v))
+                    if v in other and dv + other[v] < best:
+                        best, meeting = dv + other[v], v
+            if u in other and du + other[u] < best:
+                best, meeting = du + other[u], u
+
+        if meeting < 0:
+            ids = self.compact.node_ids
+            raise nx.NetworkXNoPath(
+                f"No path found between {', '.join(str(ids[s]) for s in sources)} and {', '.join(str(ids[t]) for t in targets)}"
+            )
+
+        path = self._unwind(parent[0], meeting)
+        node = parent[1][meeting]
+        while node != -1:
+            path.append(node)
+            node = parent[1][node]
+        logger.debug(f"Bidirectional search settled {settled} nodes")
+        return SearchResult(path, best, settled)
+
+    def one_to_many(self, source: int, targets: Sequence[int], weight: str = "length") -> Dict[int, SearchResult]:
+        """
+        Find the lowest-`weight` paths from `source` to several targets with one Dijkstra search.
+
+        The search stops as soon as every target is settled, so it costs about
+        as much as a single search to the farthest target.
+
+        Args:
+            source (int): Compact id of the start node.
+            targets (Sequence[int]): Compact ids of the end nodes.
+            weight (str, optional): Edge weight to minimize. Defaults to "length".
+
+        Returns:
+            Dict[int, SearchResult]: Result per reachable target; unreachable targets are missing.
+            `settled` counts the nodes settled by the shared search.
+        """
+        offsets, heads, costs = self.compact.adjacency(weight)
+        remaining = set(targets)
+        dist = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        open_set = [(0.0, source)]
+
+        while open_set and remaining:
+            du, u = heappop(open_set)
+            if u in closed:
+                continue
+            closed.add(u)
+            remaining.discard(u)
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                if v in closed:
+                    continue
+                dv = du + costs[e]
+                if dv < dist.get(v, float("inf")):
+                    dist[v] = dv
+                    parent[v] = u
+                    heappush(open_set, (dv, v))
+
+        settled = len(closed)
+        logger.debug(f"One-to-many search for {len(set(targets))} targets settled {settled} nodes")
+        return {t: SearchResult(self._unwind(parent, t), dist[t], settled) for t in set(targets) if t in closed}
+
+    def time_dependent(
+        self,
+        source: int,
+        target: int,
+        departures: np.ndarray,
+        travel_time: Callable[[int, np.ndarray], np.ndarray],
+        heuristic: Optional[np.ndarray] = None,
+    ) -> List[SearchResult]:
+        """
+        Find the fastest path for each of several departure times in one search.
+
+        Every node carries a vector with the elapsed time since each departure,
+        and edges are timed at the moment each trip reaches them. The search is
+        label-correcting: a node is queued again whenever any of its elapsed times
+        improves, keyed by its smallest elapsed time. With FIFO travel times it
+        gives exactly the results of one time-dependent search per departure,
+        while sharing the queue and the graph traversal between them; with a
+        single departure it is plain time-dependent A*.
+
+        Args:
+            source (int): Compact id of the start node.
+            target (int): Compact id of the end node.
+            departures (np.ndarray): Departure times, in the unit and epoch `travel_time` expects.
+            travel_time (Callable[[int, np.ndarray], np.ndarray]): Maps an edge id and
+                entry times to the time needed to traverse it from each of them.
+            heuristic (Optional[np.ndarray], optional): Lower bound on the remaining
+                travel time for every node, valid at any time. Dijkstra order is used when omitted.
+
+        Returns:
+            List[SearchResult]: Per departure, the fastest path, the edges it drives
+            and its travel time; `settled` counts the node expansions of the shared search.
+
+        Raises:
+            nx.NetworkXNoPath: If `target` is unreachable from `source`.
+        """
+        offsets, heads, _ = self.compact.adjacency("length")
+        h = heuristic.tolist() if heuristic is not None else None
+        departures = np.asarray(departures, dtype=np.float64)
+        k = len(departures)
+
+        elapsed = {source: np.zeros(k)}
+        # Edge each departure's trip arrives by; parallel edges may differ in speed
+        parent = {source: np.full(k, -1, dtype=np.int64)}
+        open_set = [((h[source] if h else 0.0), source)]
+        settled = 0
+
+        while open_set:
+            key, u = heappop(open_set)
+            if target in elapsed and key >= elapsed[target].max():
+                break
+            eu = elapsed[u]
+            if key > eu.min() + (h[u] if h else 0.0):
+                continue
+            settled += 1
+            if u == target:
+                continue
+            now = departures + eu
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                ev = eu + travel_time(e, now)
+                known = elapsed.get(v)
+                if known is None:
+                    elapsed[v] = ev
+                    parent[v] = np.full(k, e, dtype=np.int64)
+                else:
+                    better = ev < known
+                    if not better.any():
+                        continue
+                    known[better] = ev[better]
+                    parent[v][better] = e
+                    ev = known
+                heappush(open_set, (ev.min() + h[v] if h else ev.min(), v))
+
+        if target not in elapsed:
+            raise nx.NetworkXNoPath(
+                f"No path found between {self.compact.node_ids[source]} and {self.compact.node_ids[target]}"
+            )
+        logger.debug(f"Time-dependent search for {k} departures settled {settled} nodes")
+        tails = self.compact.edge_sources()
+        results = []
+        for j in range(k):
+            edges, edge = [], int(parent[target][j])
+            while edge != -1:
+                edges.append(edge)
+                edge = int(parent[int(tails[edge])][j])
+            edges.reverse()
+            path = [source] + [heads[e] for e in edges]
+            results.append(SearchResult(path, float(elapsed[target][j]), settled, edges))
+        return results
+
+    def time_dependent_between(
+        self,
+        sources: Dict[int, np.ndarray],
+        targets: Dict[int, Callable[[np.ndarray], np.ndarray]],
+        departures: np.ndarray,
+        travel_time: Callable[[int, np.ndarray], np.ndarray],
+        heuristic: Optional[np.ndarray] = None,
+    ) -> List[SearchResult]:
+        """
+        Run `time_dependent` from several start nodes to several end nodes.
+
+        Used for points in the middle of an edge, like `astar_between`: every
+        source starts with the time each departure needs to drive its partial
+        edge, and every target adds the time to drive the remaining partial
+        edge, timed when the trip arrives there.
+
+        Args:
+            sources (Dict[int, np.ndarray]): Compact id to the initial elapsed time per departure.
+            targets (Dict[int, Callable[[np.ndarray], np.ndarray]]): Compact id to a function
+                mapping arrival times to the time added when finishing there.
+            departures (np.ndarray): Departure times, in the unit and epoch `travel_time` expects.
+            travel_time (Callable[[int, np.ndarray], np.ndarray]): Maps an edge id and
+                entry times to the time needed to traverse it from each of them.
+            heuristic (Optional[np.ndarray], optional): Lower bound on the remaining travel
+                time to the best target, finishing time included, for every node.
+
+        Returns:
+            List[SearchResult]: Per departure, the fastest path between the best source/target
+            pair, the edges it drives and its travel time including both partial edges.
+
+        Raises:
+            nx.NetworkXNoPath: If no target is reachable.
+        """
+        offsets, heads, _ = self.compact.adjacency("length")
+        h = heuristic.tolist() if heuristic is not None else None
+        departures = np.asarray(departures, dtype=np.float64)
+        k = len(departures)
+
+        elapsed = {s: np.array(initial, dtype=np.float64) for s, initial in sources.items()}
+        parent = {s: np.full(k, -1, dtype=np.int64) for s in sources}
+        open_set = [((e.min() + h[s] if h else e.min()), s) for s, e in elapsed.items()]
+        open_set.sort()
+        best = np.full(k, np.inf)
+        best_node = np.full(k, -1, dtype=np.int64)
+        settled = 0
+
+        while open_set:
+            key, u = heappop(open_set)
+            if key >= best.max():
+                break
+            eu = elapsed[u]
+            if key > eu.min() + (h[u] if h else 0.0):
+                continue
+            settled += 1
+            now = departures + eu
+            if u in targets:
+                # Targets are expanded too: the best route may pass one to reach another
+                total = eu + targets[u](now)
+                better = total < best
+                best[better] = total[better]
+                best_node[better] = u
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                ev = eu + travel_time(e, now)
+                known = elapsed.get(v)
+                if known is None:
+                    elapsed[v] = ev
+                    parent[v] = np.full(k, e, dtype=np.int64)
+                else:
+                    better = ev < known
+                    if not better.any():
+                        continue
+                    known[better] = ev[better]
+                    parent[v][better] = e
+                    ev = known
+                heappush(open_set, (ev.min() + h[v] if h else ev.min(), v))
+
+        if (best_node < 0).any():
+            raise nx.NetworkXNoPath("No path found between the snapped points")
+        logger.debug(f"Time-dependent search for {k} departures between snapped points settled {settled} nodes")
+        tails = self.compact.edge_sources()
+        results = []
+        for j in range(k):
+            node = int(best_node[j])
+            edges, edge = [], int(parent[node][j])
+            while edge != -1:
+                edges.append(edge)
+                edge = int(parent[int(tails[edge])][j])
+            edges.reverse()
+            path = [int(tails[edges[0]])] + [heads[e] for e in edges] if edges else [node]
+            results.append(SearchResult(path, float(best[j]), settled, edges))
+        return results
+
+    def dijkstra_all(self, source: int, weight: str = "length", reverse: bool = False) -> np.ndarray:
+        """
+        Compute the distance from `source` to every node (or from every node to `source`).
+
+        Args:
+            source (int): Compact id of the root node.
+            weight (str, optional): Edge weight to use. Defaults to "length".
+            reverse (bool, optional): Search the reversed graph, giving distances
+                towards `source`. Defaults to False.
+
+        Returns:
+            np.ndarray: Distance per compact node id; inf where unreachable.
+        """
+        offsets, heads, costs = self.compact.adjacency(weight, reverse=reverse)
+        inf = float("inf")
+        dist = [inf] * self.compact.num_nodes
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            du, u = heappop(heap)
+            if du > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                dv = du + costs[e]
+                if dv < dist[v]:
+                    dist[v] = dv
+                    heappush(heap, (dv, v))
+        return np.asarray(dist, dtype=np.float64)
+
+    @staticmethod
+    def _unwind(parent: dict, node: int) -> List[int]:
+        """Follow parent pointers back from `node` and return the path in order."""
+        path = []
+        while node != -1:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
@@ -0,0 +1,323 @@
+import time
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Longest run of consecutive stops Or-opt moves at once.
+OR_OPT_MAX_SEGMENT = 3
+
+
+@dataclass(frozen=True)
+class Stop:
+    """
+    A place a vehicle has to visit.
+
+    Attributes:
+        lat (float): Latitude.
+        lon (float): Longitude.
+        demand (float): Load picked up or delivered, counted against vehicle capacity.
+        earliest_min (Optional[float]): Start of the time window; vehicles arriving earlier wait.
+        latest_min (Optional[float]): Latest arrival time.
+        service_min (float): Time spent at the stop.
+        name (Optional[str]): Label for display.
+    """
+    lat: float
+    lon: float
+    demand: float = 0.0
+    earliest_min: Optional[float] = None
+    latest_min: Optional[float] = None
+    service_min: float = 0.0
+    name: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class PlannedRoute:
+    """
+    The stops one vehicle visits, in order.
+
+    Attributes:
+        vehicle (int): Index of the vehicle.
+        stops (List[int]): Indices into the planned stops, in visiting order.
+        arrivals_min (List[float]): Arrival time at each stop.
+        end_min (float): Time the route ends (back at the depot if it returns there).
+        cost (float): Total cost of the route, depot legs included.
+        load (float): Sum of the stops' demands.
+    """
+    vehicle: int
+    stops: List[int]
+    arrivals_min: List[float]
+    end_min: float
+    cost: float
+    load: float
+
+
+@dataclass(frozen=True)
+class TripPlan:
+    """
+    Result of `TripPlanner.solve`.
+
+    Attributes:
+        routes (List[PlannedRoute]): One route per vehicle that visits at least one stop.
+        unassigned (List[int]): Stops no vehicle could serve within capacity and time windows.
+        cost (float): Total cost of all routes.
+    """
+    routes: List[PlannedRoute]
+    unassigned: List[int]
+    cost: float
+
+
+class TripPlanner:
+    """
+    Heuristic solver for the travelling salesman and vehicle routing problems.
+
+    Works on precomputed cost and duration matrices whose row/column 0 is the
+    depot and row/column ``i + 1`` is stop ``i``. Costs may be asymmetric (one-way
+    streets). Routes are built by parallel cheapest insertion and then improved
+    with 2-opt (reversing a run of stops) and Or-opt (moving up to three
+    consecutive stops within or between routes) until no move helps or the
+    time budget runs out. Every move keeps capacities and time windows satisfied.
+    """
+
+    def __init__(
+        self,
+        costs: np.ndarray,
+        durations: np.ndarray,
+        stops: Sequence[Stop],
+        capacities: Optional[Sequence[float]] = None,
+        start_min: float = 0.0,
+        return_to_depot: bool = True,
+    ) -> None:
+        """
+        Initialize the planner.
+
+        Args:
+            costs (np.ndarray): ``(n + 1) x (n + 1)`` matrix of the cost to minimize.
+            durations (np.ndarray): Matching matrix of travel minutes, used for time windows.
+            stops (Sequence[Stop]): The n stops.
+            capacities (Optional[Sequence[float]]): Capacity of every vehicle. Defaults to one
+                vehicle without a capacity limit (a travelling salesman tour).
+            start_min (float): Time the vehicles leave the depot, on the clock of the time windows.
+            return_to_depot (bool): Whether routes end back at the depot.
+
+        Raises:
+            ValueError: If the matrices do not match the stops or contain unreachable pairs.
+        """
+        n = len(stops)
+        if costs.shape != (n + 1, n + 1) or durations.shape != (n + 1, n + 1):
+            raise ValueError("Cost and duration matrices must have one row and column per stop plus the depot")
+        if not (np.isfinite(costs).all() and np.isfinite(durations).all()):
+            raise ValueError("Some stops cannot be reached from each other")
+
+        # Node `end` (n + 1) is where routes finish: a copy of the depot, or a
+        # free dummy node for open routes.
+        self.end = n + 1
+        self.costs = np.zeros((n + 2, n + 2))
+        self.durations = np.zeros((n + 2, n + 2))
+        self.costs[:n + 1, :n + 1] = costs
+        self.durations[:n + 1, :n + 1] = durations
+        if return_to_depot:
+            self.costs[:n + 1, self.end] = costs[:, 0]
+            self.durations[:n + 1, self.end] = durations[:, 0]
+        self._cost_list = self.costs.tolist()
+        self._duration_list = self.durations.tolist()
+
+        self.stops = list(stops)
+        self.demand = [0.0] + [s.demand for s in stops] + [0.0]
+        self.earliest = [start_min] + [s.earliest_min if s.earliest_min is not None else -np.inf for s in stops] + [-np.inf]
+        self.latest = [np.inf] + [s.latest_min if s.latest_min is not None else np.inf for s in stops] + [np.inf]
+        self.service = [0.0] + [s.service_min for s in stops] + [0.0]
+        self.has_windows = any(s.earliest_min is not None or s.latest_min is not None for s in stops)
+        self.capacities = list(capacities) if capacities else [np.inf]
+        self.start_min = start_min
+
+    def solve(self, time_budget_s: float = 2.0) -> TripPlan:
+        """
+        Plan the routes.
+
+        Args:
+            time_budget_s (float, optional): Wall-clock budget; the initial routes are always
+                built in full and the local search stops when it runs out. Defaults to 2.0.
+
+        Returns:
+            TripPlan: Routes of every used vehicle and the stops left unserved.
+        """
+        deadline = time.perf_counter() + time_budget_s
+        routes, unassigned = self._construct()
+        moves = self._improve(routes, deadline)
+        plan = self._plan(routes, unassigned)
+        logger.info(f"Planned {len(self.stops)} stops on {len(plan.routes)} routes with cost {plan.cost:.1f} "
+                    f"({moves} improving moves, {len(unassigned)} unassigned)")
+        return plan
+
+    def _schedule(self, seq: List[int]) -> Optional[List[float]]:
+        """Return arrival times along a full sequence (depot ... end), or None if a time window is missed."""
+        dur = self._duration_list
+        t = self.start_min
+        arrivals = [t]
+        for prev, node in zip(seq, seq[1:]):
+            t = max(t, self.earliest[prev]) + self.service[prev] + dur[prev][node]
+            if t > self.latest[node]:
+                return None
+            arrivals.append(t)
+        return arrivals
+
+    def _seq_cost(self, seq: List[int]) -> float:
+        c = self._cost_list
+        return sum(c[a][b] for a, b in zip(seq, seq[1:]))
+
+    def _construct(self) -> Tuple[List[List[int]], List[int]]:
+        """
+        Build routes by repeatedly inserting the stop whose cheapest feasible insertion costs least.
+
+        Construction always runs to completion, whatever the time budget, so a
+        stop is only left unassigned if no route can take it.
+        """
+        routes = [[0, self.end] for _ in self.capacities]
+        schedules = [self._schedule(seq) for seq in routes]
+        loads = [0.0] * len(routes)
+        unrouted = np.arange(1, len(self.stops) + 1)
+        demand = np.asarray(self.demand)
+        earliest, latest, service = np.asarray(self.earliest), np.asarray(self.latest), np.asarray(self.service)
+        unassigned: List[int] = []
+
+        while len(unrouted):
+            # delta[s, p] of every route: cost of inserting stop s between seq[p] and seq[p + 1]
+            deltas, owners = [], []
+            for v, seq in enumerate(routes):
+                fits = unrouted[loads[v] + demand[unrouted] <= self.capacities[v]]
+                if not len(fits):
+                    continue
+                prev, nxt = np.asarray(seq[:-1]), np.asarray(seq[1:])
+                delta = self.costs[prev][:, fits].T + self.costs[fits][:, nxt] - self.costs[prev, nxt]
+                if self.has_windows:
+                    # Arriving at the stop too late already rules the insertion out
+                    departures = np.maximum(schedules[v][:-1], earliest[prev]) + service[prev]
+                    arrivals = departures[:, None] + self.durations[prev][:, fits]
+                    delta[(arrivals > latest[fits]).T] = np.inf
+                deltas.append(delta.ravel())
+                owners.append((v, fits, delta.shape[1]))
+
+            chosen = None
+            if deltas:
+                sizes = [len(d) for d in deltas]
+                flat = np.concatenate(deltas)
+                route_of = np.repeat(np.arange(len(owners)), sizes)
+                starts = np.cumsum(sizes) - sizes
+                for k in np.argsort(flat, kind="stable"):
+                    if flat[k] == np.inf:
+                        break
+                    o = route_of[k]
+                    v, fits, width = owners[o]
+                    s_pos, p = divmod(int(k - starts[o]), width)
+                    stop = int(fits[s_pos])
+                    seq = routes[v][:p + 1] + [stop] + routes[v][p + 1:]
+                    schedule = self._schedule(seq) if self.has_windows else None
+                    if not self.has_windows or schedule is not None:
+                        chosen = (v, stop, seq, schedule)
+                        break
+            if chosen is None:
+                # No remaining stop fits anywhere
+                unassigned.extend(int(s) - 1 for s in unrouted)
+                break
+            v, stop, seq, schedule = chosen
+            routes[v] = seq
+            if self.has_windows:
+                schedules[v] = schedule
+            loads[v] += self.demand[stop]
+            unrouted = unrouted[unrouted != stop]
+        return routes, unassigned
+
+    def _improve(self, routes: List[List[int]], deadline: float) -> int:
+        """Apply improving 2-opt and Or-opt moves until none is left or time runs out."""
+        moves = 0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for v in range(len(routes)):
+                if self._two_opt(routes, v):
+                    improved = True
+                    moves += 1
+            if self._or_opt(routes, deadline):
+                improved = True
+                moves += 1
+        return moves
+
+    def _two_opt(self, routes: List[List[int]], v: int) -> bool:
+        """Reverse the run of stops seq[i..j] of route v if that lowers its cost; costs may be asymmetric."""
+        seq = routes[v]
+        c = self._cost_list
+        n = len(seq)
+        if n < 4:
+            return False
+        # forward[k] / backward[k]: cost of seq[0..k] driven forwards / each edge driven backwards
+        forward, backward = [0.0], [0.0]
+        for a, b in zip(seq, seq[1:]):
+            forward.append(forward[-1] + c[a][b])
+            backward.append(backward[-1] + c[b][a])
+        for i in range(1, n - 2):
+            for j in range(i + 1, n - 1):
+                old = c[seq[i - 1]][seq[i]] + (forward[j] - forward[i]) + c[seq[j]][seq[j + 1]]
+                new = c[seq[i - 1]][seq[j]] + (backward[j] - backward[i]) + c[seq[i]][seq[j + 1]]
+                if new < old - 1e-9:
+                    candidate = seq[:i] + seq[i:j + 1][::-1] + seq[j + 1:]
+                    if not self.has_windows or self._schedule(candidate) is not None:
+                        routes[v] = candidate
+                        return True
+        return False
+
+    def _or_opt(self, routes: List[List[int]], deadline: float) -> bool:
+        """Move a run of up to OR_OPT_MAX_SEGMENT stops to its best improving position in any route."""
+        c = self._cost_list
+        for v, seq in enumerate(routes):
+            for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+                for i in range(1, len(seq) - length):
+                    if time.perf_counter() > deadline:
+                        return False
+                    first, last = seq[i], seq[i + length - 1]
+                    before, after = seq[i - 1], seq[i + length]
+                    inner = sum(c[a][b] for a, b in zip(seq[i:i + length - 1], seq[i + 1:i + length]))
+                    removal_gain = c[before][first] + inner + c[last][after] - c[before][after]
+                    segment = seq[i:i + length]
+                    for w, target in enumerate(routes):
+                        base = seq[:i] + seq[i + length:] if w == v else target
+                        if w != v and sum(self.demand[s] for s in segment) + sum(self.demand[s] for s in target) > self.capacities[w]:
+                            continue
+                        for p in range(len(base) - 1):
+                            if w == v and p == i - 1:
+                                continue
+                            u, x = base[p], base[p + 1]
+                            added = c[u][first] + inner + c[last][x] - c[u][x]
+                            if added < removal_gain - 1e-9:
+                                moved = base[:p + 1] + segment + base[p + 1:]
+                                if w == v:
+                                    if self.has_windows and self._schedule(moved) is None:
+                                        continue
+                                    routes[v] = moved
+                                else:
+                                    rest = seq[:i] + seq[i + length:]
+                                    if self.has_windows and (self._schedule(moved) is None or self._schedule(rest) is None):
+                                        continue
+                                    routes[v], routes[w] = rest, moved
+                                return True
+        return False
+
+    def _plan(self, routes: List[List[int]], unassigned: List[int]) -> TripPlan:
+        """Turn full sequences into the public result."""
+        planned = []
+        for v, seq in enumerate(routes):
+            if len(seq) <= 2:
+                continue
+            arrivals = self._schedule(seq)
+            planned.append(PlannedRoute(
+                vehicle=v,
+                stops=[s - 1 for s in seq[1:-1]],
+                arrivals_min=arrivals[1:-1],
+                end_min=arrivals[-1],
+                cost=self._seq_cost(seq),
+                load=sum(self.demand[s] for s in seq),
+            ))
+        return TripPlan(planned, sorted(unassigned), sum(r.cost for r in planned))
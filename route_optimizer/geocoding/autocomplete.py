@@ -0,0 +1,148 @@
+import bisect
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .normalize import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Highest code point, appended to a prefix to get the end of its sorted range.
+_MAX_CHAR = "\U0010ffff"
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """
+    An autocomplete suggestion.
+
+    Attributes:
+        label (str): Text to show and send back as the place name.
+        lat (float): Latitude.
+        lon (float): Longitude.
+        source (str): "history", "geocoded", "place" or "street".
+        score (float): Ranking score; higher first.
+    """
+    label: str
+    lat: float
+    lon: float
+    source: str
+    score: float
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index of place names.
+
+    Every label is indexed under its normalized form and under each of its
+    word starts, so "mall" finds "Prozone Mall". A prefix query is two binary
+    searches plus a top-k selection over the matching range. When the range
+    is very large (one or two letters typed), the names are instead scanned
+    in score order until enough matches are found, which bounds the work.
+
+    New names go to a small pending list that is scanned linearly and merged
+    into the sorted arrays once it grows, so recording a search never forces
+    a full re-sort.
+    """
+
+    # Ranges larger than this are answered by the score-ordered scan.
+    MAX_RANGE_SCAN = 2000
+    # Pending names merged into the sorted arrays once this many accumulate.
+    MAX_PENDING = 1024
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._lock = threading.Lock()
+        # normalized label -> Suggestion (one per distinct place name)
+        self._items: Dict[str, Suggestion] = {}
+        self._keys: List[str] = []
+        self._refs: List[str] = []
+        self._by_score: List[str] = []
+        self._pending: List[str] = []
+
+    def add(self, label: str, lat: float, lon: float, source: str, score: float) -> None:
+        """
+        Add a place, or raise the score of a known one.
+
+        Args:
+            label (str): Place name as shown to users.
+            lat (float): Latitude.
+            lon (float): Longitude.
+            source (str): Where the place comes from.
+            score (float): Ranking score; scores of the same name add up.
+        """
+        key = normalize_query(label)
+        if not key:
+            return
+        with self._lock:
+            known = self._items.get(key)
+            if known is None:
+                self._items[key] = Suggestion(label, lat, lon, source, score)
+                self._pending.append(key)
+            else:
+                self._items[key] = Suggestion(known.label, known.lat, known.lon, known.source, known.score + score)
+
+    @staticmethod
+    def _word_starts(key: str) -> List[str]:
+        """Return `key` and every suffix of it starting at a word."""
+        return [key] + [key[i + 1:] for i, char in enumerate(key) if char == " " and i + 1 < len(key)]
+
+    def _rebuild(self) -> None:
+        """Merge pending names into the sorted arrays; called with the lock held."""
+        entries: List[Tuple[str, str]] = [(start, key) for key in self._items for start in self._word_starts(key)]
+        entries.sort()
+        self._keys = [k for k, _ in entries]
+        self._refs = [r for _, r in entries]
+        self._by_score = sorted(self._items, key=lambda k: self._rank(self._items[k]))
+        self._pending = []
+        logger.debug(f"Autocomplete index rebuilt with {len(self._items)} names")
+
+    @staticmethod
+    def _rank(item: Suggestion) -> Tuple[float, int, str]:
+        return -item.score, len(item.label), item.label
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        """
+        Return the best-scored places whose name, or a word of it, starts with `prefix`.
+
+        Args:
+            prefix (str): Text typed so far.
+            limit (int, optional): Maximum number of suggestions. Defaults to 8.
+
+        Returns:
+            List[Suggestion]: Suggestions, best first; shorter names win ties.
+        """
+        query = normalize_query(prefix)
+        if not query:
+            return []
+        with self._lock:
+            if len(self._pending) > self.MAX_PENDING:
+                self._rebuild()
+            lo = bisect.bisect_left(self._keys, query)
+            hi = bisect.bisect_left(self._keys, query + _MAX_CHAR, lo)
+            if hi - lo <= self.MAX_RANGE_SCAN:
+                matches = {self._refs[i] for i in range(lo, hi)}
+            else:
+                # Scores may have grown since the last rebuild, so collect a few
+                # extra candidates and rank them by their current scores below.
+                matches = set()
+                for key in self._by_score:
+                    if any(start.startswith(query) for start in self._word_starts(key)):
+                        matches.add(key)
+                        if len(matches) >= 4 * limit:
+                            break
+            matches.update(key for key in self._pending
+                           if any(start.startswith(query) for start in self._word_starts(key)))
+            items = [self._items[key] for key in matches]
+        return heapq.nsmallest(limit, items, key=self._rank)
+
+    def __contains__(self, label: str) -> bool:
+        key = normalize_query(label)
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
@@ -0,0 +1,197 @@
+import os
+import glob
+import json
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..graph.compact import CompactGraph
+from .normalize import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class Gazetteer:
+    """
+    Offline place index built from local data.
+
+    Two kinds of entries are kept:
+
+    * places from cached Nominatim responses (osmnx's ``cache/*.json`` files),
+      indexed by name and full display name;
+    * street names of loaded graphs, each placed on the edge closest to the
+      centroid of all edges carrying that name.
+
+    Places carry their address, so a query's extra comma-separated parts (city,
+    state, ...) are checked against it. Streets carry no address and are only
+    used as a fallback by the geocoder.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty gazetteer."""
+        self._lock = threading.Lock()
+        # normalized name -> [(normalized display name, lat, lon, display name)], in Nominatim ranking order
+        self._places: Dict[str, List[Tuple[str, float, float, str]]] = {}
+        # normalized street name -> (lat, lon, street name)
+        self._streets: Dict[str, Tuple[float, float, str]] = {}
+        self._loaded_graphs = set()
+
+    def add_nominatim_cache(self, cache_dir: str) -> int:
+        """
+        Index every place in a directory of cached Nominatim responses.
+
+        Args:
+            cache_dir (str): Directory with osmnx's JSON response cache.
+
+        Returns:
+            int: Number of places indexed.
+        """
+        count = 0
+        for path in glob.glob(os.path.join(cache_dir, "*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    response = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Skipping unreadable cache file {path}: {e}")
+                continue
+            # Overpass responses are dicts; Nominatim search responses are lists of places.
+            if not isinstance(response, list):
+                continue
+            for place in response:
+                if not isinstance(place, dict) or "lat" not in place or "display_name" not in place:
+                    continue
+                count += self.add_place(place.get("name") or place["display_name"].split(",")[0],
+                                        place["display_name"], float(place["lat"]), float(place["lon"]))
+        logger.info(f"Gazetteer indexed {count} places from {cache_dir}")
+        return count
+
+    def add_place(self, name: str, display_name: str, lat: float, lon: float) -> int:
+        """
+        Index one named place.
+
+        Args:
+            name (str): Short name, e.g. "Prozone Mall".
+            display_name (str): Full address.
+            lat (float): Latitude.
+            lon (float): Longitude.
+
+        Returns:
+            int: 1 if the place was added, 0 if it was already known.
+        """
+        key, display = normalize_query(name), normalize_query(display_name)
+        if not key:
+            return 0
+        with self._lock:
+            entries = self._places.setdefault(key, [])
+            if any(entry[0] == display for entry in entries):
+                return 0
+            entries.append((display, lat, lon, display_name))
+            if display != key:
+                self._places.setdefault(display, []).append((display, lat, lon, display_name))
+        return 1
+
+    def add_graph(self, compact: CompactGraph) -> List[Tuple[str, float, float]]:
+        """
+        Index the street names of a graph.
+
+        Args:
+            compact (CompactGraph): Graph with `edge_names`.
+
+        Returns:
+            List[Tuple[str, float, float]]: Name, latitude and longitude of every
+            street that was not indexed before.
+        """
+        if compact.edge_names is None or not compact.name_table:
+            return []
+        fingerprint = compact.fingerprint()
+        if fingerprint in self._loaded_graphs:
+            return []
+
+        codes = np.asarray(compact.edge_names)
+        named = np.nonzero(codes >= 0)[0]
+        tails = compact.edge_sources()[named]
+        heads = compact.targets[named]
+        mid_lat = (compact.lat[tails] + compact.lat[heads]) / 2
+        mid_lon = (compact.lon[tails] + compact.lon[heads]) / 2
+        codes = codes[named]
+
+        # Per name, the edge midpoint closest to the centroid of all its edges.
+        counts = np.bincount(codes, minlength=len(compact.name_table))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centroid_lat = np.bincount(codes, weights=mid_lat, minlength=len(counts)) / counts
+            centroid_lon = np.bincount(codes, weights=mid_lon, minlength=len(counts)) / counts
+        offset = (mid_lat - centroid_lat[codes]) ** 2 + ((mid_lon - centroid_lon[codes]) * np.cos(np.radians(mid_lat))) ** 2
+        order = np.lexsort((offset, codes))
+        first = order[np.r_[True, codes[order][1:] != codes[order][:-1]]]
+
+        added = []
+        with self._lock:
+            for i in first.tolist():
+                name = compact.name_table[codes[i]]
+                key = normalize_query(name)
+                if key and key not in self._streets:
+                    self._streets[key] = (float(mid_lat[i]), float(mid_lon[i]), name)
+                    added.append((name, float(mid_lat[i]), float(mid_lon[i])))
+            self._loaded_graphs.add(fingerprint)
+        logger.info(f"Gazetteer indexed {len(added)} new street names")
+        return added
+
+    def find_place(self, query: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve a normalized query against the indexed places.
+
+        The full query may match a name or display name directly; otherwise its
+        first comma-separated part must match a place's name and every other
+        part must occur in that place's address.
+
+        Args:
+            query (str): Normalized query.
+
+        Returns:
+            Optional[Tuple[float, float]]: Coordinates, or None if no place matches.
+        """
+        with self._lock:
+            exact = self._places.get(query)
+            if exact:
+                return exact[0][1], exact[0][2]
+            head, *rest = query.split(",")
+            for display, lat, lon, _ in self._places.get(head.strip(), ()):
+                if all(part.strip() in display for part in rest):
+                    return lat, lon
+        return None
+
+    def find_street(self, query: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve the first comma-separated part of a normalized query as a street name.
+
+        Args:
+            query (str): Normalized query.
+
+        Returns:
+            Optional[Tuple[float, float]]: A point on the street, or None if unknown.
+        """
+        with self._lock:
+            street = self._streets.get(query.split(",")[0].strip())
+        return street[:2] if street else None
+
+    def entries(self) -> Iterator[Tuple[str, float, float, str]]:
+        """
+        Iterate over every indexed place and street.
+
+        Yields:
+            Tuple[str, float, float, str]: Display name, latitude, longitude and
+            kind ("place" or "street").
+        """
+        with self._lock:
+            places = {entry[3]: entry for entries in self._places.values() for entry in entries}
+            streets = list(self._streets.values())
+        for label, (_, lat, lon, _) in places.items():
+            yield label, lat, lon, "place"
+        for lat, lon, label in streets:
+            yield label, lat, lon, "street"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._places) + len(self._streets)
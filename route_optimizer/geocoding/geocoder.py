@@ -0,0 +1,193 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from ..config.models import RouteConfig
+from ..graph.compact import CompactGraph
+from .autocomplete import PrefixIndex, Suggestion
+from .gazetteer import Gazetteer
+from .normalize import normalize_query
+from .store import GeocodeStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GeocodeResult:
+    """
+    Coordinates of a place query.
+
+    Attributes:
+        lat (float): Latitude.
+        lon (float): Longitude.
+        source (str): "memory", "store", "gazetteer", "nominatim" or "street".
+    """
+    lat: float
+    lon: float
+    source: str
+
+
+class Geocoder:
+    """
+    Layered geocoder in front of Nominatim.
+
+    Queries are normalized and resolved, in order, from an in-memory LRU, the
+    persistent SQLite store, the offline gazetteer's places, Nominatim (through
+    `ox.geocode`, unless `RouteConfig.offline`) and finally the gazetteer's
+    street names. Nominatim answers are written to the store, so any place is
+    fetched from the network at most once.
+
+    Every known place also feeds a prefix index for autocomplete.
+    """
+
+    # Autocomplete scores per source; search history adds one per search on top.
+    STREET_SCORE = 0.5
+    PLACE_SCORE = 1.0
+    GEOCODED_SCORE = 2.0
+
+    def __init__(self, config: RouteConfig) -> None:
+        """
+        Open the store, build the gazetteer from the cached Nominatim responses and index both.
+
+        Args:
+            config (RouteConfig): Configuration with the geocoding settings.
+        """
+        self.config = config
+        self.store = GeocodeStore(config.geocode_db)
+        self.gazetteer = Gazetteer()
+        self.gazetteer.add_nominatim_cache(config.nominatim_cache_dir)
+        self.autocomplete = PrefixIndex()
+        for label, lat, lon, kind in self.gazetteer.entries():
+            self.autocomplete.add(label, lat, lon, kind, self.STREET_SCORE if kind == "street" else self.PLACE_SCORE)
+        for label, lat, lon in self.store.items():
+            self.autocomplete.add(label, lat, lon, "geocoded", self.GEOCODED_SCORE)
+        self._memory: "OrderedDict[str, GeocodeResult]" = OrderedDict()
+        # Searched names that only the search history knows
+        self._history_only: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def geocode(self, query: str) -> Tuple[float, float]:
+        """
+        Resolve a place query to coordinates, like `ox.geocode`.
+
+        Args:
+            query (str): Free-form place query.
+
+        Returns:
+            Tuple[float, float]: Latitude and longitude.
+
+        Raises:
+            ValueError: If the place cannot be found.
+        """
+        result = self.resolve(query)
+        return result.lat, result.lon
+
+    def resolve(self, query: str) -> GeocodeResult:
+        """
+        Resolve a place query and report which layer answered it.
+
+        Args:
+            query (str): Free-form place query.
+
+        Returns:
+            GeocodeResult: Coordinates and source.
+
+        Raises:
+            ValueError: If the place cannot be found.
+        """
+        key = normalize_query(query)
+        if not key:
+            raise ValueError("Empty location query")
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return GeocodeResult(cached.lat, cached.lon, "memory")
+
+        result = self._lookup(key, query)
+        if result is None:
+            raise ValueError(f"Could not geocode '{query}'")
+
+        with self._lock:
+            self._memory[key] = result
+            while len(self._memory) > self.config.geocode_memory_size:
+                self._memory.popitem(last=False)
+        return result
+
+    def _lookup(self, key: str, query: str) -> Optional[GeocodeResult]:
+        """Resolve a normalized query through the slower layers."""
+        stored = self.store.get(key)
+        if stored is not None:
+            return GeocodeResult(stored[0], stored[1], "store")
+
+        place = self.gazetteer.find_place(key)
+        if place is not None:
+            return GeocodeResult(place[0], place[1], "gazetteer")
+
+        if not self.config.offline:
+            try:
+                import osmnx as ox
+                lat, lon = ox.geocode(query)
+                self.store.put(key, float(lat), float(lon), "nominatim", label=query.strip())
+                self.autocomplete.add(query.strip(), float(lat), float(lon), "geocoded", self.GEOCODED_SCORE)
+                return GeocodeResult(float(lat), float(lon), "nominatim")
+            except Exception as e:
+                logger.warning(f"Nominatim lookup failed for '{query}': {e}")
+
+        street = self.gazetteer.find_street(key)
+        if street is not None:
+            return GeocodeResult(street[0], street[1], "street")
+        return None
+
+    def add_graph(self, compact: CompactGraph) -> None:
+        """
+        Make the street names of a loaded graph geocodable and suggestable.
+
+        Args:
+            compact (CompactGraph): Newly loaded graph.
+        """
+        for label, lat, lon in self.gazetteer.add_graph(compact):
+            self.autocomplete.add(label, lat, lon, "street", self.STREET_SCORE)
+
+    def add_search(self, label: str, lat: float, lon: float, count: int = 1) -> None:
+        """
+        Record a searched origin or destination for autocomplete ranking.
+
+        Names are typed freely, so only those already suggested or resolved by
+        the store or the gazetteer are always credited. Other names are added
+        until `RouteConfig.autocomplete_history_size` of them are held, and
+        ignored after that.
+
+        Args:
+            label (str): Place name as entered.
+            lat (float): Latitude it resolved to.
+            lon (float): Longitude it resolved to.
+            count (int, optional): Number of searches to credit. Defaults to 1.
+        """
+        key = normalize_query(label)
+        if not key:
+            return
+        if key not in self.autocomplete and self.store.get(key) is None and self.gazetteer.find_place(key) is None:
+            with self._lock:
+                if key not in self._history_only:
+                    if len(self._history_only) >= self.config.autocomplete_history_size:
+                        logger.debug(f"Not suggesting '{label}': search history holds enough unknown names")
+                        return
+                    self._history_only.add(key)
+        self.autocomplete.add(label, lat, lon, "history", float(count))
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        """
+        Suggest known places starting with `prefix`.
+
+        Args:
+            prefix (str): Text typed so far.
+            limit (int, optional): Maximum number of suggestions. Defaults to 8.
+
+        Returns:
+            List[Suggestion]: Ranked suggestions with coordinates.
+        """
+        return self.autocomplete.suggest(prefix, limit)
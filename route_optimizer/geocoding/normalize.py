@@ -0,0 +1,27 @@
+import re
+import unicodedata
+
+_PUNCTUATION = re.compile(r"[^\w\s,]")
+_SPACES = re.compile(r"\s+")
+_COMMAS = re.compile(r"\s*,[\s,]*")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a place query for cache lookups.
+
+    Case, Unicode compatibility forms, punctuation other than commas and
+    extra whitespace are folded, so "Prozone Mall , Coimbatore." and
+    "prozone mall, coimbatore" share one cache entry.
+
+    Args:
+        query (str): Free-form place query.
+
+    Returns:
+        str: Normalized query.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _COMMAS.sub(", ", text)
+    text = _SPACES.sub(" ", text)
+    return text.strip(" ,")
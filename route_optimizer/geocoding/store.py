@@ -0,0 +1,96 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodeStore:
+    """
+    Persistent SQLite store of geocoded queries.
+
+    Keys are normalized queries (see `normalize_query`), so every spelling
+    variant of a place that normalizes the same shares one row.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (and create if needed) the store.
+
+        Args:
+            path (str): SQLite database file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes ("
+            " query TEXT PRIMARY KEY,"
+            " lat REAL NOT NULL,"
+            " lon REAL NOT NULL,"
+            " source TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " label TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(geocodes)")}
+        if "label" not in columns:
+            self._conn.execute("ALTER TABLE geocodes ADD COLUMN label TEXT")
+        self._conn.commit()
+
+    def get(self, query: str) -> Optional[Tuple[float, float, str]]:
+        """
+        Look up a normalized query.
+
+        Args:
+            query (str): Normalized query.
+
+        Returns:
+            Optional[Tuple[float, float, str]]: Latitude, longitude and source, or None if unknown.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT lat, lon, source FROM geocodes WHERE query = ?", (query,)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, query: str, lat: float, lon: float, source: str, label: Optional[str] = None) -> None:
+        """
+        Store (or replace) the coordinates of a normalized query.
+
+        Args:
+            query (str): Normalized query.
+            lat (float): Latitude.
+            lon (float): Longitude.
+            source (str): Where the coordinates came from, e.g. "nominatim".
+            label (Optional[str], optional): The query as originally typed, for display.
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocodes (query, lat, lon, source, created_at, label) VALUES (?, ?, ?, ?, ?, ?)",
+                    (query, lat, lon, source, time.time(), label),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store geocode for '{query}': {e}")
+
+    def items(self) -> List[Tuple[str, float, float]]:
+        """
+        Return every stored place.
+
+        Returns:
+            List[Tuple[str, float, float]]: Display label (the original query when
+            known), latitude and longitude per row.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT COALESCE(label, query), lat, lon FROM geocodes").fetchall()
+        return [tuple(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
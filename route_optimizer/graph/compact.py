@@ -0,0 +1,434 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+# Edge attributes that get their own contiguous weight array.
+WEIGHT_ATTRIBUTES: Tuple[str, ...] = ("length", "cost", "fuel", "emissions", "traffic")
+
+# Value used when an edge has no attribute for a weight (matches NetworkX's default).
+DEFAULT_EDGE_WEIGHT = 1.0
+
+# Version of the on-disk layout written by `CompactGraph.save`.
+BINARY_FORMAT_VERSION = 1
+
+
+def _to_float(value: Any, default: float = DEFAULT_EDGE_WEIGHT) -> float:
+    """Convert an edge attribute to float, tolerating the string values GraphML produces."""
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _edge_name(value: Any) -> Optional[str]:
+    """Return an edge's street name; simplified edges may carry a list of names."""
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    return str(value) if value else None
+
+
+@dataclass(frozen=True)
+class CompactGraph:
+    """
+    Array-backed (CSR) view of a road network graph.
+
+    Nodes are renumbered to contiguous integers ``0..n-1``. The outgoing edges of
+    node ``i`` are ``targets[offsets[i]:offsets[i + 1]]`` and the position of an
+    edge in that slice is its compact edge id, shared by every weight array.
+
+    Attributes:
+        node_ids (np.ndarray): Original (OSM) node id for every compact node id.
+        lat (np.ndarray): Latitude of every node.
+        lon (np.ndarray): Longitude of every node.
+        offsets (np.ndarray): CSR row offsets, length ``n + 1``.
+        targets (np.ndarray): Head node of every edge, length ``m``.
+        edge_keys (np.ndarray): MultiDiGraph key of every edge, length ``m``.
+        weights (Dict[str, np.ndarray]): One float array of length ``m`` per weight attribute.
+        geometry_offsets (Optional[np.ndarray]): Start of each edge's shape points in
+            `geometry_lat`/`geometry_lon`, length ``m + 1``. Shapes include both endpoints.
+        geometry_lat (Optional[np.ndarray]): Latitude of all edge shape points.
+        geometry_lon (Optional[np.ndarray]): Longitude of all edge shape points.
+        edge_names (Optional[np.ndarray]): Index into `name_table` of every edge's
+            street name, -1 for unnamed edges.
+        name_table (Tuple[str, ...]): Distinct street names.
+    """
+    node_ids: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    offsets: np.ndarray
+    targets: np.ndarray
+    edge_keys: np.ndarray
+    weights: Dict[str, np.ndarray]
+    geometry_offsets: Optional[np.ndarray] = None
+    geometry_lat: Optional[np.ndarray] = None
+    geometry_lon: Optional[np.ndarray] = None
+    edge_names: Optional[np.ndarray] = None
+    name_table: Tuple[str, ...] = ()
+    _index: Dict[Any, int] = field(default_factory=dict, repr=False, compare=False)
+    _cache: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_networkx(cls, graph: nx.MultiDiGraph, weights: Sequence[str] = WEIGHT_ATTRIBUTES) -> "CompactGraph":
+        """
+        Build a compact graph from a NetworkX graph.
+
+        Args:
+            graph (nx.MultiDiGraph): Road network with 'x'/'y' node attributes.
+            weights (Sequence[str], optional): Edge attributes to extract. Defaults to WEIGHT_ATTRIBUTES.
+
+        Returns:
+            CompactGraph: The compact representation.
+        """
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        n = len(nodes)
+
+        lat = np.fromiter((_to_float(graph.nodes[v]["y"], 0.0) for v in nodes), dtype=np.float64, count=n)
+        lon = np.fromiter((_to_float(graph.nodes[v]["x"], 0.0) for v in nodes), dtype=np.float64, count=n)
+
+        sources: List[int] = []
+        targets: List[int] = []
+        keys: List[int] = []
+        columns: Dict[str, List[float]] = {w: [] for w in weights}
+        shape_counts: List[int] = []
+        shape_lat: List[float] = []
+        shape_lon: List[float] = []
+        names: List[int] = []
+        name_codes: Dict[str, int] = {}
+        for u, v, key, data in graph.edges(keys=True, data=True):
+            sources.append(index[u])
+            targets.append(index[v])
+            keys.append(key if isinstance(key, int) else 0)
+            for w in weights:
+                columns[w].append(_to_float(data.get(w)))
+            name = _edge_name(data.get("name"))
+            names.append(-1 if name is None else name_codes.setdefault(name, len(name_codes)))
+            coords = getattr(data.get("geometry"), "coords", None)
+            if coords is None:
+                coords = [(lon[index[u]], lat[index[u]]), (lon[index[v]], lat[index[v]])]
+            else:
+                coords = list(coords)
+            shape_counts.append(len(coords))
+            shape_lon.extend(c[0] for c in coords)
+            shape_lat.extend(c[1] for c in coords)
+
+        src = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(src, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+
+        # Reorder the flattened edge shapes to follow the CSR edge order.
+        counts = np.asarray(shape_counts, dtype=np.int64)
+        old_starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        new_counts = counts[order]
+        geometry_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(new_counts, out=geometry_offsets[1:])
+        gather = np.repeat(old_starts[order] - geometry_offsets[:-1], new_counts) + np.arange(geometry_offsets[-1])
+
+        compact = cls(
+            node_ids=np.asarray(nodes) if nodes else np.zeros(0, dtype=np.int64),
+            lat=lat,
+            lon=lon,
+            offsets=offsets,
+            targets=np.asarray(targets, dtype=np.int64)[order],
+            edge_keys=np.asarray(keys, dtype=np.int64)[order],
+            weights={w: np.asarray(columns[w], dtype=np.float64)[order] for w in weights},
+            geometry_offsets=geometry_offsets,
+            geometry_lat=np.asarray(shape_lat, dtype=np.float64)[gather],
+            geometry_lon=np.asarray(shape_lon, dtype=np.float64)[gather],
+            edge_names=np.asarray(names, dtype=np.int32)[order],
+            name_table=tuple(name_codes),
+            _index=index,
+        )
+        logger.info(f"Built compact graph with {compact.num_nodes} nodes and {compact.num_edges} edges")
+        return compact
+
+    def save(self, directory: str) -> None:
+        """
+        Save the graph as raw NumPy arrays plus a JSON manifest.
+
+        Every array is written as its own ``.npy`` file so `load` can memory-map
+        it. The directory is written under a temporary name and renamed into
+        place, so readers never see a partially written graph.
+
+        Args:
+            directory (str): Destination directory (conventionally next to the GraphML cache file).
+
+        Raises:
+            ValueError: If the node ids are not integers (they could not be memory-mapped).
+        """
+        if self.node_ids.dtype.kind not in "iu":
+            raise ValueError("Only graphs with integer node ids can be saved in binary form")
+
+        arrays = {
+            "node_ids": self.node_ids,
+            "lat": self.lat,
+            "lon": self.lon,
+            "offsets": self.offsets,
+            "targets": self.targets,
+            "edge_keys": self.edge_keys,
+            **{f"weight_{w}": a for w, a in self.weights.items()},
+        }
+        if self.geometry_offsets is not None:
+            arrays.update(geometry_offsets=self.geometry_offsets, geometry_lat=self.geometry_lat,
+                          geometry_lon=self.geometry_lon)
+        if self.edge_names is not None:
+            arrays["edge_names"] = self.edge_names
+
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+            manifest = {
+                "format": BINARY_FORMAT_VERSION,
+                "num_nodes": self.num_nodes,
+                "num_edges": self.num_edges,
+                "weights": list(self.weights),
+                "arrays": sorted(arrays),
+                "fingerprint": self.fingerprint(),
+                "name_table": list(self.name_table),
+            }
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.replace(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info(f"Compact graph saved to {directory}")
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["CompactGraph"]:
+        """
+        Load a graph written by `save`.
+
+        With `mmap` the arrays are memory-mapped read-only, so loading is
+        almost free and worker processes opening the same files share the page cache.
+
+        Args:
+            directory (str): Directory written by `save`.
+            mmap (bool, optional): Memory-map the arrays instead of reading them. Defaults to True.
+
+        Returns:
+            Optional[CompactGraph]: The graph, or None if missing, incomplete or of another format version.
+        """
+        manifest_file = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_file):
+            return None
+        try:
+            with open(manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") != BINARY_FORMAT_VERSION:
+                logger.info(f"Ignoring binary graph with unsupported format: {directory}")
+                return None
+            mode = "r" if mmap else None
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+                      for name in manifest["arrays"]}
+        except Exception as e:
+            logger.error(f"Failed to load binary graph {directory}: {e}")
+            return None
+
+        compact = cls(
+            node_ids=arrays["node_ids"],
+            lat=arrays["lat"],
+            lon=arrays["lon"],
+            offsets=arrays["offsets"],
+            targets=arrays["targets"],
+            edge_keys=arrays["edge_keys"],
+            weights={w: arrays[f"weight_{w}"] for w in manifest["weights"]},
+            geometry_offsets=arrays.get("geometry_offsets"),
+            geometry_lat=arrays.get("geometry_lat"),
+            geometry_lon=arrays.get("geometry_lon"),
+            edge_names=arrays.get("edge_names"),
+            name_table=tuple(manifest["name_table"]),
+        )
+        compact._cache["fingerprint"] = manifest["fingerprint"]
+        return compact
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        """
+        Rebuild a NetworkX graph from the arrays.
+
+        Nodes get 'x'/'y' and edges their weight attributes and 'name'. Edge
+        shapes stay in the compact graph rather than becoming shapely geometries.
+
+        Returns:
+            nx.MultiDiGraph: Road network equivalent to the one the graph was built from.
+        """
+        ids = self.node_ids.tolist()
+        graph = nx.MultiDiGraph(crs="epsg:4326", simplified=True)
+        graph.add_nodes_from((node, {"y": y, "x": x}) for node, y, x in zip(ids, self.lat.tolist(), self.lon.tolist()))
+
+        columns = {w: a.tolist() for w, a in self.weights.items()}
+        names = self.edge_names.tolist() if self.edge_names is not None else [-1] * self.num_edges
+        table = self.name_table
+        sources = self.edge_sources().tolist()
+        targets = self.targets.tolist()
+        keys = self.edge_keys.tolist()
+
+        def edges():
+            for e in range(self.num_edges):
+                data = {w: col[e] for w, col in columns.items()}
+                if names[e] >= 0:
+                    data["name"] = table[names[e]]
+                yield ids[sources[e]], ids[targets[e]], keys[e], data
+
+        graph.add_edges_from(edges())
+        return graph
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def node_index(self, node: Any) -> int:
+        """
+        Map an original node id to its compact id.
+
+        Raises:
+            nx.NodeNotFound: If the node is not part of the graph.
+        """
+        if not self._index:
+            self._index.update((n, i) for i, n in enumerate(self.node_ids.tolist()))
+        try:
+            return self._index[node]
+        except KeyError:
+            raise nx.NodeNotFound(f"Node {node} not in graph")
+
+    def path_coords(self, nodes: Sequence[Any]) -> Tuple[List[float], List[float]]:
+        """
+        Return the coordinates of original node ids, e.g. of a route's path.
+
+        Args:
+            nodes (Sequence[Any]): Original node ids.
+
+        Returns:
+            Tuple[List[float], List[float]]: Latitudes and longitudes, in order.
+
+        Raises:
+            nx.NodeNotFound: If a node is not part of the graph.
+        """
+        index = [self.node_index(node) for node in nodes]
+        return self.lat[index].tolist(), self.lon[index].tolist()
+
+    def fingerprint(self) -> str:
+        """
+        Return a stable hash of the topology and weights.
+
+        Used to check that preprocessed data saved on disk still matches the graph.
+        """
+        if "fingerprint" not in self._cache:
+            digest = hashlib.sha1()
+            for array in (self.node_ids, self.offsets, self.targets):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            for name in sorted(self.weights):
+                digest.update(name.encode())
+                digest.update(np.ascontiguousarray(self.weights[name]).tobytes())
+            self._cache["fingerprint"] = digest.hexdigest()
+        return self._cache["fingerprint"]
+
+    def edge_shape(self, edge: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the latitude and longitude of an edge's shape points, endpoints included.
+
+        Args:
+            edge (int): Compact edge id.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Latitudes and longitudes from tail to head.
+        """
+        if self.geometry_offsets is None:
+            u = int(np.searchsorted(self.offsets, edge, side="right")) - 1
+            v = int(self.targets[edge])
+            return self.lat[[u, v]], self.lon[[u, v]]
+        start, end = self.geometry_offsets[edge], self.geometry_offsets[edge + 1]
+        return self.geometry_lat[start:end], self.geometry_lon[start:end]
+
+    def to_node_ids(self, path: Sequence[int]) -> List[Any]:
+        """Map a path of compact ids back to original node ids."""
+        ids = self.node_ids
+        return [ids[i].item() for i in path]
+
+    def path_edges(self, path: Sequence[int], weight: str = "length") -> np.ndarray:
+        """
+        Return the compact edge ids a path of compact node ids drives along.
+
+        Between parallel edges the one with the lowest `weight` is taken.
+
+        Args:
+            path (Sequence[int]): Compact node ids from source to target.
+            weight (str, optional): Weight deciding between parallel edges. Defaults to "length".
+
+        Returns:
+            np.ndarray: One edge id per consecutive node pair.
+
+        Raises:
+            ValueError: If two consecutive nodes are not connected.
+        """
+        costs = self.weights[weight]
+        edges = np.empty(max(len(path) - 1, 0), dtype=np.int64)
+        for i in range(len(edges)):
+            start, end = self.offsets[path[i]], self.offsets[path[i] + 1]
+            candidates = np.nonzero(self.targets[start:end] == path[i + 1])[0]
+            if len(candidates) == 0:
+                raise ValueError(f"No edge from node {path[i]} to node {path[i + 1]}")
+            edges[i] = start + candidates[np.argmin(costs[start + candidates])]
+        return edges
+
+    def edge_sources(self) -> np.ndarray:
+        """Return the tail node of every edge, aligned with `targets`."""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+
+    def reverse_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build the CSR arrays of the reversed graph.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Offsets, the tail node of each
+            reversed edge and the forward compact edge id it came from.
+        """
+        order = np.argsort(self.targets, kind="stable")
+        offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.targets, minlength=self.num_nodes), out=offsets[1:])
+        return offsets, self.edge_sources()[order], order.astype(np.int64)
+
+    def adjacency(self, weight: str, reverse: bool = False) -> Tuple[List[int], List[int], List[float]]:
+        """
+        Return the CSR arrays as Python lists for tight search loops.
+
+        Indexing a list is several times faster than indexing a NumPy array from
+        pure Python, so the lists are built once and cached per weight.
+
+        Args:
+            weight (str): Weight attribute to use.
+            reverse (bool, optional): Return the reversed graph. Defaults to False.
+
+        Returns:
+            Tuple[List[int], List[int], List[float]]: Offsets, heads and edge weights.
+        """
+        if weight not in self.weights:
+            raise ValueError(f"Unknown weight: {weight}")
+        key = f"{'rev' if reverse else 'fwd'}:{weight}"
+        if key not in self._cache:
+            if reverse:
+                offsets, heads, edge_ids = self.reverse_csr()
+                self._cache[key] = (offsets.tolist(), heads.tolist(), self.weights[weight][edge_ids].tolist())
+            else:
+                self._cache[key] = (self.offsets.tolist(), self.targets.tolist(), self.weights[weight].tolist())
+        return self._cache[key]
@@ -0,0 +1,276 @@
+import bz2
+import gzip
+import logging
+import re
+from array import array
+from typing import Dict, IO, List, Optional, Sequence, Tuple
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import networkx as nx
+
+from ..utils.helpers import haversine_distance_m_array
+
+logger = logging.getLogger(__name__)
+
+# Mirrors osmnx's "drive" network filter (values are matched as substrings, like Overpass `!~`).
+_EXCLUDED_HIGHWAY = re.compile(
+    "abandoned|bridleway|bus_guideway|construction|corridor|cycleway|elevator|escalator|footway|no|path|"
+    "pedestrian|planned|platform|proposed|raceway|razed|service|steps|track"
+)
+_EXCLUDED_SERVICE = re.compile("alley|driveway|emergency_access|parking|parking_aisle|private")
+
+# Tags kept on edges and nodes, as in osmnx's default settings.
+USEFUL_WAY_TAGS: Tuple[str, ...] = (
+    "bridge", "tunnel", "oneway", "lanes", "ref", "name", "highway", "maxspeed", "service", "access",
+    "area", "landuse", "width", "est_width", "junction",
+)
+USEFUL_NODE_TAGS: Tuple[str, ...] = ("ref", "highway")
+
+_ONEWAY_VALUES = {"yes", "true", "1", "-1", "reverse", "T", "F"}
+_REVERSED_ONEWAY_VALUES = {"-1", "reverse", "T"}
+
+# (west, south, east, north)
+Bounds = Tuple[float, float, float, float]
+
+
+def is_drivable(tags: Dict[str, str]) -> bool:
+    """
+    Check whether an OSM way belongs to the drivable network.
+
+    Args:
+        tags (Dict[str, str]): Tags of the way.
+
+    Returns:
+        bool: True if the way passes osmnx's "drive" filter.
+    """
+    highway = tags.get("highway")
+    if highway is None or _EXCLUDED_HIGHWAY.search(highway):
+        return False
+    if "yes" in tags.get("area", "") or "private" in tags.get("access", ""):
+        return False
+    if "no" in tags.get("motor_vehicle", "") or "no" in tags.get("motorcar", ""):
+        return False
+    return not _EXCLUDED_SERVICE.search(tags.get("service", ""))
+
+
+def _open_xml(path: str) -> IO[bytes]:
+    """Open an .osm file, decompressing .bz2 and .gz extracts on the fly."""
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+class OSMExtractReader:
+    """
+    Streaming reader turning a local OSM extract into an unsimplified drive network.
+
+    `.osm` XML (optionally .bz2/.gz compressed) is parsed with `iterparse`,
+    clearing every element once handled, and `.osm.pbf` is read with the
+    optional `osmium` package. Only node coordinates (in flat arrays) and the
+    drivable ways are kept, never the file itself.
+
+    The resulting graph has the node and edge attributes osmnx produces before
+    simplification, so `ox.simplify_graph` turns it into the same graph a
+    download would give.
+
+    Attributes:
+        path (str): Extract file.
+        bounds (Optional[Bounds]): (west, south, east, north) of the extract once read.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the reader.
+
+        Args:
+            path (str): Path of a `.osm`, `.osm.bz2`, `.osm.gz` or `.osm.pbf` file.
+        """
+        self.path = path
+        self.bounds: Optional[Bounds] = None
+
+    def read(self) -> nx.MultiDiGraph:
+        """
+        Read the extract in one pass.
+
+        Returns:
+            nx.MultiDiGraph: Unsimplified drivable network with every connected component.
+
+        Raises:
+            ImportError: If a `.pbf` file is given and `osmium` is not installed.
+        """
+        graph = nx.MultiDiGraph(crs="epsg:4326")
+        if self.path.endswith(".pbf"):
+            self._read_pbf(graph)
+        else:
+            self._read_xml(graph)
+        if self.bounds is None and graph.number_of_nodes():
+            ys = [d["y"] for _, d in graph.nodes(data=True)]
+            xs = [d["x"] for _, d in graph.nodes(data=True)]
+            self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        logger.info(f"Read {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges from {self.path}")
+        return graph
+
+    def _read_xml(self, graph: nx.MultiDiGraph) -> None:
+        """Stream an OSM XML file into `graph`."""
+        node_ids, node_lat, node_lon = array("q"), array("d"), array("d")
+        node_tags: Dict[int, Dict[str, str]] = {}
+        lookup: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+        with _open_xml(self.path) as f:
+            context = ET.iterparse(f, events=("start", "end"))
+            _, root = next(context)
+            for event, elem in context:
+                if event != "end":
+                    continue
+                if elem.tag == "node":
+                    node_ids.append(int(elem.get("id")))
+                    node_lat.append(float(elem.get("lat")))
+                    node_lon.append(float(elem.get("lon")))
+                    tags = {t.get("k"): t.get("v") for t in elem.iter("tag") if t.get("k") in USEFUL_NODE_TAGS}
+                    if tags:
+                        node_tags[int(elem.get("id"))] = tags
+                elif elem.tag == "way":
+                    tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                    if is_drivable(tags):
+                        if lookup is None:
+                            lookup = self._node_lookup(node_ids, node_lat, node_lon)
+                        refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                        coords = self._resolve(lookup, refs)
+                        if coords is not None:
+                            self._add_way(graph, int(elem.get("id")), refs, coords, tags, node_tags)
+                elif elem.tag == "bounds":
+                    self.bounds = (float(elem.get("minlon")), float(elem.get("minlat")),
+                                   float(elem.get("maxlon")), float(elem.get("maxlat")))
+                elif elem.tag != "relation":
+                    continue
+                # Free the handled element and its already-processed siblings.
+                elem.clear()
+                root.clear()
+
+    @staticmethod
+    def _node_lookup(ids: array, lat: array, lon: array) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Freeze the collected node coordinates into id-sorted arrays for binary search.
+
+        Extracts list all nodes before the ways, so this happens once, at the first way.
+        """
+        id_arr = np.array(ids, dtype=np.int64)
+        order = np.argsort(id_arr, kind="stable")
+        return id_arr[order], np.array(lat, dtype=np.float64)[order], np.array(lon, dtype=np.float64)[order]
+
+    @staticmethod
+    def _resolve(lookup: Tuple[np.ndarray, np.ndarray, np.ndarray], refs: Sequence[int]) -> Optional[List[Tuple[float, float]]]:
+        """Return (lat, lon) per referenced node, or None if any node is missing from the extract."""
+        ids, lat, lon = lookup
+        wanted = np.asarray(refs, dtype=np.int64)
+        pos = np.searchsorted(ids, wanted)
+        if np.any(pos >= len(ids)) or np.any(ids[np.minimum(pos, len(ids) - 1)] != wanted):
+            return None
+        return list(zip(lat[pos].tolist(), lon[pos].tolist()))
+
+    def _read_pbf(self, graph: nx.MultiDiGraph) -> None:
+        """Stream an OSM PBF file into `graph` with osmium, which resolves way node locations itself."""
+        try:
+            import osmium
+        except ImportError as e:
+            raise ImportError("Reading .osm.pbf extracts requires the 'osmium' package") from e
+
+        reader = self
+        node_tags: Dict[int, Dict[str, str]] = {}
+
+        class Handler(osmium.SimpleHandler):
+            def node(self, n):
+                tags = {k: n.tags[k] for k in USEFUL_NODE_TAGS if k in n.tags}
+                if tags:
+                    node_tags[n.id] = tags
+
+            def way(self, w):
+                tags = {t.k: t.v for t in w.tags}
+                if not is_drivable(tags):
+                    return
+                try:
+                    refs = [nd.ref for nd in w.nodes]
+                    coords = [(nd.location.lat, nd.location.lon) for nd in w.nodes]
+                except osmium.InvalidLocationError:
+                    return
+                reader._add_way(graph, w.id, refs, coords, tags, node_tags)
+
+        header = osmium.io.Reader(self.path, osmium.osm.osm_entity_bits.NOTHING).header()
+        box = header.box()
+        if box.valid():
+            self.bounds = (box.bottom_left.lon, box.bottom_left.lat, box.top_right.lon, box.top_right.lat)
+        Handler().apply_file(self.path, locations=True)
+
+    @staticmethod
+    def _add_way(
+        graph: nx.MultiDiGraph,
+        way_id: int,
+        refs: Sequence[int],
+        coords: Sequence[Tuple[float, float]],
+        tags: Dict[str, str],
+        node_tags: Dict[int, Dict[str, str]],
+    ) -> None:
+        """Add the nodes and edges of one drivable way like osmnx does."""
+        # Drop consecutive duplicate nodes.
+        keep = [i for i in range(len(refs)) if i == 0 or refs[i] != refs[i - 1]]
+        if len(keep) < 2:
+            return
+        refs = [refs[i] for i in keep]
+        lat = np.asarray([coords[i][0] for i in keep])
+        lon = np.asarray([coords[i][1] for i in keep])
+
+        for node, y, x in zip(refs, lat.tolist(), lon.tolist()):
+            if node not in graph:
+                graph.add_node(node, y=y, x=x, **node_tags.get(node, {}))
+
+        oneway_tag = tags.get("oneway", "")
+        oneway = oneway_tag in _ONEWAY_VALUES or tags.get("junction") == "roundabout"
+        if oneway_tag in _REVERSED_ONEWAY_VALUES:
+            refs, lat, lon = refs[::-1], lat[::-1], lon[::-1]
+        lengths = haversine_distance_m_array(lat[:-1], lon[:-1], lat[1:], lon[1:]).tolist()
+
+        attrs = {k: tags[k] for k in USEFUL_WAY_TAGS if k in tags}
+        attrs["osmid"] = way_id
+        attrs["oneway"] = oneway
+        for u, v, length in zip(refs[:-1], refs[1:], lengths):
+            graph.add_edge(u, v, **attrs, reversed=False, length=length)
+            if not oneway:
+                graph.add_edge(v, u, **attrs, reversed=True, length=length)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point: ingest an extract into the tile cache and/or save it as one graph."""
+    import argparse
+    import osmnx as ox
+    from ..config.models import RouteConfig
+    from .compact import CompactGraph
+    from .manager import GraphManager
+
+    parser = argparse.ArgumentParser(description="Fill the graph tile cache from a local OSM extract.")
+    parser.add_argument("extract", help="Path of a .osm, .osm.bz2, .osm.gz or .osm.pbf file")
+    parser.add_argument("--cache-dir", default=RouteConfig.graph_cache_dir, help="Graph cache directory")
+    parser.add_argument("--tile-size", type=float, default=RouteConfig.tile_size_deg,
+                        help="Tile size in degrees; 0 writes no tiles")
+    parser.add_argument("--graph", help="Also save the whole extract as one simplified graph to this GraphML "
+                                        "file, with its binary copy")
+    args = parser.parse_args(argv)
+    if args.tile_size <= 0 and not args.graph:
+        parser.error("nothing to write: give --graph or a positive --tile-size")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    manager = GraphManager(RouteConfig(graph_cache_dir=args.cache_dir, tile_size_deg=args.tile_size))
+    if manager.tiles is not None:
+        count = manager.ingest_extract(args.extract)
+        print(f"Wrote {count} tiles to {manager.tiles.tile_dir}")
+    if args.graph:
+        graph = manager.graph_from_extract(args.extract)
+        ox.save_graphml(graph, args.graph)
+        CompactGraph.from_networkx(graph).save(GraphManager.binary_path(args.graph))
+        print(f"Wrote graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges to {args.graph}")
+
+
+if __name__ == "__main__":
+    main()
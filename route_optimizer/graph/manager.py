@@ -1,10 +1,14 @@
 import os
+import math
 import logging
-from typing import Tuple
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
 
 import osmnx as ox
 import networkx as nx
 from ..config.models import RouteConfig
+from .compact import CompactGraph
+from .tiles import TileId, TileStore, tiles_in
+from .extract import OSMExtractReader
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,54 @@ class GraphManager:
         """
         self.config = config
         os.makedirs(self.config.graph_cache_dir, exist_ok=True)
+        self.tiles = None
+        if config.tile_size_deg > 0:
+            self.tiles = TileStore(config.graph_cache_dir, config.tile_size_deg, offline=config.offline)
+
+    def cache_path(self, center_point: Tuple[float, float], radius_m: int) -> str:
+        """
+        Return the GraphML cache file used for a graph centered at `center_point` with a given radius.
+
+        Args:
+            center_point (Tuple[float, float]): Latitude and longitude of the graph center.
+            radius_m (int): Radius around the center point in meters.
+
+        Returns:
+            str: Path of the cache file.
+        """
+        cache_name = f"graph_{center_point[0]:.6f}_{center_point[1]:.6f}_{radius_m}.graphml"
+        return os.path.join(self.config.graph_cache_dir, cache_name)
+
+    def stitched_path(self, tiles: FrozenSet[TileId]) -> str:
+        """
+        Return the GraphML cache file used for the graph stitched from `tiles`.
+
+        Args:
+            tiles (FrozenSet[TileId]): Tiles of the graph.
+
+        Returns:
+            str: Path of the cache file.
+
+        Raises:
+            ValueError: If tiling is disabled (`RouteConfig.tile_size_deg` is 0).
+        """
+        if self.tiles is None:
+            raise ValueError("Tiling is disabled; set RouteConfig.tile_size_deg")
+        return os.path.join(self.config.graph_cache_dir, self.tiles.stitched_name(tiles))
+
+    @staticmethod
+    def artifact_path(cache_file: str, suffix: str) -> str:
+        """
+        Return the path of a preprocessing artifact stored next to a GraphML cache file.
+
+        Args:
+            cache_file (str): Path of the GraphML cache file.
+            suffix (str): Artifact name, e.g. "ch-length.npz".
+
+        Returns:
+            str: Path of the artifact file.
+        """
+        return f"{os.path.splitext(cache_file)[0]}.{suffix}"
 
     def load_graph(self, center_point: Tuple[float, float], radius_m: int) -> nx.MultiDiGraph:
         """
@@ -38,23 +90,197 @@ class GraphManager:
             radius_m (int): Radius around the center point in meters.
 
         Returns:
-            nx.MultiDiGraph: The loaded road network graph.
+            nx.MultiDiGraph: The loaded road network graph. Graphs read from the binary
+            cache are rebuilt with `CompactGraph.to_networkx`; use `load` to get the
+            compact form alone.
         """
-        cache_name = f"graph_{center_point[0]:.6f}_{center_point[1]:.6f}_{radius_m}.graphml"
-        cache_file = os.path.join(self.config.graph_cache_dir, cache_name)
+        graph, compact = self.load(center_point, radius_m)
+        return graph if graph is not None else compact.to_networkx()
+
+    def load(self, center_point: Tuple[float, float], radius_m: int) -> Tuple[Optional[nx.MultiDiGraph], CompactGraph]:
+        """
+        Load a road network graph together with its compact form.
+
+        The binary cache (memory-mapped arrays) is tried first. A GraphML cache
+        file without a binary copy is parsed once and converted, and a newly
+        downloaded graph is saved in both formats.
+
+        Args:
+            center_point (Tuple[float, float]): Latitude and longitude of the graph center.
+            radius_m (int): Radius around the center point in meters.
+
+        Returns:
+            Tuple[Optional[nx.MultiDiGraph], CompactGraph]: The road network (None with the
+            binary cache enabled, see `_load_or_build`) and its compact form.
+        """
+        cache_file = self.cache_path(center_point, radius_m)
+        return self._load_or_build(cache_file, lambda: self._download_graph(center_point, radius_m, cache_file))
+
+    def load_tiles(self, tiles: FrozenSet[TileId]) -> Tuple[Optional[nx.MultiDiGraph], CompactGraph, str]:
+        """
+        Load the graph stitched from a set of tiles.
+
+        Stitched graphs are cached like radius downloads, so only the first
+        request for a tile set downloads or stitches anything, until one of its
+        tiles is written again.
+
+        Args:
+            tiles (FrozenSet[TileId]): Tiles the graph must contain.
+
+        Returns:
+            Tuple[Optional[nx.MultiDiGraph], CompactGraph, str]: The road network (None
+            with the binary cache enabled), its compact form and its cache file.
 
+        Raises:
+            ValueError: If tiling is disabled (`RouteConfig.tile_size_deg` is 0).
+        """
+        if self.tiles is None:
+            raise ValueError("Tiling is disabled; set RouteConfig.tile_size_deg")
+        if not self.tiles.offline:
+            # Fetch missing tiles first, so the graph is cached under the versions of the tiles it is built from
+            for tile in tiles:
+                if not self.tiles.has_tile(tile):
+                    self.tiles.load_tile(tile)
+        cache_file = self.stitched_path(tiles)
+
+        def build() -> nx.MultiDiGraph:
+            graph = self.tiles.stitch(tiles)
+            ox.save_graphml(graph, cache_file)
+            return graph
+
+        graph, compact = self._load_or_build(cache_file, build)
+        return graph, compact, cache_file
+
+    def _load_or_build(
+        self, cache_file: str, build: Callable[[], nx.MultiDiGraph]
+    ) -> Tuple[Optional[nx.MultiDiGraph], CompactGraph]:
+        """
+        Load a cached graph, preferring the binary copy, or build and cache it.
+
+        With the binary cache enabled only the compact form is returned: routing
+        needs nothing else, and a NetworkX copy would cost several times the
+        arrays' memory. `CompactGraph.to_networkx` rebuilds one on demand.
+
+        Args:
+            cache_file (str): GraphML cache file of the graph.
+            build (Callable[[], nx.MultiDiGraph]): Produces the graph (and writes
+                `cache_file`) when nothing usable is cached.
+
+        Returns:
+            Tuple[Optional[nx.MultiDiGraph], CompactGraph]: The road network (None with the
+            binary cache enabled) and its compact form.
+        """
+        binary_dir = self.binary_path(cache_file)
+        if self.config.binary_cache:
+            compact = CompactGraph.load(binary_dir)
+            if compact is not None:
+                logger.info(f"Loading graph from binary cache: {binary_dir}")
+                return None, compact
+
+        graph = None
         if os.path.exists(cache_file):
             logger.info(f"Loading graph from cache: {cache_file}")
             try:
                 graph = ox.load_graphml(cache_file)
             except Exception as e:
-                logger.error(f"Failed to load cached graph. Re-downloading. Error: {e}")
-                graph = self._download_graph(center_point, radius_m, cache_file)
-        else:
-            graph = self._download_graph(center_point, radius_m, cache_file)
+                logger.error(f"Failed to load cached graph. Rebuilding. Error: {e}")
+        if graph is None:
+            graph = build()
+
+        compact = CompactGraph.from_networkx(graph)
+        if self.config.binary_cache:
+            self._save_binary(compact, binary_dir)
+            return None, compact
+        return graph, compact
+
+    def graph_from_extract(self, path: str) -> nx.MultiDiGraph:
+        """
+        Build the simplified drive network of a local OSM extract.
+
+        Args:
+            path (str): `.osm`, `.osm.bz2`, `.osm.gz` or `.osm.pbf` file.
+
+        Returns:
+            nx.MultiDiGraph: Largest connected component of the drivable network,
+            simplified like a downloaded graph.
+        """
+        graph = OSMExtractReader(path).read()
+        return self._simplify(graph)
+
+    def ingest_extract(self, path: str) -> int:
+        """
+        Fill the tile cache from a local OSM extract in one pass.
+
+        Every tile intersecting the extract is written, including tiles without
+        roads, so later requests in the area never go to the network. Tiles cut
+        by the extract boundary only contain the part inside it.
+
+        Args:
+            path (str): `.osm`, `.osm.bz2`, `.osm.gz` or `.osm.pbf` file.
+
+        Returns:
+            int: Number of tiles written.
+
+        Raises:
+            ValueError: If tiling is disabled (`RouteConfig.tile_size_deg` is 0).
+        """
+        if self.tiles is None:
+            raise ValueError("Tiling is disabled; set RouteConfig.tile_size_deg")
+        reader = OSMExtractReader(path)
+        graph = reader.read()
+        if reader.bounds is None:
+            return 0
+
+        size = self.config.tile_size_deg
+        members: Dict[TileId, set] = {}
+        for node, data in graph.nodes(data=True):
+            members.setdefault((math.floor(data["x"] / size), math.floor(data["y"] / size)), set()).add(node)
 
+        count = 0
+        for tile in tiles_in(reader.bounds, size):
+            inside = members.get(tile, set())
+            # Keep the outside endpoint of border-crossing edges, like `truncate_by_edge`.
+            nodes = set(inside)
+            for node in inside:
+                nodes.update(graph.successors(node))
+                nodes.update(graph.predecessors(node))
+            tile_graph = graph.subgraph(nodes).copy()
+            tile_graph.remove_edges_from([(u, v, k) for u, v, k in tile_graph.edges(keys=True)
+                                          if u not in inside and v not in inside])
+            self.tiles.save_tile(tile, tile_graph)
+            count += 1
+        logger.info(f"Ingested {path} into {count} tiles")
+        return count
+
+    @staticmethod
+    def _simplify(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+        """Keep the largest weakly connected component and simplify, as `ox.graph_from_point` does."""
+        graph = ox.truncate.largest_component(graph)
+        graph = ox.simplify_graph(graph)
+        nx.set_node_attributes(graph, ox.stats.count_streets_per_node(graph), name="street_count")
         return graph
 
+    @staticmethod
+    def binary_path(cache_file: str) -> str:
+        """
+        Return the directory of the binary copy of a GraphML cache file.
+
+        Args:
+            cache_file (str): Path of the GraphML cache file.
+
+        Returns:
+            str: Path of the binary cache directory.
+        """
+        return GraphManager.artifact_path(cache_file, "bin")
+
+    @staticmethod
+    def _save_binary(compact: CompactGraph, binary_dir: str) -> None:
+        """Write the binary cache, logging instead of failing since GraphML remains available."""
+        try:
+            compact.save(binary_dir)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write binary graph cache: {e}")
+
     def _download_graph(self, center_point: Tuple[float, float], radius_m: int, cache_file: str) -> nx.MultiDiGraph:
         """
         Download the road network graph and save it to cache.
@@ -67,6 +293,8 @@ class GraphManager:
         Returns:
             nx.MultiDiGraph: The downloaded road network graph.
         """
+        if self.config.offline:
+            raise ValueError(f"Graph {cache_file} is not cached and downloads are disabled")
         logger.info(f"Downloading road network for {center_point} within radius {radius_m}m...")
         try:
             graph = ox.graph_from_point(center_point, dist=radius_m, network_type='drive', simplify=True)
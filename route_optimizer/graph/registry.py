@@ -0,0 +1,267 @@
+import sys
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+from .compact import CompactGraph
+from .tiles import TileId
+from ..utils.helpers import haversine_distance_m
+
+logger = logging.getLogger(__name__)
+
+# Rough per-element overhead of NetworkX's nested dicts, used for the memory budget.
+_NX_BYTES_PER_NODE = 600
+_NX_BYTES_PER_EDGE = 1200
+# A boxed float or int in a Python list, plus the list's pointer to it.
+_LIST_BYTES_PER_ITEM = 32
+# A node of SciPy's KD-tree.
+_KDTREE_BYTES_PER_NODE = 72
+_MB = 1024 * 1024
+
+
+def _nbytes(obj: Any, seen: set) -> int:
+    """
+    Estimate the memory held by derived data.
+
+    Counts NumPy arrays, sparse matrices, KD-trees and lists of numbers (the
+    search lists built from arrays), inside containers and object attributes.
+    Graphs are skipped, since `GraphEntry.size_bytes` counts them itself.
+    """
+    if obj is None or id(obj) in seen or isinstance(obj, (CompactGraph, nx.Graph, str, bytes, int, float)):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, cKDTree):
+        return obj.data.nbytes + obj.indices.nbytes + obj.size * _KDTREE_BYTES_PER_NODE
+    if sp.issparse(obj):
+        return sum(_nbytes(getattr(obj, name, None), seen) for name in ("data", "indices", "indptr", "row", "col"))
+    if isinstance(obj, list):
+        return sys.getsizeof(obj) + len(obj) * _LIST_BYTES_PER_ITEM
+    if isinstance(obj, (tuple, set, frozenset)):
+        return sum(_nbytes(item, seen) for item in obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(value, seen) for value in obj.values())
+    if hasattr(obj, "__dict__"):
+        return sum(_nbytes(value, seen) for value in vars(obj).values())
+    return 0
+
+
+@dataclass(frozen=True)
+class GraphEntry:
+    """
+    A loaded graph together with everything derived from it.
+
+    Entries are immutable handles: derived data is added by registering a copy
+    (`dataclasses.replace`) under the same key, so a request holding an entry
+    never sees its graph or artifacts change while it routes on them.
+
+    Attributes:
+        key (str): Cache file the graph was loaded from; identifies the entry.
+        graph (Optional[nx.MultiDiGraph]): The road network as NetworkX graph; None unless the
+            binary cache is disabled. Routing only uses `compact`.
+        compact (CompactGraph): Compact form of the road network.
+        center (Tuple[float, float]): Latitude and longitude of the covered disc's center.
+        radius_m (float): Radius of the covered disc in meters.
+        artifacts (Dict[str, Any]): Derived data (spatial index, landmarks, hierarchies, ...).
+        tiles (Optional[FrozenSet[TileId]]): Tiles the graph was stitched from, if any.
+    """
+    key: str
+    graph: Optional[nx.MultiDiGraph]
+    compact: CompactGraph
+    center: Tuple[float, float]
+    radius_m: float
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    tiles: Optional[FrozenSet[TileId]] = None
+
+    @property
+    def size_bytes(self) -> int:
+        """Estimated memory held by the entry's graphs, its derived data and the lists cached on the compact graph."""
+        c = self.compact
+        arrays = [c.node_ids, c.lat, c.lon, c.offsets, c.targets, c.edge_keys, *c.weights.values()]
+        if c.geometry_offsets is not None:
+            arrays += [c.geometry_offsets, c.geometry_lat, c.geometry_lon]
+        if c.edge_names is not None:
+            arrays.append(c.edge_names)
+        seen = {id(a) for a in arrays}
+        size = sum(a.nbytes for a in arrays) + _nbytes(c._cache, seen) + _nbytes(self.artifacts, seen)
+        size += sys.getsizeof(c.name_table) + sum(sys.getsizeof(name) for name in c.name_table)
+        if self.graph is not None:
+            size += c.num_nodes * _NX_BYTES_PER_NODE + c.num_edges * _NX_BYTES_PER_EDGE
+        return size
+
+    def covers(
+        self,
+        origin: Tuple[float, float],
+        dest: Tuple[float, float],
+        detour_factor: float,
+        margin_m: float,
+        tiles: Optional[FrozenSet[TileId]] = None,
+    ) -> bool:
+        """
+        Check whether the trip's search ellipse lies inside the covered area.
+
+        For a stitched graph and a trip with known corridor `tiles`, this is
+        tile containment. Otherwise the ellipse has the origin and destination as foci and contains every
+        point reachable with a detour of at most `detour_factor` times the direct
+        distance. It fits in the disc if the distance from the disc center to the
+        ellipse center plus its semi-major axis does not exceed the radius.
+
+        Args:
+            origin (Tuple[float, float]): Latitude and longitude of the start point.
+            dest (Tuple[float, float]): Latitude and longitude of the end point.
+            detour_factor (float): Longest detour considered, relative to the direct distance.
+            margin_m (float): Extra clearance from the graph boundary in meters.
+            tiles (Optional[FrozenSet[TileId]], optional): Tiles of the trip's corridor.
+
+        Returns:
+            bool: True if the graph can serve the trip.
+        """
+        if tiles is not None and self.tiles is not None:
+            return tiles <= self.tiles
+        direct = haversine_distance_m(*origin, *dest)
+        mid = ((origin[0] + dest[0]) / 2, (origin[1] + dest[1]) / 2)
+        semi_major = direct * detour_factor / 2 + margin_m
+        return haversine_distance_m(*self.center, *mid) + semi_major <= self.radius_m
+
+
+class GraphRegistry:
+    """
+    In-memory LRU registry of loaded graphs with a memory budget.
+
+    Entries are looked up either by exact cache key or by coverage of a trip,
+    so requests whose area lies inside an already loaded graph reuse it instead
+    of parsing or downloading a new one.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Initialize an empty registry.
+
+        Args:
+            max_bytes (int): Memory budget; least recently used entries are evicted beyond it.
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, GraphEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coverage_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, record: bool = True) -> Optional[GraphEntry]:
+        """
+        Return the entry for `key` and mark it as recently used.
+
+        Args:
+            key (str): Cache file path of the graph.
+            record (bool, optional): Count the lookup as a hit or miss. Defaults to True;
+                repeated lookups of one request pass False.
+
+        Returns:
+            Optional[GraphEntry]: The entry, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += record
+                return None
+            self._entries.move_to_end(key)
+            self.hits += record
+            return entry
+
+    def find_covering(
+        self,
+        origin: Tuple[float, float],
+        dest: Tuple[float, float],
+        detour_factor: float = 1.5,
+        margin_m: float = 500.0,
+        tiles: Optional[FrozenSet[TileId]] = None,
+        record: bool = True,
+    ) -> Optional[GraphEntry]:
+        """
+        Return the smallest loaded graph that covers a trip, marking it as recently used.
+
+        Args:
+            origin (Tuple[float, float]): Latitude and longitude of the start point.
+            dest (Tuple[float, float]): Latitude and longitude of the end point.
+            detour_factor (float, optional): Longest detour considered. Defaults to 1.5.
+            margin_m (float, optional): Clearance from the graph boundary. Defaults to 500.0.
+            tiles (Optional[FrozenSet[TileId]], optional): Tiles of the trip's corridor,
+                matched against stitched graphs.
+            record (bool, optional): Count the lookup as a hit or miss. Defaults to True.
+
+        Returns:
+            Optional[GraphEntry]: A covering entry, or None on a miss.
+        """
+        with self._lock:
+            covering = [e for e in self._entries.values() if e.covers(origin, dest, detour_factor, margin_m, tiles)]
+            if not covering:
+                self.misses += record
+                return None
+            entry = min(covering, key=lambda e: e.compact.num_nodes)
+            self._entries.move_to_end(entry.key)
+            self.coverage_hits += record
+            return entry
+
+    def add(self, entry: GraphEntry) -> None:
+        """
+        Register a newly loaded graph and evict least recently used entries over the budget.
+
+        The new entry itself is never evicted, even if it alone exceeds the budget.
+
+        Args:
+            entry (GraphEntry): Entry to add.
+        """
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > 1 and self._total_bytes() > self.max_bytes:
+                key, evicted = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted graph {key} ({evicted.size_bytes / _MB:.1f} MB) from registry")
+
+    def discard(self, key: str) -> None:
+        """
+        Drop an entry, e.g. one whose cache files were replaced.
+
+        Args:
+            key (str): Cache file path of the graph.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every loaded graph."""
+        with self._lock:
+            self._entries.clear()
+
+    def _total_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and memory usage.
+
+        Returns:
+            Dict[str, Any]: Registry statistics.
+        """
+        with self._lock:
+            lookups = self.hits + self.coverage_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._total_bytes() / _MB, 2),
+                "budget_mb": round(self.max_bytes / _MB, 2),
+                "hits": self.hits,
+                "coverage_hits": self.coverage_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.coverage_hits) / lookups, 3) if lookups else 0.0,
+            }
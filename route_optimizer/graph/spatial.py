@@ -0,0 +1,207 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .compact import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def _unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Map coordinates to points on the unit sphere.
+
+    The straight-line (chord) distance between two such points grows
+    monotonically with their great-circle distance, so a Euclidean KD-tree
+    over them returns geographically nearest neighbors without any projection.
+    """
+    phi = np.radians(lats)
+    lam = np.radians(lons)
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+@dataclass(frozen=True)
+class EdgeSnap:
+    """
+    A coordinate projected onto the nearest point of a road edge.
+
+    Attributes:
+        edge (int): Compact edge id.
+        tail (int): Compact id of the edge's start node.
+        head (int): Compact id of the edge's end node.
+        fraction (float): Position of the projected point along the edge (0 at tail, 1 at head).
+        lat (float): Latitude of the projected point.
+        lon (float): Longitude of the projected point.
+        distance_m (float): Distance from the original coordinate to the projected point.
+    """
+    edge: int
+    tail: int
+    head: int
+    fraction: float
+    lat: float
+    lon: float
+    distance_m: float
+
+
+class SpatialIndex:
+    """
+    KD-tree index over the nodes (and edge shapes) of a CompactGraph.
+
+    Built once per loaded graph and kept by the RouteOptimizer, so snapping a
+    coordinate costs a tree lookup instead of rebuilding a lookup structure
+    from the graph's node table on every request.
+    """
+
+    def __init__(self, compact: CompactGraph, sample_spacing_m: float = 25.0) -> None:
+        """
+        Build the node index and the edge sample index.
+
+        Args:
+            compact (CompactGraph): Graph to index.
+            sample_spacing_m (float, optional): Maximum spacing of the points sampled
+                along edge shapes for edge snapping. Defaults to 25.0.
+        """
+        self.compact = compact
+        self._node_tree = cKDTree(_unit_vectors(compact.lat, compact.lon))
+
+        # Edge shapes are split into segments; long segments are sampled every
+        # `sample_spacing_m` so a point near the middle of a long arterial still
+        # finds that arterial among its nearest samples.
+        if compact.geometry_offsets is not None:
+            offsets, lats, lons = compact.geometry_offsets, compact.geometry_lat, compact.geometry_lon
+        else:
+            tails = compact.edge_sources()
+            offsets = np.arange(0, 2 * compact.num_edges + 1, 2, dtype=np.int64)
+            lats = np.column_stack((compact.lat[tails], compact.lat[compact.targets])).ravel()
+            lons = np.column_stack((compact.lon[tails], compact.lon[compact.targets])).ravel()
+        point_edge = np.repeat(np.arange(compact.num_edges), np.diff(offsets))
+        is_start = np.ones(len(lats), dtype=bool)
+        is_start[offsets[1:] - 1] = False
+        seg_start = np.nonzero(is_start)[0]
+
+        self._seg_edge = point_edge[seg_start]
+        self._seg_lat0, self._seg_lon0 = lats[seg_start], lons[seg_start]
+        self._seg_lat1, self._seg_lon1 = lats[seg_start + 1], lons[seg_start + 1]
+        seg_len = self._planar_length(self._seg_lat0, self._seg_lon0, self._seg_lat1, self._seg_lon1)
+
+        # Distance along the edge at the start of each segment, for edge fractions.
+        edge_len = np.bincount(self._seg_edge, weights=seg_len, minlength=compact.num_edges)
+        cumulative = np.cumsum(seg_len) - seg_len
+        first_seg = np.searchsorted(self._seg_edge, np.arange(compact.num_edges))
+        self._seg_before = cumulative - cumulative[first_seg[self._seg_edge]]
+        self._seg_len = seg_len
+        self._edge_len = edge_len
+
+        samples = np.maximum(np.ceil(seg_len / sample_spacing_m).astype(np.int64), 1)
+        sample_seg = np.repeat(np.arange(len(seg_len)), samples)
+        sample_pos = (np.arange(len(sample_seg)) - np.repeat(np.cumsum(samples) - samples, samples) + 0.5) \
+            / np.repeat(samples, samples)
+        sample_lat = self._seg_lat0[sample_seg] + sample_pos * (self._seg_lat1[sample_seg] - self._seg_lat0[sample_seg])
+        sample_lon = self._seg_lon0[sample_seg] + sample_pos * (self._seg_lon1[sample_seg] - self._seg_lon0[sample_seg])
+        self._sample_seg = sample_seg
+        self._sample_tree = cKDTree(_unit_vectors(sample_lat, sample_lon))
+        logger.info(f"Spatial index built over {compact.num_nodes} nodes and {len(seg_len)} edge segments")
+
+    @staticmethod
+    def _planar_length(lat0: np.ndarray, lon0: np.ndarray, lat1: np.ndarray, lon1: np.ndarray) -> np.ndarray:
+        """Equirectangular segment length in meters; exact enough for road segments."""
+        mean_lat = np.radians((lat0 + lat1) / 2)
+        dx = np.radians(lon1 - lon0) * np.cos(mean_lat)
+        dy = np.radians(lat1 - lat0)
+        return EARTH_RADIUS_M * np.hypot(dx, dy)
+
+    def nearest_nodes(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """
+        Find the nearest node to each coordinate in one batched tree query.
+
+        Args:
+            lats (Sequence[float]): Latitudes of the query points.
+            lons (Sequence[float]): Longitudes of the query points.
+
+        Returns:
+            np.ndarray: Compact node id per query point.
+        """
+        _, idx = self._node_tree.query(_unit_vectors(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)))
+        return np.atleast_1d(idx)
+
+    def snap(self, coords: Sequence[Tuple[float, float]]) -> List[int]:
+        """
+        Snap many (lat, lon) coordinates to their nearest graph nodes.
+
+        Args:
+            coords (Sequence[Tuple[float, float]]): Query coordinates.
+
+        Returns:
+            List[int]: Original (OSM) node id per coordinate.
+        """
+        if len(coords) == 0:
+            return []
+        points = np.asarray(coords, dtype=np.float64)
+        return self.compact.to_node_ids(self.nearest_nodes(points[:, 0], points[:, 1]))
+
+    def snap_to_edges(self, coords: Sequence[Tuple[float, float]], candidates: int = 8) -> List[EdgeSnap]:
+        """
+        Project many (lat, lon) coordinates onto their nearest road edges.
+
+        The nearest edge samples are used to pick candidate segments, and each
+        coordinate is projected exactly onto those segments.
+
+        Args:
+            coords (Sequence[Tuple[float, float]]): Query coordinates.
+            candidates (int, optional): Edge samples examined per coordinate. Defaults to 8.
+
+        Returns:
+            List[EdgeSnap]: Projected point per coordinate.
+        """
+        if len(coords) == 0:
+            return []
+        points = np.asarray(coords, dtype=np.float64)
+        k = min(candidates, len(self._sample_seg))
+        _, idx = self._sample_tree.query(_unit_vectors(points[:, 0], points[:, 1]), k=k)
+        segs = self._sample_seg[np.asarray(idx).reshape(len(points), k)]
+
+        # Project each point onto its candidate segments in a local planar frame (meters).
+        lat0 = points[:, 0][:, None]
+        lon0 = points[:, 1][:, None]
+        scale = np.cos(np.radians(lat0))
+        ax = np.radians(self._seg_lon0[segs] - lon0) * scale
+        ay = np.radians(self._seg_lat0[segs] - lat0)
+        bx = np.radians(self._seg_lon1[segs] - lon0) * scale
+        by = np.radians(self._seg_lat1[segs] - lat0)
+        dx, dy = bx - ax, by - ay
+        denom = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(denom > 0, -(ax * dx + ay * dy) / denom, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        dist = EARTH_RADIUS_M * np.hypot(ax + t * dx, ay + t * dy)
+        best = np.argmin(dist, axis=1)
+
+        rows = np.arange(len(points))
+        seg = segs[rows, best]
+        t_best = t[rows, best]
+        edges = self._seg_edge[seg]
+        along = self._seg_before[seg] + t_best * self._seg_len[seg]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(self._edge_len[edges] > 0, along / self._edge_len[edges], 0.0)
+        snap_lat = self._seg_lat0[seg] + t_best * (self._seg_lat1[seg] - self._seg_lat0[seg])
+        snap_lon = self._seg_lon0[seg] + t_best * (self._seg_lon1[seg] - self._seg_lon0[seg])
+        tails = np.searchsorted(self.compact.offsets, edges, side="right") - 1
+
+        return [
+            EdgeSnap(edge, tail, head, frac, lat, lon, d)
+            for edge, tail, head, frac, lat, lon, d in zip(
+                edges.tolist(),
+                tails.tolist(),
+                self.compact.targets[edges].tolist(),
+                np.clip(fraction, 0.0, 1.0).tolist(),
+                snap_lat.tolist(),
+                snap_lon.tolist(),
+                dist[rows, best].tolist(),
+            )
+        ]
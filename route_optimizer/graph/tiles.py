@@ -0,0 +1,227 @@
+import os
+import math
+import hashlib
+import logging
+import threading
+from typing import FrozenSet, Iterable, Tuple
+
+import osmnx as ox
+import networkx as nx
+
+from ..utils.helpers import haversine_distance_m
+
+logger = logging.getLogger(__name__)
+
+# (column, row) of a tile in a grid of `tile_size_deg` x `tile_size_deg` cells.
+TileId = Tuple[int, int]
+
+METERS_PER_DEGREE_LAT = 111320.0
+
+# osmnx exceptions raised when a bounding box contains no drivable roads.
+_EMPTY_RESPONSE_ERRORS = ("InsufficientResponseError", "EmptyOverpassResponse")
+
+
+def tile_bbox(tile: TileId, tile_size_deg: float) -> Tuple[float, float, float, float]:
+    """
+    Return the bounding box of a tile.
+
+    Args:
+        tile (TileId): Tile column and row.
+        tile_size_deg (float): Tile edge length in degrees.
+
+    Returns:
+        Tuple[float, float, float, float]: (west, south, east, north), the order osmnx expects.
+    """
+    col, row = tile
+    return col * tile_size_deg, row * tile_size_deg, (col + 1) * tile_size_deg, (row + 1) * tile_size_deg
+
+
+def tiles_in(bounds: Tuple[float, float, float, float], tile_size_deg: float) -> Iterable[TileId]:
+    """
+    Yield every tile intersecting a bounding box.
+
+    Args:
+        bounds (Tuple[float, float, float, float]): (west, south, east, north).
+        tile_size_deg (float): Tile edge length in degrees.
+
+    Yields:
+        TileId: Tile column and row.
+    """
+    west, south, east, north = bounds
+    for col in range(math.floor(west / tile_size_deg), math.floor(east / tile_size_deg) + 1):
+        for row in range(math.floor(south / tile_size_deg), math.floor(north / tile_size_deg) + 1):
+            yield col, row
+
+
+def tiles_for_route(
+    origin: Tuple[float, float], dest: Tuple[float, float], tile_size_deg: float, detour_factor: float = 1.5, margin_m: float = 500.0
+) -> FrozenSet[TileId]:
+    """
+    Return the tiles a trip's corridor touches.
+
+    The corridor is the disc around the trip's midpoint whose radius is the
+    semi-major axis of the detour ellipse used for registry coverage, so a
+    graph stitched from these tiles covers the trip in the registry's sense.
+
+    Args:
+        origin (Tuple[float, float]): Latitude and longitude of the start point.
+        dest (Tuple[float, float]): Latitude and longitude of the end point.
+        tile_size_deg (float): Tile edge length in degrees.
+        detour_factor (float, optional): Longest detour considered. Defaults to 1.5.
+        margin_m (float, optional): Clearance around the corridor. Defaults to 500.0.
+
+    Returns:
+        FrozenSet[TileId]: Tiles intersecting the corridor.
+    """
+    mid_lat = (origin[0] + dest[0]) / 2
+    mid_lon = (origin[1] + dest[1]) / 2
+    radius = haversine_distance_m(*origin, *dest) * detour_factor / 2 + margin_m
+    dlat = radius / METERS_PER_DEGREE_LAT
+    dlon = radius / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(mid_lat)), 1e-6))
+
+    tiles = set()
+    for col in range(math.floor((mid_lon - dlon) / tile_size_deg), math.floor((mid_lon + dlon) / tile_size_deg) + 1):
+        for row in range(math.floor((mid_lat - dlat) / tile_size_deg), math.floor((mid_lat + dlat) / tile_size_deg) + 1):
+            west, south, east, north = tile_bbox((col, row), tile_size_deg)
+            # Closest point of the tile to the corridor center.
+            near_lat = min(max(mid_lat, south), north)
+            near_lon = min(max(mid_lon, west), east)
+            if haversine_distance_m(mid_lat, mid_lon, near_lat, near_lon) <= radius:
+                tiles.add((col, row))
+    return frozenset(tiles)
+
+
+class TileStore:
+    """
+    Disk cache of fixed-size road network tiles and the graphs stitched from them.
+
+    Tiles are stored unsimplified: simplifying each tile on its own would end
+    merged edges at tile borders differently on either side. Stitching composes
+    the raw tiles, which deduplicates the boundary nodes and edges both tiles
+    contain, and then simplifies the result once.
+
+    Attributes:
+        tile_dir (str): Directory holding the tile GraphML files.
+        tile_size_deg (float): Tile edge length in degrees.
+    """
+
+    def __init__(self, cache_dir: str, tile_size_deg: float, offline: bool = False) -> None:
+        """
+        Initialize the store and ensure the tile directory exists.
+
+        Args:
+            cache_dir (str): Graph cache directory; tiles go in its `tiles` subdirectory.
+            tile_size_deg (float): Tile edge length in degrees.
+            offline (bool, optional): Treat tiles missing from disk as empty instead
+                of downloading them. Defaults to False.
+        """
+        self.tile_size_deg = tile_size_deg
+        self.offline = offline
+        self.tile_dir = os.path.join(cache_dir, "tiles")
+        os.makedirs(self.tile_dir, exist_ok=True)
+
+    def tile_path(self, tile: TileId) -> str:
+        """Return the GraphML file of a tile."""
+        return os.path.join(self.tile_dir, f"tile_{self.tile_size_deg:g}_{tile[0]}_{tile[1]}.graphml")
+
+    def tile_version(self, tile: TileId) -> int:
+        """Return a version of a tile that changes whenever it is written (its file's mtime); 0 if not on disk."""
+        try:
+            return os.stat(self.tile_path(tile)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def stitched_name(self, tiles: Iterable[TileId]) -> str:
+        """
+        Return the cache file name of the graph stitched from `tiles`.
+
+        The name covers the tiles' versions, so rewriting a tile (e.g. ingesting
+        an extract over downloaded tiles) gives the graphs stitched from it new
+        cache files, and new binary copies and preprocessing artifacts with them.
+
+        Args:
+            tiles (Iterable[TileId]): Tiles of the graph.
+
+        Returns:
+            str: File name, unique per tile set, tile size and tile contents.
+        """
+        versions = sorted((tile, self.tile_version(tile)) for tile in tiles)
+        digest = hashlib.sha1(repr(versions).encode()).hexdigest()[:16]
+        return f"stitched_{self.tile_size_deg:g}_{digest}.graphml"
+
+    def has_tile(self, tile: TileId) -> bool:
+        """Return whether a tile is already on disk."""
+        return os.path.exists(self.tile_path(tile))
+
+    def load_tile(self, tile: TileId) -> nx.MultiDiGraph:
+        """
+        Load a tile from disk, downloading it on a miss.
+
+        Args:
+            tile (TileId): Tile to load.
+
+        Returns:
+            nx.MultiDiGraph: Unsimplified drivable network of the tile. Edges
+            crossing the border are kept with their outside node.
+        """
+        path = self.tile_path(tile)
+        if os.path.exists(path):
+            try:
+                return ox.load_graphml(path)
+            except Exception as e:
+                logger.error(f"Failed to load cached tile {path}. Re-downloading. Error: {e}")
+
+        if self.offline:
+            logger.warning(f"Tile {tile} is not cached and downloads are disabled; treating it as empty")
+            return nx.MultiDiGraph(crs="epsg:4326")
+
+        bbox = tile_bbox(tile, self.tile_size_deg)
+        logger.info(f"Downloading tile {tile} with bbox {bbox}...")
+        try:
+            graph = ox.graph_from_bbox(bbox, network_type='drive', simplify=False, retain_all=True, truncate_by_edge=True)
+        except Exception as e:
+            if type(e).__name__ not in _EMPTY_RESPONSE_ERRORS:
+                logger.error(f"Failed to download tile {tile}: {e}")
+                raise
+            logger.info(f"Tile {tile} has no drivable roads")
+            graph = nx.MultiDiGraph(crs="epsg:4326")
+        self.save_tile(tile, graph)
+        return graph
+
+    def save_tile(self, tile: TileId, graph: nx.MultiDiGraph) -> None:
+        """
+        Store a tile's unsimplified network, replacing any cached copy.
+
+        Args:
+            tile (TileId): Tile the graph belongs to.
+            graph (nx.MultiDiGraph): Nodes inside the tile plus the outside
+                endpoints of edges crossing its border.
+        """
+        path = self.tile_path(tile)
+        # Written under a private name and renamed, so concurrent loads of other graphs never read half a tile
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        ox.save_graphml(graph, tmp)
+        os.replace(tmp, path)
+
+    def stitch(self, tiles: Iterable[TileId]) -> nx.MultiDiGraph:
+        """
+        Combine tiles into one simplified road network.
+
+        Args:
+            tiles (Iterable[TileId]): Tiles to combine.
+
+        Returns:
+            nx.MultiDiGraph: Simplified network of the largest weakly connected
+            component, like the radius download produces.
+        """
+        tiles = sorted(tiles)
+        graph = nx.compose_all([self.load_tile(tile) for tile in tiles])
+        graph.graph.setdefault("crs", "epsg:4326")
+        graph.graph["simplified"] = False
+        if graph.number_of_nodes() == 0:
+            raise ValueError(f"No drivable roads in tiles {tiles}")
+        graph = ox.truncate.largest_component(graph)
+        graph = ox.simplify_graph(graph)
+        nx.set_node_attributes(graph, ox.stats.count_streets_per_node(graph), name="street_count")
+        logger.info(f"Stitched {len(tiles)} tiles into {graph.number_of_nodes()} nodes")
+        return graph
@@ -1,15 +1,45 @@
+import os
+import time
 import logging
-from typing import Tuple, Optional
+import threading
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, FrozenSet, Iterator, List, Sequence, Tuple, Optional
 
-import osmnx as ox
+import numpy as np
 import networkx as nx
 
 from .config.models import RouteConfig
 from .graph.manager import GraphManager
-from .core.pathfinder import AStarPathfinder, RouteResult
+from .graph.compact import CompactGraph
+from .graph.spatial import SpatialIndex
+from .graph.registry import GraphEntry, GraphRegistry
+from .graph.tiles import TileId, tiles_for_route
+from .core.pathfinder import AStarPathfinder, RouteResult, ROUTE_TYPE_WEIGHTS
+from .core.contraction import ContractionHierarchy
+from .core.search import CompactSearchEngine
+from .core.executor import GraphHandle, SearchExecutor, call_pathfinder
+from .core.landmarks import LandmarkTable
+from .core.result_cache import RouteResultCache
+from .core.matrix import many_to_many
+from .core.trips import Stop, TripPlanner
+from .geocoding.geocoder import Geocoder
+from .traffic.profiles import SpeedProfiles, time_bin
+from .utils.helpers import haversine_distance_m
 
 logger = logging.getLogger(__name__)
 
+# Average speeds in km/h for each vehicle type
+AVG_SPEEDS_KPH = {
+    "car": 40,
+    "bike": 25,
+    "bus": 30,
+    "truck": 25,
+    "auto": 35
+}
+
 
 class RouteOptimizer:
     """
@@ -27,71 +57,846 @@ class RouteOptimizer:
         """
         self.config: RouteConfig = config or RouteConfig()
         self.graph_manager: GraphManager = GraphManager(self.config)
-        self.graph: Optional[nx.MultiDiGraph] = None
+        self.registry: GraphRegistry = GraphRegistry(self.config.registry_max_mb * 1024 * 1024)
+        self.compact: Optional[CompactGraph] = None
+        self.graph_cache_file: Optional[str] = None
+        self.hierarchies: Dict[str, ContractionHierarchy] = {}
+        self.landmarks: Optional[LandmarkTable] = None
+        self.spatial_index: Optional[SpatialIndex] = None
+        self.speed_profiles: Optional[SpeedProfiles] = None
+        self._entry: Optional[GraphEntry] = None
+        # NetworkX copy of the current graph built by `graph`, with the compact graph it was built from
+        self._networkx: Optional[Tuple[CompactGraph, nx.MultiDiGraph]] = None
+        # One lock per graph key being loaded, so a slow load only blocks requests for the
+        # same graph; the list holds the lock and the number of threads using it.
+        self._load_locks: Dict[str, list] = {}
+        self._load_locks_guard = threading.Lock()
+        # Held while replacing derived data of a registered graph; searches never take it.
+        self._artifact_lock = threading.Lock()
+        self.geocoder: Geocoder = Geocoder(self.config)
+        self.result_cache: Optional[RouteResultCache] = None
+        if self.config.result_cache_mb > 0:
+            self.result_cache = RouteResultCache(self.config.result_cache_mb * 1024 * 1024, self.config.result_cache_ttl_s)
+        self.search_executor: Optional[SearchExecutor] = None
+        if self.config.search_workers > 0:
+            self.search_executor = SearchExecutor(self.config.search_workers, self.config.search_queue_size,
+                                                  self.config.search_timeout_s)
 
-    def load_graph(self, center_point: Tuple[float, float], radius_m: int) -> None:
+    def load_graph(self, center_point: Tuple[float, float], radius_m: int) -> GraphEntry:
         """
         Load or download a road network graph centered at `center_point` with the specified radius.
 
+        Graphs already held by the registry are reused together with their
+        spatial index, landmarks and hierarchies. The graph also becomes the
+        current graph used by calls that are not given a handle.
+
         Args:
             center_point (Tuple[float, float]): Latitude and longitude of the center point.
             radius_m (int): Radius around the center point in meters.
+
+        Returns:
+            GraphEntry: Immutable handle of the graph, to pass to `find_route` and friends.
         """
+        cache_file = self.graph_manager.cache_path(center_point, radius_m)
+        entry = self.registry.get(cache_file)
+        if entry is None:
+            with self._loading(cache_file):
+                return self._load_radius(center_point, radius_m, cache_file)
+        logger.info(f"Reusing loaded graph {cache_file}")
+        entry = self._refresh_profiles(entry)
+        self._activate(entry)
+        return entry
+
+    @contextmanager
+    def _loading(self, key: str) -> Iterator[None]:
+        """Hold the load lock of one graph key; loads of other graphs go on in parallel."""
+        with self._load_locks_guard:
+            slot = self._load_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._load_locks_guard:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._load_locks[key]
+
+    def _load_radius(self, center_point: Tuple[float, float], radius_m: float, cache_file: str) -> GraphEntry:
+        """Load a graph centered at `center_point`; called with the load lock of `cache_file` held."""
+        # Another request may have loaded it while this one waited for the lock.
+        entry = self.registry.get(cache_file, record=False)
+        if entry is not None:
+            logger.info(f"Reusing loaded graph {cache_file}")
+            self._activate(entry)
+            return entry
         logger.info(f"Loading graph centered at {center_point} with radius {radius_m} meters...")
-        self.graph = self.graph_manager.load_graph(center_point, radius_m)
+        graph, compact = self.graph_manager.load(center_point, radius_m)
+        return self._register(GraphEntry(cache_file, graph, compact, center_point, radius_m))
+
+    def load_graph_for_route(self, origin_coords: Tuple[float, float], dest_coords: Tuple[float, float]) -> GraphEntry:
+        """
+        Make a graph covering the trip from `origin_coords` to `dest_coords` current.
+
+        A loaded graph is reused when the trip's search area fits inside it, even
+        if it was loaded for a different trip. Otherwise the graph is stitched
+        from the tiles of the trip's corridor or, with tiling disabled, a graph
+        centered on the midpoint with a radius of 1.5 times the direct distance
+        (at least 3 km) is loaded.
+
+        Args:
+            origin_coords (Tuple[float, float]): Latitude and longitude of the start point.
+            dest_coords (Tuple[float, float]): Latitude and longitude of the end point.
+
+        Returns:
+            GraphEntry: Immutable handle of the covering graph. Concurrent requests should
+            route on this handle rather than on the current graph, which other loads replace.
+        """
+        detour, margin = self.config.coverage_detour_factor, self.config.coverage_margin_m
+        tiles = None
+        if self.graph_manager.tiles is not None:
+            tiles = tiles_for_route(origin_coords, dest_coords, self.config.tile_size_deg, detour, margin)
+        entry = self._find_covering(origin_coords, dest_coords, tiles)
+        if entry is None:
+            mid_point, graph_radius = self._covering_disc(origin_coords, dest_coords)
+            if tiles is not None:
+                key = self.graph_manager.stitched_path(tiles)
+            else:
+                key = self.graph_manager.cache_path(mid_point, graph_radius)
+            with self._loading(key):
+                entry = self._find_covering(origin_coords, dest_coords, tiles, record=False)
+                if entry is None:
+                    return self._load_covering(origin_coords, dest_coords, tiles, key)
+        logger.info(f"Reusing loaded graph {entry.key} covering the route")
+        entry = self._refresh_profiles(entry)
+        self._activate(entry)
+        return entry
+
+    def _find_covering(
+        self,
+        origin_coords: Tuple[float, float],
+        dest_coords: Tuple[float, float],
+        tiles: Optional[FrozenSet[TileId]],
+        record: bool = True,
+    ) -> Optional[GraphEntry]:
+        """Find a loaded graph covering a trip, dropping stitched graphs whose tiles were written since."""
+        detour, margin = self.config.coverage_detour_factor, self.config.coverage_margin_m
+        while True:
+            entry = self.registry.find_covering(origin_coords, dest_coords, detour, margin, tiles, record=record)
+            if entry is None or entry.tiles is None or entry.key == self.graph_manager.stitched_path(entry.tiles):
+                return entry
+            logger.info(f"Dropping graph {entry.key}: its tiles were written again")
+            self.registry.discard(entry.key)
+
+    def _load_covering(
+        self,
+        origin_coords: Tuple[float, float],
+        dest_coords: Tuple[float, float],
+        tiles: Optional[FrozenSet[TileId]],
+        key: str,
+    ) -> GraphEntry:
+        """Load a new graph covering a trip; called with the load lock of its cache file `key` held."""
+        mid_point, graph_radius = self._covering_disc(origin_coords, dest_coords)
+        if tiles is None:
+            return self._load_radius(mid_point, graph_radius, key)
+        logger.info(f"Loading graph stitched from {len(tiles)} tiles...")
+        graph, compact, cache_file = self.graph_manager.load_tiles(tiles)
+        detour, margin = self.config.coverage_detour_factor, self.config.coverage_margin_m
+        corridor_radius = haversine_distance_m(*origin_coords, *dest_coords) * detour / 2 + margin
+        return self._register(GraphEntry(cache_file, graph, compact, mid_point, corridor_radius, tiles=tiles))
+
+    @staticmethod
+    def _covering_disc(origin_coords: Tuple[float, float], dest_coords: Tuple[float, float]) -> Tuple[Tuple[float, float], int]:
+        """Return the midpoint of a trip and the radius of the graph loaded for it when tiling is disabled."""
+        direct_dist = haversine_distance_m(*origin_coords, *dest_coords)
+        mid_point = ((origin_coords[0] + dest_coords[0]) / 2, (origin_coords[1] + dest_coords[1]) / 2)
+        return mid_point, max(int(direct_dist * 1.5), 3000)
+
+    def load_graph_for_points(self, points: Sequence[Tuple[float, float]]) -> GraphEntry:
+        """
+        Make a graph covering every trip between `points` current.
+
+        The corridor of a trip between opposite corners of the points' bounding
+        box contains the whole box, so it is loaded like that trip.
+
+        Args:
+            points (Sequence[Tuple[float, float]]): Latitude and longitude of every point.
+
+        Returns:
+            GraphEntry: Immutable handle of the covering graph.
+        """
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        return self.load_graph_for_route((min(lats), min(lons)), (max(lats), max(lons)))
+
+    def _register(self, entry: GraphEntry) -> GraphEntry:
+        """Build the derived data of a newly loaded graph, add it to the registry and make it current."""
+        artifacts = {
+            "spatial_index": SpatialIndex(entry.compact),
+            "hierarchies": {},
+            "landmarks": None,
+            "speed_profiles": SpeedProfiles.load(GraphManager.artifact_path(entry.key, "speeds"), entry.compact),
+            "speed_profiles_mtime": self._profiles_mtime(entry.key),
+        }
+        if self.config.num_landmarks > 0:
+            artifacts["landmarks"] = self._landmarks_for(entry, self.config.num_landmarks)
+        for weight in self.config.contraction_weights:
+            artifacts["hierarchies"][weight] = self._hierarchy_for(entry, weight)
+        entry = replace(entry, artifacts=artifacts)
+        self.geocoder.add_graph(entry.compact)
+        self.registry.add(entry)
+        self._activate(entry)
+        return entry
+
+    def _refresh_profiles(self, entry: GraphEntry) -> GraphEntry:
+        """
+        Reload the speed profiles of a loaded graph if they were rebuilt on disk since.
+
+        The profiles ingestion runs as a separate command, so a registered graph
+        would otherwise keep routing (and keying cached results) on the old ones.
+        """
+        mtime = self._profiles_mtime(entry.key)
+        if mtime == entry.artifacts["speed_profiles_mtime"]:
+            return entry
+        with self._artifact_lock:
+            # Another request may have reloaded them already.
+            current = self.registry.get(entry.key, record=False) or entry
+            if current.artifacts["speed_profiles_mtime"] != mtime:
+                logger.info(f"Reloading rebuilt speed profiles of {entry.key}")
+                profiles = SpeedProfiles.load(GraphManager.artifact_path(entry.key, "speeds"), entry.compact)
+                current = replace(current, artifacts={**current.artifacts, "speed_profiles": profiles,
+                                                      "speed_profiles_mtime": mtime})
+                self.registry.add(current)
+            return current
+
+    @staticmethod
+    def _profiles_mtime(key: str) -> Optional[int]:
+        """Modification time of the saved speed profiles of the graph cached at `key`, or None if there are none."""
+        try:
+            return os.stat(os.path.join(GraphManager.artifact_path(key, "speeds"), "manifest.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _activate(self, entry: GraphEntry) -> None:
+        """Make a registry entry the graph used by calls that are not given a handle."""
+        self._entry = entry
+        self.compact = entry.compact
+        self.graph_cache_file = entry.key
+        self.spatial_index = entry.artifacts["spatial_index"]
+        self.hierarchies = entry.artifacts["hierarchies"]
+        self.landmarks = entry.artifacts["landmarks"]
+        self.speed_profiles = entry.artifacts["speed_profiles"]
+
+    @property
+    def graph(self) -> Optional[nx.MultiDiGraph]:
+        """
+        NetworkX form of the current graph, or None before a graph is loaded.
+
+        Graphs loaded from the binary cache keep only their compact form, so the
+        NetworkX copy is rebuilt on first access and kept while the graph is current.
+        """
+        entry = self._entry
+        if entry is None:
+            return None
+        if entry.graph is not None:
+            return entry.graph
+        cached = self._networkx
+        if cached is None or cached[0] is not entry.compact:
+            cached = (entry.compact, entry.compact.to_networkx())
+            self._networkx = cached
+        return cached[1]
+
+    def _update_artifacts(self, **artifacts: object) -> GraphEntry:
+        """
+        Replace derived data of the current graph.
+
+        Entries are never changed in place: a copy with the new data replaces
+        the entry in the registry, while requests holding the old handle keep a
+        consistent view of it. Dict-valued data (the hierarchies) is merged.
+        """
+        with self._artifact_lock:
+            # The registry may hold a newer copy than the current entry.
+            entry = self.registry.get(self._entry.key, record=False) or self._entry
+            merged = dict(entry.artifacts)
+            for name, value in artifacts.items():
+                merged[name] = {**merged[name], **value} if isinstance(value, dict) else value
+            entry = replace(entry, artifacts=merged)
+            self.registry.add(entry)
+            self._activate(entry)
+            return entry
+
+    def prepare_landmarks(self, num_landmarks: int = 8) -> LandmarkTable:
+        """
+        Load or build the ALT landmark tables of the current graph.
+
+        The tables are saved next to the GraphML cache file, so landmarks are only
+        selected once per cached graph.
+
+        Args:
+            num_landmarks (int, optional): Number of landmarks to select. Defaults to 8.
+
+        Returns:
+            LandmarkTable: The landmark tables for the current graph.
+        """
+        if self.compact is None:
+            raise ValueError("Graph not loaded. Call `load_graph()` first.")
+        landmarks = self._landmarks_for(self._entry, num_landmarks)
+        self._update_artifacts(landmarks=landmarks)
+        return landmarks
+
+    def _landmarks_for(self, entry: GraphEntry, num_landmarks: int) -> LandmarkTable:
+        """Load the saved landmark tables of `entry` or build and save them."""
+        landmark_file = GraphManager.artifact_path(entry.key, f"landmarks-{num_landmarks}.npz")
+        landmarks = LandmarkTable.load(landmark_file, entry.compact)
+        if landmarks is None:
+            landmarks = LandmarkTable.build(entry.compact, num_landmarks)
+            try:
+                landmarks.save(landmark_file)
+            except OSError as e:
+                logger.warning(f"Could not save landmark tables: {e}")
+        return landmarks
+
+    def prepare_contraction(self, weight: str = "length") -> ContractionHierarchy:
+        """
+        Load or build the contraction hierarchy of the current graph for `weight`.
+
+        The hierarchy is saved next to the GraphML cache file, so it is only built
+        once per cached graph. Subsequent `find_route` calls for this weight use it.
+
+        Args:
+            weight (str, optional): Edge weight to preprocess. Defaults to "length".
+
+        Returns:
+            ContractionHierarchy: The hierarchy for the current graph.
+        """
+        if self.compact is None:
+            raise ValueError("Graph not loaded. Call `load_graph()` first.")
+        hierarchy = self._hierarchy_for(self._entry, weight)
+        self._update_artifacts(hierarchies={weight: hierarchy})
+        return hierarchy
+
+    def _hierarchy_for(self, entry: GraphEntry, weight: str) -> ContractionHierarchy:
+        """Load the saved contraction hierarchy of `entry` for `weight` or build and save it."""
+        ch_file = GraphManager.artifact_path(entry.key, f"ch-{weight}.npz")
+        hierarchy = ContractionHierarchy.load(ch_file, entry.compact)
+        if hierarchy is None:
+            hierarchy = ContractionHierarchy.build(entry.compact, weight)
+            try:
+                hierarchy.save(ch_file)
+            except OSError as e:
+                logger.warning(f"Could not save contraction hierarchy: {e}")
+        return hierarchy
+
+    def snap_points(self, coords: Sequence[Tuple[float, float]], entry: Optional[GraphEntry] = None) -> List[int]:
+        """
+        Snap many (lat, lon) coordinates to their nearest graph nodes in one batch.
+
+        Args:
+            coords (Sequence[Tuple[float, float]]): Coordinates to snap.
+            entry (Optional[GraphEntry]): Graph handle from a `load_graph*` call. Defaults to the current graph.
+
+        Returns:
+            List[int]: OSM node id per coordinate.
+        """
+        return self._handle(entry).artifacts["spatial_index"].snap(coords)
+
+    def _handle(self, entry: Optional[GraphEntry]) -> GraphEntry:
+        """Return `entry`, or the current graph when None."""
+        entry = entry if entry is not None else self._entry
+        if entry is None:
+            raise ValueError("Graph not loaded. Call `load_graph()` first.")
+        return entry
+
+    def distance_matrix(
+        self,
+        sources: Sequence[Tuple[float, float]],
+        destinations: Optional[Sequence[Tuple[float, float]]] = None,
+        route_type: str = "shortest",
+        vehicle_type: str = "car",
+        entry: Optional[GraphEntry] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute route costs between every source and every destination.
+
+        All points are snapped in one batch; the matrix then comes from bucket
+        searches on the contraction hierarchy of the route type's weight if one
+        is loaded and the graph is large, otherwise from one-to-many searches
+        spread over `RouteConfig.matrix_workers` processes.
+
+        Args:
+            sources (Sequence[Tuple[float, float]]): Latitude and longitude of every start point.
+            destinations (Optional[Sequence[Tuple[float, float]]]): End points. Defaults to `sources`.
+            route_type (str): Type of route ('shortest', 'cost', 'fuel', 'green', 'traffic_free').
+            vehicle_type (str): Vehicle used for travel times.
+            entry (Optional[GraphEntry]): Graph handle from a `load_graph*` call. Defaults to the current graph.
+
+        Returns:
+            Dict[str, np.ndarray]: "costs", the ``len(sources) x len(destinations)`` matrix of
+            the route type's weight (meters for 'shortest'; inf where unreachable),
+            "durations_min", travel minutes at the vehicle's average speed (for
+            'shortest' only, None otherwise), and the snapped "source_nodes" and
+            "destination_nodes" (OSM node ids).
+
+        Raises:
+            ValueError: If no graph is loaded, the route type is unknown or there are too many points.
+        """
+        entry = self._handle(entry)
+        if route_type not in ROUTE_TYPE_WEIGHTS:
+            raise ValueError(f"Unknown route_type: {route_type}")
+        destinations = sources if destinations is None else destinations
+        self.check_matrix_points(len(sources), len(destinations), list(sources) + list(destinations))
+
+        weight = ROUTE_TYPE_WEIGHTS[route_type]
+        snapped = self.snap_points(list(sources) + list(destinations), entry)
+        compact_ids = [entry.compact.node_index(node) for node in snapped]
+        started = time.perf_counter()
+        costs, method = many_to_many(entry.compact, weight, compact_ids[:len(sources)], compact_ids[len(sources):],
+                                     hierarchy=entry.artifacts["hierarchies"].get(weight),
+                                     workers=self.config.matrix_workers or None)
+        logger.info(f"Computed {costs.shape[0]}x{costs.shape[1]} {weight} matrix with {method} "
+                    f"in {time.perf_counter() - started:.2f}s")
+        durations = None
+        if weight == "length":
+            durations = costs / 1000 / AVG_SPEEDS_KPH.get(vehicle_type, 40) * 60
+        return {
+            "costs": costs,
+            "durations_min": durations,
+            "source_nodes": np.asarray(snapped[:len(sources)]),
+            "destination_nodes": np.asarray(snapped[len(sources):]),
+        }
+
+    def check_matrix_points(
+        self, num_sources: int, num_destinations: int, points: Optional[Sequence[Tuple[float, float]]] = None
+    ) -> None:
+        """
+        Reject distance matrices too large to compute, before anything is geocoded or loaded.
+
+        Args:
+            num_sources (int): Number of start points.
+            num_destinations (int): Number of end points.
+            points (Optional[Sequence[Tuple[float, float]]]): Latitude and longitude of every point, once
+                resolved; their bounding box must fit `RouteConfig.matrix_max_extent_m`.
+
+        Raises:
+            ValueError: If there are too many points or they are too far apart.
+        """
+        if max(num_sources, num_destinations) > self.config.matrix_max_points:
+            raise ValueError(f"At most {self.config.matrix_max_points} sources and destinations are supported")
+        if points:
+            lats = [p[0] for p in points]
+            lons = [p[1] for p in points]
+            extent = haversine_distance_m(min(lats), min(lons), max(lats), max(lons))
+            if extent > self.config.matrix_max_extent_m:
+                raise ValueError(f"Points span {extent / 1000:.1f} km; at most "
+                                 f"{self.config.matrix_max_extent_m / 1000:g} km is supported")
+
+    def plan_trip(
+        self,
+        depot: Tuple[float, float],
+        stops: Sequence[Stop],
+        capacities: Optional[Sequence[float]] = None,
+        route_type: str = "shortest",
+        vehicle_type: str = "car",
+        start_min: float = 0.0,
+        return_to_depot: bool = True,
+        time_budget_s: float = 2.0,
+        entry: Optional[GraphEntry] = None,
+    ) -> dict:
+        """
+        Plan the order in which one or more vehicles visit many stops.
+
+        The cost matrix between the depot and all stops comes from
+        `distance_matrix`; `TripPlanner` then orders the stops within
+        `time_budget_s`, and every leg of the result is routed on the graph. Load
+        a graph covering all points first, e.g. with `load_graph_for_points`.
+
+        Args:
+            depot (Tuple[float, float]): Latitude and longitude where every vehicle starts.
+            stops (Sequence[Stop]): Stops to visit, optionally with demands and time windows.
+            capacities (Optional[Sequence[float]]): Capacity of every vehicle. Defaults to one
+                vehicle without a limit.
+            route_type (str): Type of route ('shortest', 'cost', 'fuel', 'green', 'traffic_free').
+            vehicle_type (str): Vehicle used for travel times.
+            start_min (float): Departure time from the depot, on the clock of the time windows.
+            return_to_depot (bool): Whether vehicles return to the depot.
+            time_budget_s (float): Time allowed for optimizing the stop order.
+            entry (Optional[GraphEntry]): Graph handle from a `load_graph*` call. Defaults to the current graph.
+
+        Returns:
+            dict: "routes" (per vehicle: stop order, arrival times, legs and the
+            concatenated path), "unassigned" stop indices and "total_cost".
+
+        Raises:
+            ValueError: If no graph is loaded or some stops cannot reach each other.
+        """
+        entry = self._handle(entry)
+        points = [depot] + [(stop.lat, stop.lon) for stop in stops]
+        matrix = self.distance_matrix(points, route_type=route_type, vehicle_type=vehicle_type, entry=entry)
+        durations = matrix["durations_min"]
+        if durations is None:
+            durations = self.distance_matrix(points, vehicle_type=vehicle_type, entry=entry)["durations_min"]
+        planner = TripPlanner(matrix["costs"], durations, stops, capacities, start_min, return_to_depot)
+        plan = planner.solve(time_budget_s)
+
+        nodes = matrix["source_nodes"].tolist()
+        pathfinder = AStarPathfinder(entry.graph, enable_logging=False, show_progress=False, compact=entry.compact,
+                                     hierarchies=entry.artifacts["hierarchies"], landmarks=entry.artifacts["landmarks"],
+                                     search_mode=self.config.search_mode)
+        finders = {
+            "shortest": pathfinder.find_shortest_path,
+            "cost": pathfinder.find_cost_efficient_path,
+            "fuel": pathfinder.find_fuel_efficient_path,
+            "green": pathfinder.find_green_path,
+            "traffic_free": pathfinder.find_traffic_free_path,
+        }
+        routes = []
+        for route in plan.routes:
+            # Matrix index of every visited point: 0 is the depot, i + 1 is stop i
+            order = [0] + [i + 1 for i in route.stops] + ([0] if return_to_depot else [])
+            legs, path = [], []
+            for a, b in zip(order, order[1:]):
+                leg = finders[route_type](nodes[a], nodes[b])
+                legs.append({
+                    "from": a - 1,
+                    "to": b - 1,
+                    "distance_m": leg.distance_m,
+                    "path": leg.path,
+                })
+                path.extend(leg.path if not path else leg.path[1:])
+            routes.append({
+                "vehicle": route.vehicle,
+                "stops": route.stops,
+                "arrivals_min": [round(t, 2) for t in route.arrivals_min],
+                "end_min": round(route.end_min, 2),
+                "load": route.load,
+                "cost": route.cost,
+                "legs": legs,
+                "path": path,
+            })
+        return {"routes": routes, "unassigned": plan.unassigned, "total_cost": plan.cost}
 
     def find_route(
-        self, origin_coords: Tuple[float, float], dest_coords: Tuple[float, float], route_type: str = "shortest", time_of_day: int = 17, vehicle_type: str = "car"
+        self, origin_coords: Tuple[float, float], dest_coords: Tuple[float, float], route_type: str = "shortest", time_of_day: int = 17, vehicle_type: str = "car",
+        search_mode: Optional[str] = None, weekday: Optional[int] = None, entry: Optional[GraphEntry] = None
     ) -> dict:
         """
         Find a route of the specified type and predict traffic/time.
 
+        Results are cached per graph version, snapped endpoints, route profile
+        and traffic data version, whatever the search mode; a cached result has
+        "cached" set to True and "nodes_settled" set to 0, as it ran no search.
+
+        When the graph has historical speed profiles (see `route_optimizer.traffic.profiles`),
+        travel times, congestion and the best hour come from them, timing each
+        edge when the trip reaches it, and 'traffic_free' routes are the fastest
+        routes for the departure hour, found by a time-dependent search that also
+        answers every other hour. Without profiles the `TrafficPredictor` stub is used.
+
         Args:
             origin_coords (Tuple[float, float]): Latitude and longitude of the start point.
             dest_coords (Tuple[float, float]): Latitude and longitude of the end point.
             route_type (str): Type of route ('shortest', 'cost', 'fuel', 'green', 'traffic_free').
             time_of_day (int): Hour of day (0-23) for traffic prediction.
+            search_mode (Optional[str]): 'astar' or 'bidirectional'. Defaults to `RouteConfig.search_mode`.
+            weekday (Optional[int]): Day of the week (Monday is 0) for speed profiles. Defaults to today.
+            entry (Optional[GraphEntry]): Graph handle returned by `load_graph_for_route` or another
+                `load_graph*` call. Defaults to the current graph, which concurrent loads may replace.
 
         Returns:
             dict: Route details, traffic prediction, and best time info.
         """
-        if self.graph is None:
-            raise ValueError("Graph not loaded. Call `load_graph()` first.")
+        entry = self._handle(entry)
+        if route_type not in ROUTE_TYPE_WEIGHTS:
+            raise ValueError(f"Unknown route_type: {route_type}")
 
-        start_node = ox.distance.nearest_nodes(self.graph, origin_coords[1], origin_coords[0])
-        end_node = ox.distance.nearest_nodes(self.graph, dest_coords[1], dest_coords[0])
-        logger.info(f"Nearest nodes: Start={start_node}, End={end_node}")
-
-        pathfinder = AStarPathfinder(self.graph, enable_logging=True, show_progress=True)
-        if route_type == "shortest":
-            result = pathfinder.find_shortest_path(start_node, end_node)
-        elif route_type == "cost":
-            result = pathfinder.find_cost_efficient_path(start_node, end_node)
-        elif route_type == "fuel":
-            result = pathfinder.find_fuel_efficient_path(start_node, end_node)
-        elif route_type == "green":
-            result = pathfinder.find_green_path(start_node, end_node)
-        elif route_type == "traffic_free":
-            result = pathfinder.find_traffic_free_path(start_node, end_node)
+        return self._route_on(entry, origin_coords, dest_coords, route_type, time_of_day, vehicle_type,
+                              search_mode, weekday)
+
+    def find_routes(self, requests: Sequence[dict], workers: Optional[int] = None) -> Iterator[Tuple[int, dict]]:
+        """
+        Find many routes, sharing graphs and searches between them.
+
+        Requests are grouped by the loaded graph that covers them, loading
+        graphs as needed. Within a graph the endpoints are snapped in one
+        batch, and requests leaving from the same node with the same route
+        type are answered by a single one-to-many search instead of one
+        search each. Graph groups are routed concurrently and results are
+        yielded as soon as their group is done, so they arrive out of order.
+
+        Args:
+            requests (Sequence[dict]): Route requests with "origin_coords" and "dest_coords"
+                ((lat, lon) pairs) and optionally "route_type", "time_of_day",
+                "vehicle_type" and "weekday", with the defaults of `find_route`.
+            workers (Optional[int]): Graph groups routed at once. Defaults to `RouteConfig.batch_workers`.
+
+        Yields:
+            Tuple[int, dict]: Index of the request and either {"route": ..., "compact": ...}
+            with the result `find_route` would give and the compact graph its path's node
+            ids belong to, or {"error": ...} if that request failed.
+        """
+        groups: Dict[str, Tuple[GraphEntry, List[int]]] = {}
+        for i, request in enumerate(requests):
+            try:
+                origin, dest = tuple(request["origin_coords"]), tuple(request["dest_coords"])
+                if request.get("route_type", "shortest") not in ROUTE_TYPE_WEIGHTS:
+                    raise ValueError(f"Unknown route_type: {request['route_type']}")
+                entry = self.load_graph_for_route(origin, dest)
+            except Exception as e:
+                logger.warning(f"Batch route {i} failed: {e}")
+                yield i, {"error": str(e)}
+                continue
+            groups.setdefault(entry.key, (entry, []))[1].append(i)
+
+        workers = max(1, min(workers or self.config.batch_workers, len(groups)))
+        logger.info(f"Routing {sum(len(g[1]) for g in groups.values())} batch routes on {len(groups)} graphs")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._route_group, entry, requests, indices) for entry, indices in groups.values()]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def _route_group(self, entry: GraphEntry, requests: Sequence[dict], indices: List[int]) -> List[Tuple[int, dict]]:
+        """Route the requests of a batch that share a graph; failures are returned per request."""
+        results: List[Tuple[int, dict]] = []
+        profiles = entry.artifacts["speed_profiles"]
+        shared = []
+        for i in indices:
+            request = requests[i]
+            # Edge snaps and time-dependent routes need searches of their own.
+            if self.config.snap_to_edges or (profiles is not None and request.get("route_type") == "traffic_free"):
+                results.append(self._route_guarded(i, lambda r=request: self._route_on(
+                    entry, r["origin_coords"], r["dest_coords"], **self._route_options(r))))
+            else:
+                shared.append(i)
+        if not shared:
+            return results
+
+        nodes = entry.artifacts["spatial_index"].snap(
+            [c for i in shared for c in (requests[i]["origin_coords"], requests[i]["dest_coords"])])
+        by_source: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
+        for k, i in enumerate(shared):
+            weight = ROUTE_TYPE_WEIGHTS[requests[i].get("route_type", "shortest")]
+            by_source.setdefault((nodes[2 * k], weight), []).append((i, nodes[2 * k + 1]))
+
+        engine = CompactSearchEngine(entry.compact)
+        for (start_node, weight), members in by_source.items():
+            pending = []
+            for i, end_node in members:
+                options = self._route_options(requests[i])
+                cached = self._cached_route(entry, (start_node, end_node), options)
+                if cached is not None:
+                    results.append((i, {"route": cached}))
+                else:
+                    pending.append((i, end_node, options))
+            if len(pending) == 1:
+                i, end_node, options = pending[0]
+                results.append(self._route_guarded(i, lambda: self._route_on(
+                    entry, None, None, nodes=(start_node, end_node), **options)))
+            elif pending:
+                results.extend(self._route_from(entry, engine, start_node, weight, pending))
+        for _, outcome in results:
+            if "route" in outcome:
+                outcome["compact"] = entry.compact
+        return results
+
+    def _route_from(
+        self, entry: GraphEntry, engine: CompactSearchEngine, start_node: int, weight: str, pending: List[Tuple[int, int, dict]]
+    ) -> List[Tuple[int, dict]]:
+        """Answer several requests from one start node with a single one-to-many search."""
+        started = time.perf_counter()
+        source = entry.compact.node_index(start_node)
+        found = engine.one_to_many(source, [entry.compact.node_index(end) for _, end, _ in pending], weight)
+        share = (time.perf_counter() - started) / len(pending)
+        results = []
+        for i, end_node, options in pending:
+            def finish(end_node=end_node, options=options) -> dict:
+                result = found.get(entry.compact.node_index(end_node))
+                if result is None:
+                    raise nx.NetworkXNoPath(f"No path found between {start_node} and {end_node}")
+                route_result = RouteResult(entry.compact.to_node_ids(result.path), result.cost, result.settled)
+                route = self._finish_route(entry, route_result, None, **options)
+                if self.result_cache is not None:
+                    self.result_cache.put(self._cache_key(entry, (start_node, end_node), **options), route, share)
+                return route
+            results.append(self._route_guarded(i, finish))
+        return results
+
+    @staticmethod
+    def _route_options(request: dict) -> dict:
+        """Keyword arguments of `_route_on` given by a batch request, with `find_route`'s defaults."""
+        return {
+            "route_type": request.get("route_type", "shortest"),
+            "time_of_day": request.get("time_of_day", 17),
+            "vehicle_type": request.get("vehicle_type", "car"),
+            "weekday": request.get("weekday"),
+        }
+
+    @staticmethod
+    def _route_guarded(index: int, route: Callable[[], dict]) -> Tuple[int, dict]:
+        """Run one batch route, turning its failure into an error result."""
+        try:
+            return index, {"route": route()}
+        except Exception as e:
+            logger.warning(f"Batch route {index} failed: {e}")
+            return index, {"error": str(e)}
+
+    def _cache_key(self, entry: GraphEntry, endpoints: tuple, route_type: str, time_of_day: int, vehicle_type: str,
+                   weekday: Optional[int]) -> tuple:
+        """Result cache key of a route on `entry` between snapped `endpoints`."""
+        from route_optimizer.traffic.predictor import TrafficPredictor
+        profiles = entry.artifacts["speed_profiles"]
+        traffic_version = profiles.version if profiles is not None else TrafficPredictor.version
+        if weekday is None:
+            weekday = date.today().weekday()
+        return (entry.compact.fingerprint(), *endpoints, route_type, vehicle_type, time_of_day,
+                weekday if profiles is not None else None, traffic_version)
+
+    def _cached_route(self, entry: GraphEntry, endpoints: tuple, options: dict) -> Optional[dict]:
+        """Return the cached result for a route, marked as cached, or None."""
+        if self.result_cache is None:
+            return None
+        cached = self.result_cache.get(self._cache_key(entry, endpoints, **options))
+        if cached is not None:
+            logger.info(f"Route served from cache: {endpoints}")
+            # Shared between search modes, so the settled count of the search that found it would mislead
+            cached["cached"] = True
+            cached["nodes_settled"] = 0
+        return cached
+
+    def _route_on(
+        self, entry: GraphEntry, origin_coords: Optional[Tuple[float, float]], dest_coords: Optional[Tuple[float, float]],
+        route_type: str = "shortest", time_of_day: int = 17, vehicle_type: str = "car", search_mode: Optional[str] = None,
+        weekday: Optional[int] = None, nodes: Optional[Tuple[int, int]] = None
+    ) -> dict:
+        """Snap, search and describe one route on the graph of `entry`; `nodes` skips node snapping."""
+        spatial_index = entry.artifacts["spatial_index"]
+        snaps = None
+        if nodes is None and self.config.snap_to_edges:
+            origin_snap, dest_snap = spatial_index.snap_to_edges([origin_coords, dest_coords])
+            # Two points on the same road segment are routed between its nodes instead.
+            if {origin_snap.tail, origin_snap.head} != {dest_snap.tail, dest_snap.head}:
+                snaps = (origin_snap, dest_snap)
+
+        if snaps is not None:
+            endpoints = tuple((snap.edge, round(snap.fraction, 4)) for snap in snaps)
         else:
-            raise ValueError(f"Unknown route_type: {route_type}")
+            start_node, end_node = nodes if nodes is not None else spatial_index.snap([origin_coords, dest_coords])
+            endpoints = (start_node, end_node)
+
+        if weekday is None:
+            weekday = date.today().weekday()
+        options = {"route_type": route_type, "time_of_day": time_of_day, "vehicle_type": vehicle_type, "weekday": weekday}
+        cached = self._cached_route(entry, endpoints, options)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+
+        profiles = entry.artifacts["speed_profiles"]
+        speed = AVG_SPEEDS_KPH.get(vehicle_type, 40)
+        hourly_times = None
+
+        search = self._searcher(entry)
+        if snaps is not None:
+            logger.info(f"Snapped to edges: Start={snaps[0]}, End={snaps[1]}")
+            if route_type == "traffic_free" and profiles is not None:
+                routes = search("find_time_dependent_snapped_paths", snaps[0], snaps[1], self._departures(weekday), speed)
+                result = routes[time_of_day % 24]
+                hourly_times = np.array([r.travel_time_min for r in routes])
+            else:
+                result = search("find_snapped_path", snaps[0], snaps[1], ROUTE_TYPE_WEIGHTS[route_type], search_mode)
+        else:
+            logger.info(f"Nearest nodes: Start={start_node}, End={end_node}")
+            if route_type == "shortest":
+                result = search("find_shortest_path", start_node, end_node, search_mode)
+            elif route_type == "cost":
+                result = search("find_cost_efficient_path", start_node, end_node, search_mode)
+            elif route_type == "fuel":
+                result = search("find_fuel_efficient_path", start_node, end_node, search_mode)
+            elif route_type == "green":
+                result = search("find_green_path", start_node, end_node, search_mode)
+            elif profiles is not None:
+                # Fastest route for every departure hour in one search; the requested hour's is returned
+                routes = search("find_time_dependent_paths", start_node, end_node, self._departures(weekday), speed)
+                result = routes[time_of_day % 24]
+                hourly_times = np.array([r.travel_time_min for r in routes])
+            else:
+                result = search("find_traffic_free_path", start_node, end_node, search_mode)
+
+        route = self._finish_route(entry, result, snaps, route_type, time_of_day, vehicle_type, weekday, hourly_times)
+        if self.result_cache is not None:
+            self.result_cache.put(self._cache_key(entry, endpoints, **options), route, time.perf_counter() - started)
+        return route
+
+    def _searcher(self, entry: GraphEntry) -> Callable[..., object]:
+        """
+        Return a function running an `AStarPathfinder` search method on the graph of `entry`.
+
+        With `RouteConfig.search_workers` set, searches go to the worker processes
+        whenever the graph has a binary cache for them to map; otherwise they run
+        in the calling thread.
+        """
+        handle = self._graph_handle(entry) if self.search_executor is not None else None
+        if handle is not None:
+            return lambda method, *args: self.search_executor.run(handle, method, *args)
+        pathfinder = AStarPathfinder(entry.graph, enable_logging=True, show_progress=True, compact=entry.compact,
+                                     hierarchies=entry.artifacts["hierarchies"], landmarks=entry.artifacts["landmarks"],
+                                     search_mode=self.config.search_mode)
+        profiles = entry.artifacts["speed_profiles"]
+        return lambda method, *args: call_pathfinder(pathfinder, profiles, method, args)
+
+    def _graph_handle(self, entry: GraphEntry) -> Optional[GraphHandle]:
+        """Describe the saved files of `entry` for worker processes, or None if it has no binary cache."""
+        binary_dir = GraphManager.binary_path(entry.key)
+        if not os.path.isdir(binary_dir):
+            return None
+        hierarchy_files = tuple(GraphManager.artifact_path(entry.key, f"ch-{weight}.npz")
+                                for weight in entry.artifacts["hierarchies"])
+        landmarks, profiles = entry.artifacts["landmarks"], entry.artifacts["speed_profiles"]
+        return GraphHandle(
+            binary_dir=binary_dir,
+            fingerprint=entry.compact.fingerprint(),
+            hierarchy_files=hierarchy_files,
+            landmark_file=(GraphManager.artifact_path(entry.key, f"landmarks-{len(landmarks.landmarks)}.npz")
+                           if landmarks is not None else None),
+            profiles_dir=GraphManager.artifact_path(entry.key, "speeds") if profiles is not None else None,
+            profiles_version=profiles.version if profiles is not None else None,
+            search_mode=self.config.search_mode,
+        )
+
+    @staticmethod
+    def _departures(weekday: int) -> np.ndarray:
+        """Departure at the top of every hour of `weekday`, in minutes since Monday 00:00."""
+        return weekday * 24 * 60 + 60.0 * np.arange(24)
 
-        # Traffic prediction
+    def _finish_route(
+        self, entry: GraphEntry, result: RouteResult, snaps: Optional[tuple], route_type: str, time_of_day: int,
+        vehicle_type: str, weekday: Optional[int], hourly_times: Optional[np.ndarray] = None
+    ) -> dict:
+        """Add travel times, traffic and the best hour to a found path and build the route dict."""
         from route_optimizer.traffic.predictor import TrafficPredictor
-        traffic_model = TrafficPredictor()
-        traffic = traffic_model.predict_traffic(result.path, time_of_day)
-        # Average speeds in km/h for each vehicle type
-        avg_speeds = {
-            "car": 40,
-            "bike": 25,
-            "bus": 30,
-            "truck": 25,
-            "auto": 35
-        }
-        speed = avg_speeds.get(vehicle_type, 40)
+        compact, profiles = entry.compact, entry.artifacts["speed_profiles"]
+        if weekday is None:
+            weekday = date.today().weekday()
+        speed = AVG_SPEEDS_KPH.get(vehicle_type, 40)
+
         base_time = result.distance_m / 1000 / speed * 60  # time in min
-        travel_time = traffic_model.estimate_travel_time(result.path, base_time, traffic)
-        best_hour, best_time = traffic_model.best_time_for_route(result.path, base_time)
+        if profiles is not None:
+            # Historical speed per edge, timed when the trip reaches it; the vehicle's
+            # average speed where there is no data
+            edges = compact.path_edges([compact.node_index(node) for node in result.path])
+            if hourly_times is None:
+                hourly_times = profiles.path_travel_times(edges, compact.weights["length"][edges],
+                                                          self._departures(weekday), speed)
+            traffic = profiles.congestion(edges, time_bin(weekday, time_of_day % 24 * 60)).tolist()
+            travel_time = float(hourly_times[time_of_day % 24])
+            best_hour = int(np.argmin(hourly_times))
+            best_time = float(hourly_times[best_hour])
+        else:
+            # Traffic prediction: one congestion matrix serves the hour asked for and the best hour
+            traffic_model = TrafficPredictor()
+            congestion = traffic_model.congestion_matrix(result.path)
+            traffic = traffic_model.predict_traffic(result.path, time_of_day, congestion)
+            travel_time = traffic_model.estimate_travel_time(result.path, base_time, traffic)
+            best_hour, best_time = traffic_model.best_time_for_route(result.path, base_time, congestion)
 
         return {
             "path": result.path,
@@ -99,5 +904,9 @@ class RouteOptimizer:
             "traffic": traffic,
             "estimated_time_min": round(travel_time, 2),
             "best_hour": best_hour,
-            "best_time_min": round(best_time, 2)
+            "best_time_min": round(best_time, 2),
+            "nodes_settled": result.nodes_settled,
+            "origin_snap": (snaps[0].lat, snaps[0].lon) if snaps else None,
+            "dest_snap": (snaps[1].lat, snaps[1].lon) if snaps else None,
+            "cached": False
         }
@@ -1,26 +1,74 @@
-import random
-from typing import List, Tuple
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HOURS = 24
+
 
 class TrafficPredictor:
     """
     Stub for traffic prediction. Replace with real ML model for production.
+
+    Predictions are deterministic per path and use a local generator, so the
+    predictor holds no shared state and is safe to use from any thread.
     """
-    def predict_traffic(self, path: List[int], time_of_day: int) -> List[float]:
-        # Returns a list of traffic congestion values (0-1) for each segment
-        # Deterministic: seed with route and time_of_day
-        # Use a stable seed: combine node IDs and time_of_day into a string
-        seed_str = ','.join(str(n) for n in path) + f'-{time_of_day}'
-        seed = sum(ord(c) for c in seed_str)
-        random.seed(seed)
-        base = 0.2 + 0.6 * (abs(time_of_day - 17) / 24)  # peak at 5pm
-        return [min(1.0, base + random.uniform(-0.1, 0.1)) for _ in path]
-
-    def estimate_travel_time(self, path: List[int], base_time: float, traffic: List[float]) -> float:
+    # Identifies the traffic data behind predictions; part of route cache keys,
+    # so bump it whenever the model or its data changes.
+    version = "stub-2"
+
+    def congestion_matrix(self, path: Sequence[int]) -> np.ndarray:
+        """
+        Predict the congestion (0-1) of every segment of a path for every hour of the day.
+
+        Args:
+            path (Sequence[int]): Node ids of the route.
+
+        Returns:
+            np.ndarray: Array of shape (24, len(path)); row h holds the congestion at hour h.
+        """
+        # Stable seed from the node ids, independent of Python's hash randomization
+        seed = zlib.crc32(np.asarray(path, dtype=np.int64).tobytes())
+        noise = np.random.default_rng(seed).uniform(-0.1, 0.1, size=(HOURS, len(path)))
+        base = 0.2 + 0.6 * (np.abs(np.arange(HOURS) - 17) / 24)  # peak at 5pm
+        return np.minimum(1.0, base[:, None] + noise)
+
+    def predict_traffic(self, path: List[int], time_of_day: int,
+                        congestion: Optional[np.ndarray] = None) -> List[float]:
+        # Returns a list of traffic congestion values (0-1) for each segment;
+        # pass a precomputed congestion_matrix to skip recomputing it
+        if congestion is None:
+            congestion = self.congestion_matrix(path)
+        return congestion[time_of_day % HOURS].tolist()
+
+    def travel_time_profile(self, path: List[int], base_time: float,
+                            congestion: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Estimate the travel time of a path for every hour of the day.
+
+        Args:
+            path (List[int]): Node ids of the route.
+            base_time (float): Travel time without congestion.
+            congestion (Optional[np.ndarray], optional): Precomputed `congestion_matrix` of the path.
+
+        Returns:
+            np.ndarray: Travel time per hour, shape (24,).
+        """
+        if congestion is None:
+            congestion = self.congestion_matrix(path)
+        if congestion.shape[1] == 0:
+            return np.full(HOURS, float(base_time))
+        return base_time * (1 + congestion.mean(axis=1))
+
+    def estimate_travel_time(self, path: List[int], base_time: float, traffic: Sequence[float]) -> float:
         # Increase travel time based on congestion
-        return base_time * (1 + sum(traffic) / len(traffic))
+        if len(traffic) == 0:
+            return float(base_time)
+        return float(base_time * (1 + np.mean(traffic)))
 
-    def best_time_for_route(self, path: List[int], base_time: float) -> Tuple[int, float]:
-        # Simulate best time of day (hour) for least traffic
-        best_hour = min(range(24), key=lambda h: self.estimate_travel_time(path, base_time, self.predict_traffic(path, h)))
-        best_time = self.estimate_travel_time(path, base_time, self.predict_traffic(path, best_hour))
-        return best_hour, best_time
+    def best_time_for_route(self, path: List[int], base_time: float,
+                            congestion: Optional[np.ndarray] = None) -> Tuple[int, float]:
+        # Best time of day (hour) for least traffic
+        times = self.travel_time_profile(path, base_time, congestion)
+        best_hour = int(np.argmin(times))
+        return best_hour, float(times[best_hour])
@@ -0,0 +1,384 @@
+import csv
+import json
+import logging
+import os
+import shutil
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..graph.compact import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+BIN_MINUTES = 15
+BINS_PER_DAY = 24 * 60 // BIN_MINUTES
+DAYS_PER_WEEK = 7
+BINS_PER_WEEK = DAYS_PER_WEEK * BINS_PER_DAY
+
+# Version of the on-disk layout written by `SpeedProfiles.save`.
+PROFILE_FORMAT_VERSION = 1
+
+# Speeds are stored as whole km/h in one byte each; 0 means "no data".
+MAX_SPEED_KPH = 255
+
+# Edges aggregated per pass in `SpeedProfiles.build`, bounding its temporary arrays.
+_BUILD_CHUNK_EDGES = 2048
+
+
+def time_bin(weekday: int, minute_of_day: float) -> int:
+    """
+    Return the profile bin of a weekday and time.
+
+    Args:
+        weekday (int): Day of the week, Monday is 0.
+        minute_of_day (float): Minutes since midnight.
+
+    Returns:
+        int: Column of `SpeedProfiles.speeds`.
+    """
+    return weekday % DAYS_PER_WEEK * BINS_PER_DAY + int(minute_of_day // BIN_MINUTES) % BINS_PER_DAY
+
+
+class SpeedProfiles:
+    """
+    Historical speed of every edge of a graph per weekday and 15-minute bin.
+
+    The speeds form one ``num_edges x 672`` byte array indexed by compact edge
+    id and `time_bin`, saved next to the graph's cache file and memory-mapped
+    on load, so a lookup is a single array access and only the rows a route
+    touches are ever read from disk.
+
+    Attributes:
+        speeds (np.ndarray): uint8 km/h per edge and bin; 0 where the edge has no data at all.
+        fingerprint (str): `CompactGraph.fingerprint` of the graph the edge ids refer to.
+        version (str): Identifies the observations behind the profiles; part of route cache keys.
+    """
+
+    def __init__(self, speeds: np.ndarray, fingerprint: str, version: str) -> None:
+        self.speeds = speeds
+        self.fingerprint = fingerprint
+        self.version = version
+        self._max_speed: Optional[float] = None
+
+    @classmethod
+    def build(cls, compact: CompactGraph, edges: np.ndarray, bins: np.ndarray, speeds: np.ndarray) -> "SpeedProfiles":
+        """
+        Aggregate speed observations into profiles.
+
+        Each bin gets the mean of its observations. Bins without any fall back
+        to the edge's mean at that time of day over all weekdays, then to the
+        edge's overall mean.
+
+        Args:
+            compact (CompactGraph): Graph the edge ids refer to.
+            edges (np.ndarray): Compact edge id of every observation.
+            bins (np.ndarray): `time_bin` of every observation.
+            speeds (np.ndarray): Observed speed in km/h.
+
+        Returns:
+            SpeedProfiles: The profiles.
+        """
+        order = np.argsort(edges, kind="stable")
+        edges, bins, speeds = edges[order], bins[order], speeds[order]
+        table = np.zeros((compact.num_edges, BINS_PER_WEEK), dtype=np.uint8)
+
+        for start in range(0, compact.num_edges, _BUILD_CHUNK_EDGES):
+            n = min(_BUILD_CHUNK_EDGES, compact.num_edges - start)
+            lo, hi = np.searchsorted(edges, [start, start + n])
+            if lo == hi:
+                continue
+            flat = (edges[lo:hi] - start) * BINS_PER_WEEK + bins[lo:hi]
+            sums = np.bincount(flat, weights=speeds[lo:hi], minlength=n * BINS_PER_WEEK).reshape(n, DAYS_PER_WEEK, BINS_PER_DAY)
+            counts = np.bincount(flat, minlength=n * BINS_PER_WEEK).reshape(n, DAYS_PER_WEEK, BINS_PER_DAY)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = sums / counts
+                time_of_day = sums.sum(axis=1) / counts.sum(axis=1)
+                overall = sums.sum(axis=(1, 2)) / counts.sum(axis=(1, 2))
+            mean = np.where(np.isnan(mean), time_of_day[:, None, :], mean)
+            mean = np.where(np.isnan(mean), overall[:, None, None], mean)
+            known = ~np.isnan(mean)
+            values = np.clip(np.rint(np.nan_to_num(mean)), 1, MAX_SPEED_KPH)
+            table[start:start + n] = np.where(known, values, 0).reshape(n, BINS_PER_WEEK)
+
+        covered = int(np.count_nonzero(table[:, 0]))
+        logger.info(f"Built speed profiles from {len(speeds)} observations covering {covered} of {compact.num_edges} edges")
+        return cls(table, compact.fingerprint(), f"profiles-{int(time.time())}")
+
+    def save(self, directory: str) -> None:
+        """
+        Save the profiles as a ``.npy`` array plus a JSON manifest.
+
+        Args:
+            directory (str): Destination directory (conventionally next to the GraphML cache file).
+        """
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            np.save(os.path.join(tmp_dir, "speeds.npy"), np.ascontiguousarray(self.speeds))
+            manifest = {
+                "format": PROFILE_FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "version": self.version,
+                "bin_minutes": BIN_MINUTES,
+            }
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.replace(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info(f"Speed profiles saved to {directory}")
+
+    @classmethod
+    def load(cls, directory: str, compact: CompactGraph, mmap: bool = True) -> Optional["SpeedProfiles"]:
+        """
+        Load saved profiles if they exist and still match `compact`.
+
+        Args:
+            directory (str): Directory written by `save`.
+            compact (CompactGraph): Graph the profiles are expected to belong to.
+            mmap (bool, optional): Memory-map the array instead of reading it. Defaults to True.
+
+        Returns:
+            Optional[SpeedProfiles]: The profiles, or None if missing, stale or of another format.
+        """
+        manifest_file = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_file):
+            return None
+        try:
+            with open(manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") != PROFILE_FORMAT_VERSION or manifest.get("bin_minutes") != BIN_MINUTES:
+                logger.info(f"Ignoring speed profiles with unsupported format: {directory}")
+                return None
+            if manifest["fingerprint"] != compact.fingerprint():
+                logger.info(f"Ignoring stale speed profiles: {directory}")
+                return None
+            speeds = np.load(os.path.join(directory, "speeds.npy"), mmap_mode="r" if mmap else None)
+        except Exception as e:
+            logger.error(f"Failed to load speed profiles {directory}: {e}")
+            return None
+        if speeds.shape != (compact.num_edges, BINS_PER_WEEK):
+            logger.info(f"Ignoring speed profiles of unexpected shape {speeds.shape}: {directory}")
+            return None
+        return cls(speeds, manifest["fingerprint"], manifest["version"])
+
+    def speed(self, edge: int, bin_index: int) -> Optional[float]:
+        """
+        Return the historical speed of an edge in a bin.
+
+        Args:
+            edge (int): Compact edge id.
+            bin_index (int): `time_bin` to look up.
+
+        Returns:
+            Optional[float]: Speed in km/h, or None if the edge has no data.
+        """
+        value = int(self.speeds[edge, bin_index])
+        return float(value) if value else None
+
+    def edge_speeds(self, edges: np.ndarray, bin_index: int, fallback_kph: float) -> np.ndarray:
+        """
+        Return the speeds of many edges in one bin.
+
+        Args:
+            edges (np.ndarray): Compact edge ids.
+            bin_index (int): `time_bin` to look up.
+            fallback_kph (float): Speed used for edges without data.
+
+        Returns:
+            np.ndarray: Speed in km/h per edge.
+        """
+        speeds = self.speeds[edges, bin_index].astype(np.float64)
+        speeds[speeds == 0] = fallback_kph
+        return speeds
+
+    def congestion(self, edges: np.ndarray, bin_index: int) -> np.ndarray:
+        """
+        Return how congested edges are in a bin, relative to their fastest bin of the week.
+
+        Args:
+            edges (np.ndarray): Compact edge ids.
+            bin_index (int): `time_bin` to look up.
+
+        Returns:
+            np.ndarray: Congestion between 0 (free flow) and 1 per edge; 0 for edges without data.
+        """
+        rows = np.asarray(self.speeds[edges], dtype=np.float64)
+        free_flow = rows.max(axis=1) if len(rows) else np.zeros(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            congestion = 1.0 - rows[:, bin_index] / free_flow
+        return np.nan_to_num(congestion)
+
+    @property
+    def max_speed(self) -> float:
+        """Fastest speed in the profiles in km/h, used to bound remaining travel times."""
+        if self._max_speed is None:
+            self._max_speed = float(np.max(self.speeds)) if self.speeds.size else 0.0
+        return self._max_speed
+
+    def edge_travel_time(self, edge: int, length_m: float, minutes: np.ndarray, fallback_kph: float) -> np.ndarray:
+        """
+        Return the time to traverse an edge when entering it at given times.
+
+        Travel times are interpolated linearly between the centers of adjacent
+        bins, so they change continuously over the week. Entering an edge later
+        then never means leaving it earlier (the FIFO property time-dependent
+        searches rely on) as long as its travel time changes by less than a bin
+        length between neighbouring bins.
+
+        Args:
+            edge (int): Compact edge id.
+            length_m (float): Edge length in meters.
+            minutes (np.ndarray): Entry times in minutes since Monday 00:00.
+            fallback_kph (float): Speed used if the edge has no data.
+
+        Returns:
+            np.ndarray: Travel time in minutes per entry time.
+        """
+        row = self.speeds[edge]
+        if row[0] == 0:
+            return np.full(np.shape(minutes), length_m * 0.06 / fallback_kph)
+        position = np.asarray(minutes, dtype=np.float64) / BIN_MINUTES - 0.5
+        lower = np.floor(position)
+        fraction = position - lower
+        first = lower.astype(np.int64) % BINS_PER_WEEK
+        second = (first + 1) % BINS_PER_WEEK
+        return length_m * 0.06 * ((1.0 - fraction) / row[first] + fraction / row[second])
+
+    def path_travel_times(self, edges: np.ndarray, lengths_m: np.ndarray, departures: np.ndarray,
+                          fallback_kph: float) -> np.ndarray:
+        """
+        Time a fixed path for several departure times at once.
+
+        Each edge is timed at the moment the trip actually reaches it.
+
+        Args:
+            edges (np.ndarray): Compact edge ids along the path.
+            lengths_m (np.ndarray): Length of each edge in meters.
+            departures (np.ndarray): Departure times in minutes since Monday 00:00.
+            fallback_kph (float): Speed used for edges without data.
+
+        Returns:
+            np.ndarray: Travel time in minutes per departure time.
+        """
+        departures = np.asarray(departures, dtype=np.float64)
+        now = departures.copy()
+        for edge, length in zip(np.asarray(edges).tolist(), np.asarray(lengths_m).tolist()):
+            now += self.edge_travel_time(edge, length, now, fallback_kph)
+        return now - departures
+
+
+def _edge_lookup(compact: CompactGraph) -> Tuple[Dict[Tuple[int, int, int], int], Dict[Tuple[int, int], int]]:
+    """Map (u, v, key) and (u, v) of OSM node ids to compact edge ids; (u, v) picks the shortest parallel edge."""
+    tails = compact.node_ids[compact.edge_sources()].tolist()
+    heads = compact.node_ids[compact.targets].tolist()
+    keys = compact.edge_keys.tolist()
+    lengths = compact.weights["length"].tolist()
+    by_key: Dict[Tuple[int, int, int], int] = {}
+    by_pair: Dict[Tuple[int, int], int] = {}
+    for edge, (u, v, k) in enumerate(zip(tails, heads, keys)):
+        by_key[(u, v, k)] = edge
+        best = by_pair.get((u, v))
+        if best is None or lengths[edge] < lengths[best]:
+            by_pair[(u, v)] = edge
+    return by_key, by_pair
+
+
+def _rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of a CSV or Parquet file as dicts."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet observations requires the 'pyarrow' package") from e
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def _row_bin(row: Dict[str, Any]) -> int:
+    """Return the `time_bin` of an observation from its timestamp or weekday/hour/minute columns."""
+    stamp = row.get("timestamp")
+    if stamp not in (None, ""):
+        if isinstance(stamp, datetime):
+            moment = stamp
+        else:
+            try:
+                moment = datetime.fromtimestamp(float(stamp), tz=timezone.utc)
+            except ValueError:
+                moment = datetime.fromisoformat(str(stamp).replace("Z", "+00:00"))
+        return time_bin(moment.weekday(), moment.hour * 60 + moment.minute)
+    return time_bin(int(row["weekday"]), int(row["hour"]) * 60 + float(row.get("minute") or 0))
+
+
+def read_observations(path: str, compact: CompactGraph) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Read speed observations and map them to the edges of a graph.
+
+    The file is a CSV or Parquet table with columns ``u``, ``v`` (OSM node ids
+    of the edge), optionally ``key``, ``speed_kph`` and either ``timestamp``
+    (ISO 8601, local time; Unix seconds are read as UTC) or ``weekday``
+    (Monday is 0), ``hour`` and optionally ``minute``. Rows for edges that are
+    not in the graph are skipped.
+
+    Args:
+        path (str): Observation file.
+        compact (CompactGraph): Graph to map the observations to.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Edge id, `time_bin` and speed of every kept observation.
+
+    Raises:
+        ImportError: If a Parquet file is given and `pyarrow` is not installed.
+    """
+    by_key, by_pair = _edge_lookup(compact)
+    edges, bins, speeds = array("q"), array("h"), array("d")
+    skipped = 0
+    for row in _rows(path):
+        u, v = int(row["u"]), int(row["v"])
+        key = row.get("key")
+        edge = by_key.get((u, v, int(key))) if key not in (None, "") else by_pair.get((u, v))
+        speed = float(row["speed_kph"])
+        if edge is None or not speed > 0:
+            skipped += 1
+            continue
+        edges.append(edge)
+        bins.append(_row_bin(row))
+        speeds.append(speed)
+    logger.info(f"Read {len(speeds)} observations from {path} ({skipped} skipped)")
+    return (np.frombuffer(edges, dtype=np.int64), np.frombuffer(bins, dtype=np.int16).astype(np.int64),
+            np.frombuffer(speeds, dtype=np.float64))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point: build the speed profiles of a cached graph."""
+    import argparse
+    from ..graph.manager import GraphManager
+
+    parser = argparse.ArgumentParser(description="Build per-edge speed profiles of a cached graph from historical observations.")
+    parser.add_argument("observations", help="CSV or Parquet file of speed observations")
+    parser.add_argument("--graph", required=True, help="GraphML cache file of the graph (its binary copy is used if present)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    compact = CompactGraph.load(GraphManager.binary_path(args.graph))
+    if compact is None:
+        import osmnx as ox
+        compact = CompactGraph.from_networkx(ox.load_graphml(args.graph))
+    profiles = SpeedProfiles.build(compact, *read_observations(args.observations, compact))
+    directory = GraphManager.artifact_path(args.graph, "speeds")
+    profiles.save(directory)
+    print(f"Wrote speed profiles to {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import math
 import networkx as nx
-from typing import Tuple
+import numpy as np
+from typing import Tuple, Union
 
 def haversine_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     R = 6371000.0
@@ -11,5 +12,14 @@ def haversine_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) ->
          math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2)
     return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
+def haversine_distance_m_array(lats: np.ndarray, lons: np.ndarray, lat: Union[float, np.ndarray], lon: Union[float, np.ndarray]) -> np.ndarray:
+    # Vectorized haversine from every (lats[i], lons[i]) to a single point, or pairwise to (lat[i], lon[i])
+    R = 6371000.0
+    phi1, phi2 = np.radians(lats), np.radians(lat)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon) - np.radians(lons)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
 def get_node_coords(graph: nx.MultiDiGraph, node: int) -> Tuple[float, float]:
     return (graph.nodes[node]['y'], graph.nodes[node]['x'])
@@ -0,0 +1,77 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Decimal places kept by default: 1e-5 degrees is about 1.1 m.
+DEFAULT_PRECISION = 5
+
+# Longest chunk sequence of a 64-bit value (5 bits per chunk).
+_MAX_CHUNKS = 13
+
+
+def encode_polyline(lats: Sequence[float], lons: Sequence[float], precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Encode coordinates in Google's Encoded Polyline Algorithm Format.
+
+    Each coordinate is stored as the rounded difference to the previous one,
+    zigzag-encoded and split into 5-bit chunks written as printable ASCII, so a
+    road path costs a few bytes per point instead of two JSON floats.
+
+    Args:
+        lats (Sequence[float]): Latitudes of the points, in order.
+        lons (Sequence[float]): Longitudes of the points.
+        precision (int, optional): Decimal places kept. Defaults to 5.
+
+    Returns:
+        str: The encoded polyline; empty for no points.
+    """
+    factor = 10 ** precision
+    points = np.round(np.column_stack([lats, lons]) * factor).astype(np.int64)
+    if not len(points):
+        return ""
+    # Latitude and longitude deltas interleaved, then zigzag-encoded (negative values inverted)
+    deltas = np.diff(points, axis=0, prepend=0).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)
+
+    shifts = 5 * np.arange(_MAX_CHUNKS)
+    rest = values[:, None] >> shifts
+    chunks = rest & 0x1F
+    more = (rest >> 5) > 0
+    # A value has one chunk plus one for every non-empty higher group of 5 bits
+    used = np.concatenate([np.ones((len(values), 1), dtype=bool), more[:, :-1]], axis=1)
+    chars = (chunks | np.where(more, 0x20, 0)) + 63
+    return chars[used].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(encoded: str, precision: int = DEFAULT_PRECISION) -> List[Tuple[float, float]]:
+    """
+    Decode a polyline written by `encode_polyline`.
+
+    Args:
+        encoded (str): The encoded polyline.
+        precision (int, optional): Decimal places it was encoded with. Defaults to 5.
+
+    Returns:
+        List[Tuple[float, float]]: Latitude and longitude of every point.
+
+    Raises:
+        ValueError: If `encoded` is not a valid polyline.
+    """
+    if not encoded:
+        return []
+    try:
+        chars = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    except UnicodeEncodeError:
+        raise ValueError("Polyline contains non-ASCII characters")
+    if (chars < 0).any() or chars[-1] & 0x20:
+        raise ValueError("Invalid polyline")
+
+    last = (chars & 0x20) == 0
+    starts = np.r_[0, np.flatnonzero(last)[:-1] + 1]
+    if len(starts) % 2:
+        raise ValueError("Polyline has an odd number of values")
+    position = np.arange(len(chars)) - np.repeat(starts, np.diff(np.r_[starts, len(chars)]))
+    values = np.add.reduceat((chars & 0x1F) << (5 * position), starts)
+    deltas = (values >> 1) ^ -(values & 1)
+    points = np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+    return [(float(lat), float(lon)) for lat, lon in points]
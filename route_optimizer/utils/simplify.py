@@ -0,0 +1,94 @@
+from typing import Sequence
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Ground meters per pixel at zoom 0 on the equator for 256-pixel web-mercator tiles.
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+
+def tolerance_for_zoom(zoom: float, lat: float, pixels: float = 1.0) -> float:
+    """
+    Return the ground distance covered by `pixels` screen pixels at a web map zoom level.
+
+    Args:
+        zoom (float): Web-mercator zoom level (0 shows the whole world in one tile).
+        lat (float): Latitude the map shows, since the scale shrinks away from the equator.
+        pixels (float, optional): Number of pixels. Defaults to 1.0.
+
+    Returns:
+        float: Tolerance in meters; deviations below it are invisible at that zoom.
+    """
+    return pixels * METERS_PER_PIXEL_Z0 * np.cos(np.radians(lat)) / 2 ** zoom
+
+
+def significance(lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """
+    Rank every vertex of a line by the Douglas-Peucker tolerance at which it disappears.
+
+    Douglas-Peucker keeps the point farthest from the chord of a run if it lies
+    more than the tolerance away and recurses on both halves. The distance a
+    point is kept at, capped by the value of the point that split its parent
+    run, is the largest tolerance that keeps it. So one pass ranks all points
+    and `simplify` with any tolerance keeps exactly the points Douglas-Peucker
+    would, giving every resolution level of the line at once. All runs of a
+    recursion level are processed together with array operations.
+
+    Args:
+        lats (Sequence[float]): Latitudes of the line's vertices.
+        lons (Sequence[float]): Longitudes of the vertices.
+
+    Returns:
+        np.ndarray: Tolerance in meters per vertex; inf for the two end points.
+    """
+    lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+    n = len(lats)
+    ranks = np.full(n, np.inf)
+    if n <= 2:
+        return ranks
+    # Local equirectangular projection, accurate to well under a pixel over a route's extent
+    x = np.radians(lons) * np.cos(np.radians(lats.mean())) * EARTH_RADIUS_M
+    y = np.radians(lats) * EARTH_RADIUS_M
+
+    starts, ends, caps = np.array([0]), np.array([n - 1]), np.array([np.inf])
+    while len(starts):
+        counts = ends - starts - 1
+        offsets = np.cumsum(counts) - counts
+        run = np.repeat(np.arange(len(starts)), counts)
+        points = np.arange(counts.sum()) - offsets[run] + starts[run] + 1
+
+        # Distance from every interior point to the chord of its run, clamped to the chord's ends
+        ax, ay = x[starts[run]], y[starts[run]]
+        dx, dy = x[ends[run]] - ax, y[ends[run]] - ay
+        norm = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.clip(np.where(norm > 0, ((x[points] - ax) * dx + (y[points] - ay) * dy) / norm, 0.0), 0.0, 1.0)
+        dist = np.hypot(x[points] - ax - t * dx, y[points] - ay - t * dy)
+
+        # Farthest point of every run (the first one on ties)
+        farthest = np.maximum.reduceat(dist, offsets)
+        candidates = np.flatnonzero(dist == farthest[run])
+        _, first = np.unique(run[candidates], return_index=True)
+        split = points[candidates[first]]
+        value = np.minimum(farthest, caps)
+        ranks[split] = value
+
+        starts, ends, caps = np.r_[starts, split], np.r_[split, ends], np.r_[value, value]
+        keep = ends - starts > 1
+        starts, ends, caps = starts[keep], ends[keep], caps[keep]
+    return ranks
+
+
+def simplify(ranks: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """
+    Select the vertices Douglas-Peucker keeps at a tolerance.
+
+    Args:
+        ranks (np.ndarray): Output of `significance`.
+        tolerance_m (float): Largest deviation in meters allowed between the line and its simplification.
+
+    Returns:
+        np.ndarray: Indices of the kept vertices, in order.
+    """
+    return np.flatnonzero(ranks > tolerance_m)
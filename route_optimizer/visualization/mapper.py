@@ -5,17 +5,27 @@ import tempfile
 import webbrowser
 import networkx as nx
 from ..core.pathfinder import RouteResult
+from ..utils.simplify import significance, simplify, tolerance_for_zoom
 
 logger = logging.getLogger(__name__)
 
+# Zoom the map opens at, and how many levels one can zoom in before simplification becomes visible
+MAP_ZOOM = 14
+DETAIL_ZOOM_LEVELS = 2
+
 class RouteVisualizer(object):
     @staticmethod
-    def create_and_show_map(graph, result, origin_coords, dest_coords):
+    def create_and_show_map(compact, result, origin_coords, dest_coords):
         logger.info("Generating map...")
-        route_coords = [(graph.nodes[n]['y'], graph.nodes[n]['x']) for n in result.path]
-        mid_lat = sum(lat for lat, lon in route_coords) / len(route_coords)
-        mid_lon = sum(lon for lat, lon in route_coords) / len(route_coords)
-        route_map = folium.Map(location=(mid_lat, mid_lon), zoom_start=14, tiles='OpenStreetMap')
+        lats, lons = compact.path_coords(result.path)
+        mid_lat = sum(lats) / len(lats)
+        mid_lon = sum(lons) / len(lons)
+        route_map = folium.Map(location=(mid_lat, mid_lon), zoom_start=MAP_ZOOM, tiles='OpenStreetMap')
+
+        # Drop the points that are not visible until well past the opening zoom
+        keep = simplify(significance(lats, lons), tolerance_for_zoom(MAP_ZOOM + DETAIL_ZOOM_LEVELS, mid_lat))
+        route_coords = [(lats[i], lons[i]) for i in keep]
+        logger.info("Drawing {} of {} path points".format(len(route_coords), len(lats)))
 
         folium.PolyLine(
             locations=route_coords,
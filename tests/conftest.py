@@ -0,0 +1,52 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES, CompactGraph
+from route_optimizer.utils.helpers import haversine_distance_m
+
+
+def road_graph(n=120, seed=0):
+    """
+    Build a small synthetic road network.
+
+    Nodes are scattered over a few kilometers; each connects to its nearest
+    neighbours, mostly by two-way roads, with some one-way streets and some
+    parallel edges. Every weight is drawn independently, so each weight has
+    its own shortest paths, and lengths never undercut the straight line.
+    The last node is isolated.
+    """
+    rng = np.random.default_rng(seed)
+    lats = 11.0 + rng.random(n) * 0.03
+    lons = 77.0 + rng.random(n) * 0.03
+    graph = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(n):
+        graph.add_node(1000 + i, y=float(lats[i]), x=float(lons[i]))
+
+    def add(u, v):
+        straight = haversine_distance_m(lats[u], lons[u], lats[v], lons[v])
+        data = {w: float(straight * (1.0 + rng.random())) for w in WEIGHT_ATTRIBUTES}
+        data["name"] = f"Street {min(u, v)}"
+        graph.add_edge(1000 + u, 1000 + v, **data)
+
+    order = np.argsort((lats[:, None] - lats[None]) ** 2 + (lons[:, None] - lons[None]) ** 2, axis=1)
+    for u in range(n - 1):
+        for v in order[u, 1:4]:
+            if v == n - 1:
+                continue
+            add(u, v)
+            if rng.random() < 0.8:
+                add(v, u)
+            if rng.random() < 0.1:
+                add(u, v)
+    return graph
+
+
+@pytest.fixture(scope="session")
+def graph():
+    return road_graph()
+
+
+@pytest.fixture(scope="session")
+def compact(graph):
+    return CompactGraph.from_networkx(graph)
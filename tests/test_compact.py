@@ -0,0 +1,68 @@
+import json
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES, CompactGraph
+
+
+def test_csr_arrays_hold_every_edge(graph, compact):
+    assert compact.num_nodes == graph.number_of_nodes()
+    assert compact.num_edges == graph.number_of_edges()
+    sources = compact.edge_sources()
+    for e in range(compact.num_edges):
+        u, v = compact.node_ids[sources[e]], compact.node_ids[compact.targets[e]]
+        data = graph[u][v][compact.edge_keys[e]]
+        for weight in WEIGHT_ATTRIBUTES:
+            assert compact.weights[weight][e] == data[weight]
+        assert compact.name_table[compact.edge_names[e]] == data["name"]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_round_trip(tmp_path, compact, mmap):
+    directory = str(tmp_path / "graph.bin")
+    compact.save(directory)
+    loaded = CompactGraph.load(directory, mmap=mmap)
+
+    assert loaded.fingerprint() == compact.fingerprint()
+    for name in ("node_ids", "lat", "lon", "offsets", "targets", "edge_keys", "geometry_offsets",
+                 "geometry_lat", "geometry_lon", "edge_names"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(compact, name))
+    for weight in WEIGHT_ATTRIBUTES:
+        np.testing.assert_array_equal(loaded.weights[weight], compact.weights[weight])
+    assert loaded.name_table == compact.name_table
+    assert loaded.node_index(compact.node_ids[7].item()) == 7
+    assert isinstance(loaded.lat, np.memmap) == mmap
+
+
+def test_load_rejects_missing_or_other_format(tmp_path, compact):
+    assert CompactGraph.load(str(tmp_path / "missing.bin")) is None
+
+    directory = str(tmp_path / "graph.bin")
+    compact.save(directory)
+    manifest_file = os.path.join(directory, "manifest.json")
+    with open(manifest_file, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["format"] += 1
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    assert CompactGraph.load(directory) is None
+
+
+def test_to_networkx_keeps_shortest_paths(graph, compact):
+    rebuilt = compact.to_networkx()
+    assert rebuilt.number_of_edges() == graph.number_of_edges()
+    for weight in WEIGHT_ATTRIBUTES:
+        source = list(graph.nodes)[3]
+        assert (nx.single_source_dijkstra_path_length(rebuilt, source, weight=weight)
+                == pytest.approx(nx.single_source_dijkstra_path_length(graph, source, weight=weight)))
+
+
+def test_path_edges_pick_cheapest_parallel_edge(graph, compact):
+    path = [compact.node_index(n) for n in nx.shortest_path(graph, 1000, 1050, weight="length")]
+    edges = compact.path_edges(path)
+    assert compact.weights["length"][edges].sum() == pytest.approx(nx.shortest_path_length(graph, 1000, 1050, weight="length"))
+    with pytest.raises(ValueError):
+        compact.path_edges([0, compact.num_nodes - 1])
@@ -0,0 +1,87 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core.contraction import ContractionHierarchy
+from route_optimizer.core.search import CompactSearchEngine
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES, CompactGraph
+
+from conftest import road_graph
+
+
+@pytest.fixture(scope="module")
+def hierarchies(compact):
+    return {weight: ContractionHierarchy.build(compact, weight) for weight in WEIGHT_ATTRIBUTES}
+
+
+def _edge_cost(compact, u, v, weight):
+    """Cost of the cheapest original edge u -> v; fails if there is none."""
+    start, end = compact.offsets[u], compact.offsets[u + 1]
+    heads = compact.targets[start:end]
+    assert (heads == v).any(), f"no edge {u} -> {v}"
+    return compact.weights[weight][start:end][heads == v].min()
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_query_matches_dijkstra(compact, hierarchies, weight):
+    """Costs equal plain Dijkstra and unpacked paths run over original edges only."""
+    hierarchy = hierarchies[weight]
+    engine = CompactSearchEngine(compact)
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        source, target = rng.choice(compact.num_nodes - 1, 2, replace=False).tolist()
+        expected = engine.dijkstra_all(source, weight)[target]
+        result = hierarchy.query(source, target)
+        assert result.cost == pytest.approx(expected)
+        assert result.path[0] == source and result.path[-1] == target
+        cost = sum(_edge_cost(compact, u, v, weight) for u, v in zip(result.path, result.path[1:]))
+        assert cost == pytest.approx(expected)
+
+
+def test_query_between_matches_dijkstra(compact, hierarchies):
+    hierarchy = hierarchies["cost"]
+    engine = CompactSearchEngine(compact)
+    rng = np.random.default_rng(1)
+    for _ in range(15):
+        picked = rng.choice(compact.num_nodes - 1, 4, replace=False).tolist()
+        sources = {s: float(rng.random() * 100) for s in picked[:2]}
+        targets = {t: float(rng.random() * 100) for t in picked[2:]}
+        result = hierarchy.query_between(sources, targets)
+        assert result.cost == pytest.approx(engine.astar_between(sources, targets, weight="cost").cost)
+        assert result.path[0] in sources and result.path[-1] in targets
+
+
+@pytest.mark.parametrize("weight", ["length", "traffic"])
+def test_many_to_many_matches_dijkstra(compact, hierarchies, weight):
+    engine = CompactSearchEngine(compact)
+    sources = list(range(0, compact.num_nodes, 17))
+    targets = list(range(3, compact.num_nodes, 11))
+    matrix = hierarchies[weight].many_to_many(sources, targets)
+    expected = np.array([engine.dijkstra_all(s, weight)[targets] for s in sources])
+    np.testing.assert_allclose(matrix, expected)
+
+
+def test_unreachable_target_raises(compact, hierarchies):
+    with pytest.raises(nx.NetworkXNoPath):
+        hierarchies["length"].query(0, compact.num_nodes - 1)
+
+
+def test_save_and_load(tmp_path, compact, hierarchies):
+    path = str(tmp_path / "ch-length.npz")
+    hierarchies["length"].save(path)
+    loaded = ContractionHierarchy.load(path, compact)
+    assert loaded is not None and loaded.weight == "length"
+    assert loaded.query(0, 50).cost == pytest.approx(hierarchies["length"].query(0, 50).cost)
+
+
+def test_load_refuses_other_graph(tmp_path, graph, hierarchies):
+    path = str(tmp_path / "ch-length.npz")
+    hierarchies["length"].save(path)
+    assert ContractionHierarchy.load(path, CompactGraph.from_networkx(road_graph(seed=1))) is None
+
+    # Same topology, one changed weight
+    reweighted = graph.copy()
+    u, v, key = next(iter(reweighted.edges(keys=True)))
+    reweighted[u][v][key]["length"] += 1.0
+    assert ContractionHierarchy.load(path, CompactGraph.from_networkx(reweighted)) is None
+    assert ContractionHierarchy.load(str(tmp_path / "missing.npz"), CompactGraph.from_networkx(graph)) is None
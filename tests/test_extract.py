@@ -0,0 +1,38 @@
+import os
+
+import osmnx as ox
+
+from route_optimizer.config.models import RouteConfig
+from route_optimizer.graph.compact import CompactGraph
+from route_optimizer.graph.extract import main
+from route_optimizer.graph.manager import GraphManager
+
+
+def _write_extract(path):
+    """A 3x3 grid of residential streets, two-way except one one-way row."""
+    nodes, ways = [], []
+    for i in range(3):
+        for j in range(3):
+            nodes.append(f'<node id="{i * 3 + j + 1}" lat="{11.0 + i * 0.001}" lon="{77.0 + j * 0.001}"/>')
+    for i in range(3):
+        row = "".join(f'<nd ref="{i * 3 + j + 1}"/>' for j in range(3))
+        oneway = '<tag k="oneway" v="yes"/>' if i == 1 else ""
+        ways.append(f'<way id="{100 + i}">{row}<tag k="highway" v="residential"/>{oneway}</way>')
+        column = "".join(f'<nd ref="{j * 3 + i + 1}"/>' for j in range(3))
+        ways.append(f'<way id="{200 + i}">{column}<tag k="highway" v="residential"/></way>')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0"?><osm version="0.6">' + "".join(nodes + ways) + "</osm>")
+
+
+def test_cli_saves_extract_as_one_graph(tmp_path):
+    extract = str(tmp_path / "grid.osm")
+    _write_extract(extract)
+    graph_file = str(tmp_path / "grid.graphml")
+    main([extract, "--cache-dir", str(tmp_path), "--tile-size", "0", "--graph", graph_file])
+
+    graph = ox.load_graphml(graph_file)
+    compact = CompactGraph.load(GraphManager.binary_path(graph_file))
+    expected = GraphManager(RouteConfig(graph_cache_dir=str(tmp_path), tile_size_deg=0)).graph_from_extract(extract)
+    assert (graph.number_of_nodes(), graph.number_of_edges()) == (expected.number_of_nodes(), expected.number_of_edges())
+    assert compact.fingerprint() == CompactGraph.from_networkx(graph).fingerprint()
+    assert not os.path.exists(os.path.join(str(tmp_path), "tiles"))
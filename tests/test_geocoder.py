@@ -0,0 +1,34 @@
+import pytest
+
+from route_optimizer.config.models import RouteConfig
+from route_optimizer.geocoding.geocoder import Geocoder
+from route_optimizer.geocoding.normalize import normalize_query
+
+
+@pytest.fixture
+def geocoder(tmp_path):
+    config = RouteConfig(geocode_db=str(tmp_path / "geo.sqlite"), nominatim_cache_dir=str(tmp_path),
+                         offline=True, autocomplete_history_size=2)
+    geocoder = Geocoder(config)
+    geocoder.store.put(normalize_query("Prozone Mall"), 11.05, 76.99, "nominatim", label="Prozone Mall")
+    yield geocoder
+    geocoder.store.close()
+
+
+def test_known_names_are_always_credited(geocoder):
+    geocoder.add_search("prozone mall", 11.05, 76.99, count=3)
+    for i in range(5):
+        geocoder.add_search(f"typed {i}", 11.0, 77.0)
+    geocoder.add_search("Prozone Mall", 11.05, 76.99)
+    [suggestion] = geocoder.suggest("prozone")
+    assert suggestion.label == "prozone mall" and suggestion.score == 4.0
+
+
+def test_unknown_names_are_capped(geocoder):
+    for i in range(5):
+        geocoder.add_search(f"typed {i}", 11.0, 77.0)
+    geocoder.add_search("typed 0", 11.0, 77.0)
+    assert [s.label for s in geocoder.suggest("typed")] == ["typed 0", "typed 1"]
+    assert geocoder.suggest("typed 0")[0].score == 2.0
+    geocoder.add_search("  ", 11.0, 77.0)
+    assert len(geocoder.autocomplete) == 2
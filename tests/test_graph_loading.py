@@ -0,0 +1,66 @@
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.config.models import RouteConfig
+from route_optimizer.graph.manager import GraphManager
+from route_optimizer.optimizer import RouteOptimizer
+from route_optimizer.traffic.profiles import BINS_PER_WEEK, SpeedProfiles
+
+CENTER, RADIUS = (11.015, 77.015), 3000
+
+
+@pytest.fixture
+def config(tmp_path):
+    return RouteConfig(graph_cache_dir=str(tmp_path), geocode_db=str(tmp_path / "geo.sqlite"),
+                       nominatim_cache_dir=str(tmp_path), num_landmarks=0, offline=True, tile_size_deg=0)
+
+
+@pytest.fixture
+def cached(config, compact):
+    """Binary cache of the test graph where a radius download around CENTER would be cached."""
+    manager = GraphManager(config)
+    compact.save(GraphManager.binary_path(manager.cache_path(CENTER, RADIUS)))
+    return manager
+
+
+def test_load_graph_rebuilds_networkx_from_binary_cache(cached, graph, compact):
+    graph_from_cache = cached.load_graph(CENTER, RADIUS)
+    loaded_graph, loaded = cached.load(CENTER, RADIUS)
+    assert loaded_graph is None and loaded.fingerprint() == compact.fingerprint()
+    assert isinstance(graph_from_cache, nx.MultiDiGraph)
+    assert graph_from_cache.number_of_edges() == graph.number_of_edges()
+    assert not os.path.exists(cached.cache_path(CENTER, RADIUS))
+
+
+def test_optimizer_graph_is_available_with_binary_cache(config, cached, graph):
+    optimizer = RouteOptimizer(config)
+    assert optimizer.graph is None
+    entry = optimizer.load_graph(CENTER, RADIUS)
+    assert entry.graph is None
+    assert optimizer.graph is optimizer.graph
+    assert optimizer.graph.number_of_nodes() == graph.number_of_nodes()
+
+
+def test_rebuilt_speed_profiles_are_reloaded(config, cached, compact):
+    optimizer = RouteOptimizer(config)
+    entry = optimizer.load_graph(CENTER, RADIUS)
+    assert entry.artifacts["speed_profiles"] is None
+    speeds = GraphManager.artifact_path(entry.key, "speeds")
+
+    SpeedProfiles(np.full((compact.num_edges, BINS_PER_WEEK), 30, dtype=np.uint8), compact.fingerprint(), "v1").save(speeds)
+    entry = optimizer.load_graph(CENTER, RADIUS)
+    assert entry.artifacts["speed_profiles"].version == "v1"
+    assert optimizer.load_graph(CENTER, RADIUS) is entry
+
+    SpeedProfiles(np.full((compact.num_edges, BINS_PER_WEEK), 50, dtype=np.uint8), compact.fingerprint(), "v2").save(speeds)
+    entry = optimizer.load_graph_for_route((11.014, 77.014), (11.016, 77.016))
+    assert entry.artifacts["speed_profiles"].version == "v2"
+    assert optimizer.speed_profiles is entry.artifacts["speed_profiles"]
+
+
+def test_load_tiles_requires_tiling(cached):
+    with pytest.raises(ValueError, match="Tiling is disabled"):
+        cached.load_tiles(frozenset({(0, 0)}))
@@ -0,0 +1,59 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core.landmarks import LandmarkTable
+from route_optimizer.core.pathfinder import SEARCH_MODES, AStarPathfinder
+from route_optimizer.core.search import CompactSearchEngine
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES, CompactGraph
+
+from conftest import road_graph
+
+
+@pytest.fixture(scope="module")
+def landmarks(compact):
+    return LandmarkTable.build(compact, num_landmarks=4)
+
+
+def test_tables_hold_exact_distances(compact, landmarks):
+    engine = CompactSearchEngine(compact)
+    for weight in WEIGHT_ATTRIBUTES:
+        for i, landmark in enumerate(landmarks.landmarks):
+            np.testing.assert_allclose(landmarks.forward[weight][i], engine.dijkstra_all(landmark, weight))
+            np.testing.assert_allclose(landmarks.backward[weight][i], engine.dijkstra_all(landmark, weight, reverse=True))
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_bounds_are_admissible_and_consistent(compact, landmarks, weight):
+    engine = CompactSearchEngine(compact)
+    sources = compact.edge_sources()
+    costs = compact.weights[weight]
+    for target in (0, 37, 90):
+        bound = landmarks.heuristic_to(target, weight)
+        assert (bound <= engine.dijkstra_all(target, weight, reverse=True) + 1e-9).all()
+        assert (bound[sources] <= costs + bound[compact.targets] + 1e-9).all()
+        start = landmarks.heuristic_from(target, weight)
+        assert (start <= engine.dijkstra_all(target, weight) + 1e-9).all()
+
+
+def test_zero_cost_edges_keep_bounds_admissible():
+    graph = road_graph(n=60, seed=2)
+    for i, (u, v, key) in enumerate(list(graph.edges(keys=True))):
+        if i % 5 == 0:
+            graph[u][v][key]["cost"] = 0.0
+    compact = CompactGraph.from_networkx(graph)
+    table = LandmarkTable.build(compact, num_landmarks=3, weights=["cost"])
+    dist = CompactSearchEngine(compact).dijkstra_all(10, "cost", reverse=True)
+    assert (table.heuristic_to(10, "cost") <= dist + 1e-9).all()
+
+
+@pytest.mark.parametrize("mode", SEARCH_MODES)
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_alt_routes_match_networkx(graph, compact, landmarks, weight, mode):
+    pathfinder = AStarPathfinder(graph, compact=compact, landmarks=landmarks, search_mode=mode)
+    rng = np.random.default_rng(3)
+    nodes = list(graph.nodes)[:-1]
+    for _ in range(10):
+        u, v = rng.choice(nodes, 2, replace=False).tolist()
+        result = pathfinder._search(u, v, weight)
+        assert result.distance_m == pytest.approx(nx.shortest_path_length(graph, u, v, weight=weight))
@@ -0,0 +1,61 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core import matrix
+from route_optimizer.core.contraction import ContractionHierarchy
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES, CompactGraph
+
+from conftest import road_graph
+
+
+def _expected(graph, compact, weight, sources, targets):
+    rows = []
+    for s in sources:
+        dist = nx.single_source_dijkstra_path_length(graph, compact.node_ids[s].item(), weight=weight)
+        rows.append([dist.get(compact.node_ids[t].item(), np.inf) for t in targets])
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_one_to_many_matches_networkx(graph, compact, weight):
+    sources, targets = [0, 5, 40, compact.num_nodes - 1], list(range(0, compact.num_nodes, 7))
+    costs = matrix.one_to_many(compact, weight, sources, targets)
+    np.testing.assert_allclose(costs, _expected(graph, compact, weight, sources, targets))
+
+
+def test_zero_cost_edges_are_free():
+    graph = road_graph(n=60, seed=4)
+    for i, (u, v, key) in enumerate(list(graph.edges(keys=True))):
+        if i % 4 == 0:
+            graph[u][v][key]["cost"] = 0.0
+    compact = CompactGraph.from_networkx(graph)
+    sources, targets = [0, 9, 30], list(range(compact.num_nodes))
+    costs = matrix.one_to_many(compact, "cost", sources, targets)
+    np.testing.assert_allclose(costs, _expected(graph, compact, "cost", sources, targets))
+
+
+def test_many_to_many_with_duplicates_and_hierarchy(graph, compact, monkeypatch):
+    sources, targets = [3, 8, 3, 60], [8, 90, 90, 3, 17]
+    expected = _expected(graph, compact, "fuel", sources, targets)
+    costs, method = matrix.many_to_many(compact, "fuel", sources, targets, workers=1)
+    assert method == "dijkstra"
+    np.testing.assert_allclose(costs, expected)
+
+    monkeypatch.setattr(matrix, "HIERARCHY_MIN_NODES", 0)
+    hierarchy = ContractionHierarchy.build(compact, "fuel")
+    costs, method = matrix.many_to_many(compact, "fuel", sources, targets, hierarchy=hierarchy)
+    assert method == "ch"
+    np.testing.assert_allclose(costs, expected)
+
+
+def test_worker_pool_matches_in_process(compact, monkeypatch):
+    monkeypatch.setattr(matrix, "PARALLEL_MIN_WORK", 0)
+    sources, targets = list(range(0, compact.num_nodes, 3)), list(range(compact.num_nodes))
+    try:
+        parallel = matrix.one_to_many(compact, "length", sources, targets, workers=2)
+    finally:
+        if matrix._pool is not None:
+            matrix._discard_pool(matrix._pool)
+    monkeypatch.setattr(matrix, "PARALLEL_MIN_WORK", float("inf"))
+    np.testing.assert_allclose(parallel, matrix.one_to_many(compact, "length", sources, targets, workers=2))
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from route_optimizer.utils.polyline import decode_polyline, encode_polyline
+
+
+def test_encodes_reference_example():
+    """Example from Google's format description."""
+    encoded = encode_polyline([38.5, 40.7, 43.252], [-120.2, -120.95, -126.453])
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(encoded) == [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_round_trip(precision):
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-90, 90, 500)
+    lons = rng.uniform(-180, 180, 500)
+    decoded = np.array(decode_polyline(encode_polyline(lats, lons, precision), precision))
+    np.testing.assert_allclose(decoded[:, 0], np.round(lats, precision), atol=10 ** -(precision + 3))
+    np.testing.assert_allclose(decoded[:, 1], np.round(lons, precision), atol=10 ** -(precision + 3))
+
+
+def test_empty_and_invalid():
+    assert encode_polyline([], []) == ""
+    assert decode_polyline("") == []
+    for bad in ("_p~iF~ps|U_", " ", "é"):
+        with pytest.raises(ValueError):
+            decode_polyline(bad)
@@ -0,0 +1,12 @@
+import dataclasses
+import sys
+
+from route_optimizer.graph.registry import GraphEntry
+
+
+def test_size_counts_street_names(compact):
+    unnamed = dataclasses.replace(compact, edge_names=None, name_table=())
+    named_size = GraphEntry("named", None, compact, (11.0, 77.0), 3000.0).size_bytes
+    unnamed_size = GraphEntry("unnamed", None, unnamed, (11.0, 77.0), 3000.0).size_bytes
+    names = sys.getsizeof(compact.name_table) + sum(sys.getsizeof(name) for name in compact.name_table)
+    assert named_size - unnamed_size == compact.edge_names.nbytes + names - sys.getsizeof(())
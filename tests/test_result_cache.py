@@ -0,0 +1,36 @@
+import time
+
+from route_optimizer.core.result_cache import RouteResultCache
+
+
+def _route(n):
+    return {"path": list(range(n)), "traffic": [0.5] * n, "distance_m": 10.0 * n}
+
+
+def test_results_are_isolated_from_callers():
+    cache = RouteResultCache(max_bytes=1 << 20, ttl_s=60)
+    route = _route(5)
+    cache.put("a", route, compute_s=0.1)
+    route["path"].append(99)
+
+    hit = cache.get("a")
+    assert hit == _route(5)
+    hit["path"].append(7)
+    hit["traffic"][0] = 1.0
+    hit["cached"] = True
+    assert cache.get("a") == _route(5)
+    assert cache.stats()["hits"] == 2
+
+
+def test_expired_and_least_recently_used_results_are_dropped():
+    cache = RouteResultCache(max_bytes=2 * (1024 + 80 * 10), ttl_s=60)
+    cache.put("a", _route(10), compute_s=0.1)
+    cache.put("b", _route(10), compute_s=0.1)
+    assert cache.get("a") is not None
+    cache.put("c", _route(10), compute_s=0.1)
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+
+    cache.ttl_s = 0.0
+    cache.put("d", _route(1), compute_s=0.1)
+    time.sleep(0.01)
+    assert cache.get("d") is None
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "backend"))
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """Test client whose requests fail if they reach the optimizer."""
+    from app.routes import route_api
+
+    def no_optimizer():
+        raise AssertionError("request reached the optimizer")
+
+    monkeypatch.setattr(route_api, "get_optimizer", no_optimizer)
+    return app.test_client()
+
+
+def _route(**extra):
+    return {"origin": "A", "destination": "B", "origin_coords": [11.0, 77.0], "dest_coords": [11.01, 77.01], **extra}
+
+
+@pytest.mark.parametrize("tolerance", ["abc", -1, "nan", [5]])
+def test_invalid_tolerance_is_rejected(client, tolerance):
+    response = client.post("/api/route/calculate", json=_route(tolerance_m=tolerance))
+    assert response.status_code == 400
+    assert "tolerance_m" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("zoom", ["far", -2, "inf"])
+def test_invalid_zoom_is_rejected_before_routing(client, zoom):
+    response = client.post("/api/route/calculate", json=_route(zoom=zoom))
+    assert response.status_code == 400
+    assert "zoom" in response.get_json()["error"]
@@ -0,0 +1,136 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core.search import CompactSearchEngine
+from route_optimizer.graph.compact import WEIGHT_ATTRIBUTES
+from route_optimizer.utils.helpers import haversine_distance_m_array
+
+
+def _pairs(graph, count=25, seed=0):
+    rng = np.random.default_rng(seed)
+    nodes = list(graph.nodes)[:-1]
+    return [tuple(rng.choice(nodes, 2, replace=False).tolist()) for _ in range(count)]
+
+
+def _path_cost(graph, path, weight):
+    """Cost of a node path over the cheapest parallel edges; fails if the path is not in the graph."""
+    return sum(min(d[weight] for d in graph[u][v].values()) for u, v in zip(path, path[1:]))
+
+
+def _straight_line(compact, node):
+    return haversine_distance_m_array(compact.lat, compact.lon, compact.lat[node], compact.lon[node])
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_astar_matches_networkx(graph, compact, weight):
+    engine = CompactSearchEngine(compact)
+    for u, v in _pairs(graph):
+        expected = nx.shortest_path_length(graph, u, v, weight=weight)
+        result = engine.astar(compact.node_index(u), compact.node_index(v), weight=weight)
+        path = compact.to_node_ids(result.path)
+        assert result.cost == pytest.approx(expected)
+        assert path[0] == u and path[-1] == v
+        assert _path_cost(graph, path, weight) == pytest.approx(expected)
+
+
+def test_astar_with_straight_line_heuristic(graph, compact):
+    """Lengths never undercut the straight line, so the heuristic keeps A* exact."""
+    engine = CompactSearchEngine(compact)
+    for u, v in _pairs(graph, seed=1):
+        target = compact.node_index(v)
+        result = engine.astar(compact.node_index(u), target, heuristic=_straight_line(compact, target))
+        assert result.cost == pytest.approx(nx.shortest_path_length(graph, u, v, weight="length"))
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_bidirectional_matches_networkx(graph, compact, weight):
+    engine = CompactSearchEngine(compact)
+    for u, v in _pairs(graph, seed=2):
+        expected = nx.shortest_path_length(graph, u, v, weight=weight)
+        result = engine.bidirectional(compact.node_index(u), compact.node_index(v), weight=weight)
+        path = compact.to_node_ids(result.path)
+        assert result.cost == pytest.approx(expected)
+        assert path[0] == u and path[-1] == v
+        assert _path_cost(graph, path, weight) == pytest.approx(expected)
+
+
+def test_bidirectional_with_potentials(graph, compact):
+    engine = CompactSearchEngine(compact)
+    for u, v in _pairs(graph, seed=3):
+        source, target = compact.node_index(u), compact.node_index(v)
+        potentials = (_straight_line(compact, target), _straight_line(compact, source))
+        result = engine.bidirectional(source, target, potentials=potentials)
+        assert result.cost == pytest.approx(nx.shortest_path_length(graph, u, v, weight="length"))
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_between_matches_networkx(graph, compact, weight):
+    """Weighted endpoint sets behave like a virtual source and target joined to them."""
+    engine = CompactSearchEngine(compact)
+    rng = np.random.default_rng(4)
+    nodes = list(graph.nodes)[:-1]
+    for _ in range(15):
+        picked = rng.choice(nodes, 4, replace=False).tolist()
+        sources = {compact.node_index(n): float(rng.random() * 100) for n in picked[:2]}
+        targets = {compact.node_index(n): float(rng.random() * 100) for n in picked[2:]}
+        virtual = nx.MultiDiGraph(graph)
+        for s, d in sources.items():
+            virtual.add_edge("s", compact.node_ids[s], **{weight: d})
+        for t, d in targets.items():
+            virtual.add_edge(compact.node_ids[t], "t", **{weight: d})
+        expected = nx.shortest_path_length(virtual, "s", "t", weight=weight)
+
+        for result in (engine.astar_between(sources, targets, weight=weight),
+                       engine.bidirectional_between(sources, targets, weight=weight)):
+            assert result.cost == pytest.approx(expected)
+            assert result.path[0] in sources and result.path[-1] in targets
+
+
+@pytest.mark.parametrize("weight", WEIGHT_ATTRIBUTES)
+def test_one_to_many_matches_networkx(graph, compact, weight):
+    engine = CompactSearchEngine(compact)
+    nodes = list(graph.nodes)
+    source = nodes[0]
+    expected = nx.single_source_dijkstra_path_length(graph, source, weight=weight)
+    found = engine.one_to_many(compact.node_index(source), [compact.node_index(n) for n in nodes[1:]], weight)
+    assert {compact.node_ids[t] for t in found} == set(expected) - {source}
+    for target, result in found.items():
+        assert result.cost == pytest.approx(expected[compact.node_ids[target]])
+        assert _path_cost(graph, compact.to_node_ids(result.path), weight) == pytest.approx(result.cost)
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_dijkstra_all_matches_networkx(graph, compact, reverse):
+    engine = CompactSearchEngine(compact)
+    root = list(graph.nodes)[5]
+    expected = nx.single_source_dijkstra_path_length(graph.reverse() if reverse else graph, root, weight="cost")
+    dist = engine.dijkstra_all(compact.node_index(root), "cost", reverse=reverse)
+    for i, node in enumerate(compact.node_ids):
+        assert dist[i] == pytest.approx(expected.get(node, np.inf))
+
+
+def test_time_dependent_with_constant_speed_matches_networkx(graph, compact):
+    """With time-independent travel times every departure gets the fastest static route."""
+    engine = CompactSearchEngine(compact)
+    minutes = compact.weights["length"] / 500.0
+
+    def travel_time(edge, times):
+        return np.full(len(times), minutes[edge])
+
+    for u, v in _pairs(graph, count=10, seed=5):
+        results = engine.time_dependent(compact.node_index(u), compact.node_index(v), np.array([0.0, 60.0, 600.0]),
+                                        travel_time)
+        expected = nx.shortest_path_length(graph, u, v, weight="length") / 500.0
+        for result in results:
+            assert result.cost == pytest.approx(expected)
+
+
+def test_unreachable_target_raises(graph, compact):
+    engine = CompactSearchEngine(compact)
+    source, isolated = compact.node_index(1000), compact.node_index(list(graph.nodes)[-1])
+    with pytest.raises(nx.NetworkXNoPath):
+        engine.astar(source, isolated)
+    with pytest.raises(nx.NetworkXNoPath):
+        engine.bidirectional(source, isolated)
+    assert engine.one_to_many(source, [isolated]) == {}
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from route_optimizer.utils.simplify import EARTH_RADIUS_M, significance, simplify, tolerance_for_zoom
+
+
+def _douglas_peucker(x, y, tolerance):
+    """Recursive reference implementation on planar coordinates."""
+    def run(start, end):
+        if end - start < 2:
+            return []
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        norm = dx * dx + dy * dy
+        points = np.arange(start + 1, end)
+        t = np.clip(((x[points] - x[start]) * dx + (y[points] - y[start]) * dy) / norm, 0, 1) if norm else 0.0
+        dist = np.hypot(x[points] - x[start] - t * dx, y[points] - y[start] - t * dy)
+        split = points[np.argmax(dist)]
+        if dist.max() <= tolerance:
+            return []
+        return run(start, split) + [split] + run(split, end)
+    return [0] + run(0, len(x) - 1) + [len(x) - 1]
+
+
+@pytest.mark.parametrize("tolerance", [0.5, 5.0, 50.0, 500.0])
+def test_matches_douglas_peucker(tolerance):
+    rng = np.random.default_rng(0)
+    lats = 11.0 + np.cumsum(rng.normal(0, 2e-4, 400))
+    lons = 77.0 + np.cumsum(rng.normal(0, 2e-4, 400))
+    x = np.radians(lons) * np.cos(np.radians(lats.mean())) * EARTH_RADIUS_M
+    y = np.radians(lats) * EARTH_RADIUS_M
+    assert simplify(significance(lats, lons), tolerance).tolist() == _douglas_peucker(x, y, tolerance)
+
+
+def test_short_lines_keep_every_point():
+    assert simplify(significance([11.0, 11.1], [77.0, 77.1]), 1e9).tolist() == [0, 1]
+    assert simplify(significance([11.0], [77.0]), 1.0).tolist() == [0]
+
+
+def test_tolerance_halves_per_zoom_level():
+    assert tolerance_for_zoom(0, 0.0) == pytest.approx(156543.03392)
+    assert tolerance_for_zoom(11, 60.0) == pytest.approx(tolerance_for_zoom(10, 60.0) / 2)
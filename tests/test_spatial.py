@@ -0,0 +1,83 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core.contraction import ContractionHierarchy
+from route_optimizer.core.pathfinder import SEARCH_MODES, AStarPathfinder
+from route_optimizer.graph.spatial import SpatialIndex
+from route_optimizer.utils.helpers import haversine_distance_m_array
+
+
+@pytest.fixture(scope="module")
+def index(compact):
+    return SpatialIndex(compact)
+
+
+def _points(count, seed):
+    rng = np.random.default_rng(seed)
+    return [(11.0 + rng.random() * 0.03, 77.0 + rng.random() * 0.03) for _ in range(count)]
+
+
+def test_snap_finds_nearest_node(compact, index):
+    points = _points(50, seed=0)
+    snapped = index.snap(points)
+    for (lat, lon), node in zip(points, snapped):
+        dist = haversine_distance_m_array(compact.lat, compact.lon, lat, lon)
+        assert dist[compact.node_index(node)] == pytest.approx(dist.min())
+    assert index.snap([]) == []
+
+
+def test_snap_to_edges_finds_nearest_point_on_any_edge(compact, index):
+    """Brute force over every edge in the same local planar frame."""
+    sources = compact.edge_sources()
+    points = _points(50, seed=1)
+    for (lat, lon), snap in zip(points, index.snap_to_edges(points)):
+        scale = np.cos(np.radians(lat))
+        ax, ay = np.radians(compact.lon[sources] - lon) * scale, np.radians(compact.lat[sources] - lat)
+        bx, by = np.radians(compact.lon[compact.targets] - lon) * scale, np.radians(compact.lat[compact.targets] - lat)
+        dx, dy = bx - ax, by - ay
+        t = np.clip(-(ax * dx + ay * dy) / (dx * dx + dy * dy), 0.0, 1.0)
+        nearest = 6371000.0 * np.hypot(ax + t * dx, ay + t * dy).min()
+        assert snap.distance_m == pytest.approx(nearest, abs=1e-6)
+        assert snap.tail == sources[snap.edge] and snap.head == compact.targets[snap.edge]
+        assert 0.0 <= snap.fraction <= 1.0
+
+
+def _split_graph(graph, compact, origin, dest, weight):
+    """Copy of `graph` with the snapped points as nodes joined to the ends of their edges."""
+    split = nx.MultiDiGraph(graph)
+    costs = compact.weights[weight]
+    ids = compact.node_ids
+
+    def cheapest(u, v):
+        edges = graph.get_edge_data(ids[u], ids[v])
+        return min(d[weight] for d in edges.values()) if edges else None
+
+    split.add_edge("origin", ids[origin.head], **{weight: (1 - origin.fraction) * costs[origin.edge]})
+    if cheapest(origin.head, origin.tail) is not None:
+        split.add_edge("origin", ids[origin.tail], **{weight: origin.fraction * cheapest(origin.head, origin.tail)})
+    split.add_edge(ids[dest.tail], "dest", **{weight: dest.fraction * costs[dest.edge]})
+    if cheapest(dest.head, dest.tail) is not None:
+        split.add_edge(ids[dest.head], "dest", **{weight: (1 - dest.fraction) * cheapest(dest.head, dest.tail)})
+    return split
+
+
+@pytest.mark.parametrize("mode", SEARCH_MODES + ("contraction",))
+@pytest.mark.parametrize("weight", ["length", "fuel"])
+def test_snapped_path_matches_networkx(graph, compact, index, weight, mode):
+    hierarchies = {weight: ContractionHierarchy.build(compact, weight)} if mode == "contraction" else None
+    pathfinder = AStarPathfinder(graph, compact=compact, hierarchies=hierarchies,
+                                 search_mode="astar" if mode == "contraction" else mode)
+    points = _points(30, seed=2)
+    snaps = index.snap_to_edges(points)
+    for origin, dest in zip(snaps[::2], snaps[1::2]):
+        if {origin.tail, origin.head} == {dest.tail, dest.head}:
+            continue
+        split = _split_graph(graph, compact, origin, dest, weight)
+        try:
+            expected = nx.shortest_path_length(split, "origin", "dest", weight=weight)
+        except nx.NetworkXNoPath:
+            with pytest.raises(nx.NetworkXNoPath):
+                pathfinder.find_snapped_path(origin, dest, weight)
+            continue
+        assert pathfinder.find_snapped_path(origin, dest, weight).distance_m == pytest.approx(expected)
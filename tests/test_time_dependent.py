@@ -0,0 +1,81 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from route_optimizer.core.pathfinder import AStarPathfinder
+from route_optimizer.core.search import CompactSearchEngine
+from route_optimizer.graph.compact import CompactGraph
+from route_optimizer.graph.spatial import SpatialIndex
+
+
+class _Profiles:
+    """Speed profiles with a fixed speed per edge that changes with the hour."""
+
+    def __init__(self, speeds_kph, rush_factor=0.5):
+        self.speeds_kph = np.asarray(speeds_kph, dtype=np.float64)
+        self.rush_factor = rush_factor
+        self.max_speed = float(self.speeds_kph.max())
+
+    def edge_travel_time(self, edge, length_m, minutes, fallback_kph):
+        hour = np.asarray(minutes) // 60 % 24
+        speed = np.where((hour >= 8) & (hour < 10), self.speeds_kph[edge] * self.rush_factor, self.speeds_kph[edge])
+        return length_m * 0.06 / speed
+
+
+def test_paths_are_timed_edge_by_edge(graph, compact):
+    """Each departure's travel time is the sum of its edges' times when they are reached."""
+    engine = CompactSearchEngine(compact)
+    rng = np.random.default_rng(0)
+    profiles = _Profiles(rng.uniform(10, 80, compact.num_edges))
+    lengths = compact.weights["length"]
+    departures = 60.0 * np.arange(6, 12)
+
+    def travel_time(edge, minutes):
+        return profiles.edge_travel_time(edge, lengths[edge], minutes, 40.0)
+
+    results = engine.time_dependent(compact.node_index(1000), compact.node_index(1050), departures, travel_time)
+    for departure, result in zip(departures, results):
+        now = departure
+        for u, v, edge in zip(result.path, result.path[1:], result.edges):
+            assert compact.edge_sources()[edge] == u and compact.targets[edge] == v
+            now += travel_time(edge, np.array([now]))[0]
+        assert now - departure == pytest.approx(result.cost)
+
+
+def test_distance_follows_the_parallel_edge_driven():
+    """The shorter of two parallel edges is slow, so the route drives the longer one."""
+    graph = nx.MultiDiGraph(crs="epsg:4326")
+    for node, lat in ((1, 11.0), (2, 11.001), (3, 11.002)):
+        graph.add_node(node, y=lat, x=77.0)
+    graph.add_edge(1, 2, 0, length=150.0)
+    graph.add_edge(1, 2, 1, length=300.0)
+    graph.add_edge(2, 3, 0, length=120.0)
+    compact = CompactGraph.from_networkx(graph)
+    lengths = compact.weights["length"]
+    profiles = _Profiles(np.where(lengths == 150.0, 5.0, 60.0))
+
+    routes = AStarPathfinder(graph, compact=compact).find_time_dependent_paths(1, 3, profiles, [0.0], 40.0)
+    assert routes[0].path == [1, 2, 3]
+    assert routes[0].distance_m == pytest.approx(420.0)
+    assert routes[0].travel_time_min == pytest.approx(420.0 * 0.06 / 60.0)
+
+
+def test_snapped_paths_time_both_partial_edges(graph, compact):
+    """At one speed everywhere the fastest snapped route is the shortest, slowed down in rush hour."""
+    index = SpatialIndex(compact)
+    pathfinder = AStarPathfinder(graph, compact=compact)
+    profiles = _Profiles(np.full(compact.num_edges, 30.0))
+    rng = np.random.default_rng(4)
+    points = [(11.0 + rng.random() * 0.03, 77.0 + rng.random() * 0.03) for _ in range(20)]
+    snaps = index.snap_to_edges(points)
+    for origin, dest in zip(snaps[::2], snaps[1::2]):
+        if {origin.tail, origin.head} == {dest.tail, dest.head}:
+            continue
+        try:
+            shortest = pathfinder.find_snapped_path(origin, dest, "length")
+        except nx.NetworkXNoPath:
+            continue
+        quiet, rush = pathfinder.find_time_dependent_snapped_paths(origin, dest, profiles, [180.0, 540.0], 40.0)
+        assert quiet.distance_m == pytest.approx(shortest.distance_m)
+        assert quiet.travel_time_min == pytest.approx(shortest.distance_m * 0.06 / 30.0)
+        assert rush.travel_time_min == pytest.approx(2 * quiet.travel_time_min)
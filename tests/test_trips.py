@@ -0,0 +1,42 @@
+import numpy as np
+
+from route_optimizer.core.trips import Stop, TripPlanner
+
+
+def _travel_minutes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.random((n + 1, 2)) * 10
+    minutes = np.sqrt(((points[:, None] - points[None]) ** 2).sum(-1))
+    np.fill_diagonal(minutes, 0)
+    return minutes
+
+
+def test_construction_ignores_time_budget():
+    """Every servable stop is assigned even when the budget is gone before construction ends."""
+    n = 200
+    minutes = _travel_minutes(n)
+    stops = [Stop(0.0, 0.0, earliest_min=0.0, latest_min=240.0) for _ in range(n)]
+
+    plan = TripPlanner(minutes, minutes, stops, capacities=[np.inf] * 10).solve(time_budget_s=0.0)
+
+    assert plan.unassigned == []
+    assert sorted(s for route in plan.routes for s in route.stops) == list(range(n))
+
+
+def test_tight_windows_with_tiny_budget():
+    """Tight windows are kept and only stops that cannot be served are left unassigned."""
+    n = 60
+    minutes = _travel_minutes(n, seed=1)
+    stops = [Stop(0.0, 0.0, earliest_min=float(i), latest_min=float(i) + 15.0, service_min=1.0) for i in range(n)]
+    # Unreachable in time from the depot, whatever the route
+    stops.append(Stop(0.0, 0.0, latest_min=-1.0))
+    costs = np.pad(minutes, ((0, 1), (0, 1)), constant_values=1.0)
+    np.fill_diagonal(costs, 0)
+
+    plan = TripPlanner(costs, costs, stops, capacities=[np.inf] * 8).solve(time_budget_s=0.001)
+
+    assert plan.unassigned == [n]
+    assert sorted(s for route in plan.routes for s in route.stops) == list(range(n))
+    for route in plan.routes:
+        for stop, arrival in zip(route.stops, route.arrivals_min):
+            assert arrival <= stops[stop].latest_min